@@ -0,0 +1,71 @@
+"""Measure the memory the scrapers hold on to for the pages they scrape, with tracemalloc.
+
+Run from the `api` directory with `python -m benchmarks.html_memory`. Each scenario
+scrapes the same large product page for a number of targets and keeps the scrapers,
+as a scrape run does until the results are saved, then reports the memory still
+allocated and the peak.
+"""
+
+import argparse
+import tracemalloc
+from typing import Callable
+
+from selectolax.parser import HTMLParser
+
+from src.scraper import AmazonScraper, BaseScraper, Extraction
+
+
+class ReserialisingScraper(AmazonScraper):
+    """An Amazon scraper that keeps every page, re-serialised from its parsed tree, as scrapers used to."""
+
+    def load(self, html: str, extraction: Extraction) -> bool:
+        """Store the re-serialised page and the extracted data on the scraper."""
+        found = super().load(html, extraction)
+        self.html = HTMLParser(html).html
+        return found
+
+
+def make_page(size: int) -> str:
+    """Create a product page of about `size` bytes."""
+    filler = '<div class="a-section"><span class="a-text-normal">Customers also bought</span></div>'
+    body = filler * (size // len(filler))
+    return f"""
+        <html><body>{body}
+            <span class="a-offscreen">£30.00</span>
+            <span id="productTitle">Coding Book</span>
+        </body></html>
+        """
+
+
+def scrape(scraper_class: Callable[[str], BaseScraper], pages: int, size: int) -> tuple[int, int]:
+    """Scrape the page for a number of targets, returning the memory still allocated and the peak."""
+    tracemalloc.start()
+    scrapers = []
+    for target in range(pages):
+        # every page is a new string, as each one is downloaded
+        html = make_page(size) + f"<!-- {target} -->"
+        scraper = scraper_class(f"sku{target}")
+        scraper.load(html, scraper.extract(html))
+        scrapers.append(scraper)
+        del html
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, peak
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=20, help="the number of targets scraped")
+    parser.add_argument("--size", type=int, default=3_000_000, help="the size of each page in bytes")
+    args = parser.parse_args()
+
+    mb = 1024 * 1024
+    print(f"{args.pages} pages of {args.size / mb:.1f} MB")  # noqa: T201
+    for name, scraper_class in (("kept and re-serialised", ReserialisingScraper), ("kept on failure only", AmazonScraper)):
+        current, peak = scrape(scraper_class, args.pages, args.size)
+        print(f"{name:>24}: {current / mb:8.1f} MB held, {peak / mb:8.1f} MB peak")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
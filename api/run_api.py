@@ -6,7 +6,7 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.exc import SQLAlchemyError
 
 from src import messages
-from src.api import root, scrape_data, targets
+from src.api import root, scrape_data, sync, targets
 from src.database import crud
 from src.logger.config import LOGS_DIR, setup_logger
 
@@ -23,6 +23,9 @@ Currently we support the following websites:
 
 ## "Scrape Data"
 Each scrape data is a single scrape of a **Target**.
+
+## "Sync"
+Every change to the **Targets** and **Scrape Data** is recorded so they can be replicated incrementally.
 """
 
 app = FastAPI(
@@ -40,6 +43,7 @@ app = FastAPI(
 
 app.include_router(targets.router)
 app.include_router(scrape_data.router)
+app.include_router(sync.router)
 app.include_router(root.router)
 
 
@@ -79,6 +83,30 @@ async def scrape_data_does_not_exist_handler(
     )
 
 
+@app.exception_handler(crud.InvalidFieldError)
+async def invalid_field_handler(
+    request: Request,
+    exc: crud.InvalidFieldError,
+) -> JSONResponse:
+    """Handle CRUD InvalidFieldError."""
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content=messages.InvalidFieldMessage().model_dump(),
+    )
+
+
+@app.exception_handler(crud.UnsupportedUploadError)
+async def unsupported_upload_handler(
+    request: Request,
+    exc: crud.UnsupportedUploadError,
+) -> JSONResponse:
+    """Handle CRUD UnsupportedUploadError."""
+    return JSONResponse(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        content=messages.UnsupportedUploadMessage().model_dump(),
+    )
+
+
 @app.exception_handler(SQLAlchemyError)
 async def sqlalchemy_error_handler(
     request: Request,
@@ -0,0 +1,17 @@
+"""Script to export the scrape data added since the last export as Parquet files."""
+
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from src import settings
+from src.database import engine
+from src.functions.export import export_scrape_data
+from src.logger.config import LOGS_DIR, setup_logger
+
+setup_logger(filepath=LOGS_DIR / "export.log")
+
+if __name__ == "__main__":
+    with Session(engine) as session:
+        result = export_scrape_data(session, Path(settings.EXPORT_DIR), batch_size=settings.EXPORT_BATCH_SIZE)
+    print(f"Exported {result.rows} scrape data to {len(result.files)} files, up to id {result.last_id}")  # noqa: T201
@@ -0,0 +1,41 @@
+"""Long running script that scrapes each target whenever it is due."""
+
+import functools
+import logging
+import signal
+from types import FrameType
+
+from sqlalchemy.orm import Session
+
+from src import settings
+from src.database import engine
+from src.logger.config import LOGS_DIR, setup_logger
+from src.runner import (
+    ScrapeScheduler,
+    create_notification_dispatcher,
+    create_scrape_job,
+)
+
+setup_logger(filepath=LOGS_DIR / "scheduler.log")
+
+notification = create_notification_dispatcher()
+scheduler = ScrapeScheduler(
+    job=create_scrape_job(notification),
+    session_factory=functools.partial(Session, engine),
+    workers=settings.SCHEDULER_WORKERS,
+    refresh_interval=settings.SCHEDULER_REFRESH_INTERVAL,
+    retry_interval=settings.SCHEDULER_RETRY_INTERVAL,
+)
+
+
+def handle_signal(signum: int, frame: FrameType | None) -> None:
+    """Stop the scheduler when the process is asked to exit."""
+    msg = f"Received signal {signum}, stopping scheduler"
+    logging.info(msg=msg)
+    scheduler.stop()
+
+
+signal.signal(signal.SIGTERM, handle_signal)
+signal.signal(signal.SIGINT, handle_signal)
+scheduler.run()
+notification.close()
@@ -1,75 +1,50 @@
 """Main script to run the scraper and save data to database."""
 
-import logging
-import os
-import time
-from datetime import datetime, timezone
+import functools
+from pathlib import Path
 
-from dotenv import load_dotenv
-from py_pushover_client import PushoverAPIClient
-from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from src import settings
 from src.database import engine
-from src.database.models import ScrapedData, ScrapeTargets
-from src.functions.utils import write_file
 from src.logger.config import LOGS_DIR, setup_logger
-from src.scraper import ScraperError, get_scraper
+from src.runner import (
+    CircuitBreaker,
+    create_notification_dispatcher,
+    create_notification_rules,
+    scrape_all,
+)
 
 setup_logger(filepath=LOGS_DIR / "intrepid.log")
 
-load_dotenv()
-API_TOKEN = os.getenv("NOTIFICATION_TOKEN")
-USER_KEY = os.getenv("NOTIFICATION_USER_KEY")
-notification = PushoverAPIClient(api_token=API_TOKEN, user_key=USER_KEY)
-session = Session(engine)
-
-stmt = select(ScrapeTargets)
-products = session.scalars(stmt)
-for product in products:
-    try:
-        msg = f"Getting data for '{product.sku}'"
-        logging.info(msg=msg)
-        scraper = get_scraper(site=product.site, product_id=product.sku)
-
-        if scraper.run():
-            price = scraper.get_price()
-            title = scraper.get_title()
-            # get current time in UTC but remove timezone info so it can be stored in sqlite
-            # this is different from datetime.now() which returns local time (not UTC)
-            timestamp = datetime.now(timezone.utc).replace(tzinfo=None)
-
-            # save data to database and send notification if needed
-            product.scraped_data.append(
-                ScrapedData(
-                    timestamp=timestamp,
-                    price=price,
-                    title=title,
-                ),
-            )
-            product.last_scraped = timestamp
-            session.add(product)
-            session.commit()
-
-            if product.send_notification:
-                notification.send(title=title, message=price)
-                msg = f"Sent notification for '{product.sku}'"
-                logging.info(msg=msg)
-        else:
-            msg = f"Could not find price and title for '{product.sku}'"
-            logging.warning(msg=msg)
-            # error getting data so we save the raw html for debugging
-            write_file(
-                directory=LOGS_DIR / "html_logs",
-                filename=f"{product.sku}.html",
-                content=str(scraper.get_html()),
-            )
-    except ScraperError as e:
-        msg = f"Scraper failure: {e}"
-        logging.exception(msg=msg)
-    except Exception as e:
-        msg = f"Unexpected error: {e}"
-        logging.exception(msg=msg)
-
-    # Sleep for 1 second to avoid getting blocked
-    time.sleep(1)
+session_factory = functools.partial(Session, engine)
+rules = create_notification_rules()
+
+# the guard stops the parsing processes from running the scraper when they import this module
+if __name__ == "__main__":
+    breaker = CircuitBreaker(
+        session_factory=session_factory,
+        failure_count=settings.CIRCUIT_FAILURE_COUNT,
+        failure_rate=settings.CIRCUIT_FAILURE_RATE,
+        min_attempts=settings.CIRCUIT_MIN_ATTEMPTS,
+        window=settings.CIRCUIT_WINDOW,
+        cooldown=settings.CIRCUIT_COOLDOWN,
+        max_cooldown=settings.CIRCUIT_MAX_COOLDOWN,
+    )
+    notification = create_notification_dispatcher(digest=bool(settings.NOTIFICATION_DIGEST))
+    with notification:
+        scrape_all(
+            session_factory,
+            notification,
+            freshness_window=settings.SCRAPE_FRESHNESS_WINDOW,
+            host_interval=settings.SCRAPE_HOST_INTERVAL,
+            prefetch_depth=settings.PIPELINE_PREFETCH_DEPTH,
+            parse_workers=settings.PIPELINE_PARSE_WORKERS,
+            queue_size=settings.PIPELINE_QUEUE_SIZE,
+            breaker=breaker,
+            deadline=settings.SCRAPE_RUN_DEADLINE,
+            unchanged=settings.SCRAPE_UNCHANGED,
+            browser_state_dir=Path(settings.BROWSER_STATE_DIR) if settings.BROWSER_STATE_DIR else None,
+            rules=rules,
+            max_run_age=settings.SCRAPE_RUN_MAX_AGE,
+        )
@@ -0,0 +1,44 @@
+"""Long running script that scrapes due targets alongside other workers sharing the database."""
+
+import functools
+import logging
+import signal
+from types import FrameType
+
+from sqlalchemy.orm import Session
+
+from src import settings
+from src.database import engine
+from src.logger.config import LOGS_DIR, setup_logger
+from src.runner import (
+    LeaseWorker,
+    create_notification_dispatcher,
+    create_scrape_job,
+    default_worker_id,
+)
+
+setup_logger(filepath=LOGS_DIR / "worker.log")
+
+notification = create_notification_dispatcher()
+worker = LeaseWorker(
+    worker_id=settings.WORKER_ID or default_worker_id(),
+    job=create_scrape_job(notification),
+    session_factory=functools.partial(Session, engine),
+    batch_size=settings.WORKER_BATCH_SIZE,
+    lease_seconds=settings.WORKER_LEASE_SECONDS,
+    retry_interval=settings.SCHEDULER_RETRY_INTERVAL,
+    poll_interval=settings.WORKER_POLL_INTERVAL,
+)
+
+
+def handle_signal(signum: int, frame: FrameType | None) -> None:
+    """Stop the worker when the process is asked to exit."""
+    msg = f"Received signal {signum}, stopping worker"
+    logging.info(msg=msg)
+    worker.stop()
+
+
+signal.signal(signal.SIGTERM, handle_signal)
+signal.signal(signal.SIGINT, handle_signal)
+worker.run()
+notification.close()
@@ -0,0 +1,40 @@
+"""Dependencies shared between the API routers."""
+
+from typing import Annotated
+
+from fastapi import HTTPException, Query, status
+
+from src.database import crud
+
+
+def get_fields(
+    fields: Annotated[
+        str | None,
+        Query(
+            description="Comma separated list of fields to return, e.g. `id,price,timestamp`. All fields are returned if omitted.",
+        ),
+    ] = None,
+) -> list[str] | None:
+    """Split the `fields` query parameter into a list of field names."""
+    if fields is None:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()] or None
+
+
+def get_target_ids(
+    target_ids: Annotated[
+        str,
+        Query(
+            pattern=r"^\d+(,\d+)*$",
+            description="Comma separated list of Target ids, e.g. `1,2,3`",
+        ),
+    ],
+) -> list[int]:
+    """Split the `target_ids` query parameter into a list of unique ids."""
+    ids = list(dict.fromkeys(int(target_id) for target_id in target_ids.split(",")))
+    if len(ids) > crud.BULK_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"No more than {crud.BULK_LIMIT} target ids can be requested at once",
+        )
+    return ids
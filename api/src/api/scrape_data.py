@@ -1,13 +1,20 @@
 """API endpoints for scraped data."""
 
+import asyncio
 import logging
-from typing import Annotated, Any
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Annotated, Any, AsyncIterator, Callable
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from src import messages
-from src.database import crud, get_db, schema
+from src import messages, settings
+from src.api.dependencies import get_fields, get_target_ids
+from src.database import crud, get_db, get_session_factory, schema
 
 router = APIRouter(
     prefix="/scrape-data",
@@ -17,21 +24,147 @@ router = APIRouter(
 
 @router.get(
     "/",
-    response_model=list[schema.ScrapeDataOut],
+    response_model=list[schema.ScrapeDataPartialOut],
+    response_model_exclude_unset=True,
     response_description="A list of all Scrape Data!",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "model": messages.InvalidFieldMessage,
+        },
+    },
 )
-def get_scrape_data(session: Annotated[Session, Depends(get_db)]) -> Any:
-    """Get all Scrape Data from database."""
-    scraped_data = crud.read_scrape_data(session)
+def get_scrape_data(
+    session: Annotated[Session, Depends(get_db)],
+    fields: Annotated[list[str] | None, Depends(get_fields)],
+) -> Any:
+    """Get all Scrape Data from database.
+
+    Use `fields` to only select the named fields of each Scrape Data.
+    """
+    scraped_data = crud.read_scrape_data(session, fields)
     logging.info("Getting all scrape data from database")
     return scraped_data
 
 
+# how often the stream checks the database for new scrape data (in seconds)
+STREAM_POLL_INTERVAL = 2.0
+# how long the stream can be idle before a keep-alive comment is sent (in seconds)
+STREAM_KEEPALIVE_INTERVAL = 15.0
+
+
+def format_event(scraped_data: schema.ScrapeDataOut) -> str:
+    """Format Scrape Data as a Server-Sent Event."""
+    return f"id: {scraped_data.id}\nevent: scrape-data\ndata: {scraped_data.model_dump_json()}\n\n"
+
+
+async def scrape_data_events(
+    session: Session,
+    last_id: int | None,
+    target_id: int | None = None,
+    site: str | None = None,
+) -> AsyncIterator[str]:
+    """Yield a Server-Sent Event for each new Scrape Data committed to the database.
+
+    New rows are found by polling the highest Scrape Data id (a cheap index lookup),
+    so the scraper does not need to notify the API. Only when the high-water mark
+    moves is the (filtered) query for the new rows run.
+    """
+    if last_id is None:
+        last_id = await run_in_threadpool(crud.read_latest_scrape_data_id, session)
+    last_sent = time.monotonic()
+
+    while True:
+        high_water = await run_in_threadpool(crud.read_latest_scrape_data_id, session)
+        while last_id < high_water:
+            rows = await run_in_threadpool(
+                crud.read_scrape_data_after,
+                session,
+                last_id,
+                high_water,
+                target_id,
+                site,
+            )
+            for row in rows:
+                yield format_event(schema.ScrapeDataOut.model_validate(row, from_attributes=True))
+                last_sent = time.monotonic()
+            # rows are returned in id order so the last row is the new cursor
+            last_id = rows[-1].id if rows else high_water
+        # release the connection so the stream does not hold the database between polls
+        await run_in_threadpool(session.close)
+
+        if time.monotonic() - last_sent >= STREAM_KEEPALIVE_INTERVAL:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+
+@router.get(
+    "/stream",
+    response_class=StreamingResponse,
+    response_description="A `text/event-stream` of new Scrape Data",
+)
+async def stream_scrape_data(
+    session: Annotated[Session, Depends(get_db)],
+    target_id: int | None = None,
+    site: str | None = None,
+    last_event_id: Annotated[int | None, Header()] = None,
+) -> StreamingResponse:
+    """Stream new Scrape Data as Server-Sent Events as soon as it is saved.
+
+    Each event has the Scrape Data `id` as its event id and the Scrape Data as JSON in its
+    `data` field. Use `target_id` or `site` to only receive Scrape Data for that Target or site.
+
+    Clients that reconnect with a `Last-Event-ID` header are sent everything they missed.
+    Without the header only Scrape Data saved after connecting is sent.
+    """
+    msg = f"Streaming scrape data (target_id={target_id}, site={site}, last_event_id={last_event_id})"
+    logging.info(msg=msg)
+    return StreamingResponse(
+        scrape_data_events(session, last_event_id, target_id, site),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.get(
+    "/targets",
+    response_model=list[schema.TargetScrapeDataOut],
+    response_description="The Scrape Data for each of the specified Targets, newest first",
+)
+def get_scrape_data_for_targets(
+    target_ids: Annotated[list[int], Depends(get_target_ids)],
+    session: Annotated[Session, Depends(get_db)],
+    since: datetime | None = None,
+    per_target_limit: Annotated[int | None, Query(ge=1)] = None,
+) -> Any:
+    """Get the Scrape Data for many Targets from database in a single request.
+
+    Use `since` to only get Scrape Data from that time onwards and `per_target_limit` to
+    only get the newest Scrape Data for each Target. Targets that do not exist, or that
+    have no Scrape Data, are returned with an empty list.
+    """
+    if since is not None and since.tzinfo is not None:
+        # timestamps are stored as naive UTC
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+
+    history = crud.read_scrape_data_for_targets(session, target_ids, since, per_target_limit)
+    msg = f"Getting scrape data for targets with ids {target_ids} from database"
+    logging.info(msg=msg)
+    return [
+        {"scrape_target_id": target_id, "scrape_data": scrape_data}
+        for target_id, scrape_data in history.items()
+    ]
+
+
 @router.get(
     "/target/{target_id}",
-    response_model=list[schema.ScrapeDataOut],
+    response_model=list[schema.ScrapeDataPartialOut],
+    response_model_exclude_unset=True,
     response_description="A list of all Scrape Data for the specified Target",
     responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "model": messages.InvalidFieldMessage,
+        },
         status.HTTP_404_NOT_FOUND: {
             "model": messages.TargetDoesNotExistMessage,
         },
@@ -40,14 +173,54 @@ def get_scrape_data(session: Annotated[Session, Depends(get_db)]) -> Any:
 def get_scrape_data_for_target(
     target_id: int,
     session: Annotated[Session, Depends(get_db)],
+    fields: Annotated[list[str] | None, Depends(get_fields)],
 ) -> Any:
-    """Get all Scrape Data for a specific Target from database."""
-    scraped_data = crud.read_scrape_data_for_target(session, target_id)
+    """Get all Scrape Data for a specific Target from database.
+
+    Use `fields` to only select the named fields of each Scrape Data.
+    """
+    scraped_data = crud.read_scrape_data_for_target(session, target_id, fields)
     msg = f"Getting all scrape data for target with id {target_id} from database"
     logging.info(msg=msg)
     return scraped_data
 
 
+def _export(session_factory: Callable[[], Session]) -> None:
+    """Export the Scrape Data in a session of its own, logging any error."""
+    try:
+        # imported here so the API runs where pyarrow is not installed, such as a Raspberry Pi
+        from src.functions import export
+
+        with export.export_lock, session_factory() as session:
+            export.export_scrape_data(session, Path(settings.EXPORT_DIR), batch_size=settings.EXPORT_BATCH_SIZE)
+    except Exception as e:
+        msg = f"Could not export the scrape data: {e}"
+        logging.exception(msg=msg)
+
+
+@router.post(
+    "/export",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=messages.ExportStartedMessage,
+    response_description="The export has started",
+)
+def export_scrape_data(
+    background_tasks: BackgroundTasks,
+    session_factory: Annotated[Callable[[], Session], Depends(get_session_factory)],
+) -> Any:
+    """Start exporting the Scrape Data added since the last export as Parquet files.
+
+    The export runs in the background after the response is sent, and its result is
+    logged. The files are written to the server's `EXPORT_DIR`, partitioned by site
+    and month in `site=<site>/month=<YYYY-MM>` directories, with the numeric price,
+    timestamp and Target id as typed columns. Each export only appends the Scrape
+    Data added since the previous one, so analytics can read the files instead of
+    the database. An export started while another is running waits for it to finish.
+    """
+    background_tasks.add_task(_export, session_factory)
+    return messages.ExportStartedMessage()
+
+
 @router.get(
     "/{scrape_data_id}",
     response_model=schema.ScrapeDataOut,
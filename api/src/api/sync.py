@@ -0,0 +1,59 @@
+"""API endpoints for replicating the database incrementally."""
+
+import logging
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from src.database import crud, get_db, schema
+
+router = APIRouter(
+    prefix="/sync",
+    tags=["Sync"],
+)
+
+
+@router.get(
+    "/",
+    response_model=schema.SyncOut,
+    response_description="A page of changes made after the cursor",
+)
+def sync(
+    session: Annotated[Session, Depends(get_db)],
+    since: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=5000)] = 500,
+) -> Any:
+    """Get the changes made to the database after the `since` cursor.
+
+    Changes are returned in the order they were made. Inserts and updates carry the
+    current state of the Target or Scrape Data, deletes are tombstones that only carry
+    the `row_id`. Only the latest change to each row in a page is returned.
+
+    Pass the returned `cursor` as `since` to get the next page and keep polling with it
+    once `has_more` is false. Start from `since=0` to replicate the whole database.
+    """
+    rows = crud.read_changes(session, since, limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest: dict[tuple[str, int], schema.ChangeOut] = {}
+    for change, target, scrape_data in rows:
+        if change.operation != "delete" and target is None and scrape_data is None:
+            # the row has since been deleted so its tombstone will follow
+            continue
+        key = (change.table_name, change.row_id)
+        latest.pop(key, None)
+        latest[key] = schema.ChangeOut(
+            seq=change.id,
+            table_name=change.table_name,
+            operation=change.operation,
+            row_id=change.row_id,
+            target=schema.SyncTargetOut.model_validate(target, from_attributes=True) if target else None,
+            scrape_data=schema.ScrapeDataOut.model_validate(scrape_data, from_attributes=True) if scrape_data else None,
+        )
+
+    cursor = rows[-1][0].id if rows else since
+    msg = f"Syncing {len(latest)} changes since {since} (cursor {cursor})"
+    logging.info(msg=msg)
+    return schema.SyncOut(changes=list(latest.values()), cursor=cursor, has_more=has_more)
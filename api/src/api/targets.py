@@ -1,13 +1,18 @@
 """API Endpoints for Scraping Targets."""
 
+import csv
+import json
 import logging
 from datetime import datetime, timezone
-from typing import Annotated, Any
+from typing import Annotated, Any, AsyncIterator, Sequence
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Body, Depends, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from src import messages
+from src.api.dependencies import get_fields
 from src.database import crud, get_db, models, schema
 
 router = APIRouter(
@@ -18,12 +23,24 @@ router = APIRouter(
 
 @router.get(
     "/",
-    response_model=list[schema.TargetOut],
+    response_model=list[schema.TargetPartialOut],
+    response_model_exclude_unset=True,
     response_description="A list of all Scraping Targets",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "model": messages.InvalidFieldMessage,
+        },
+    },
 )
-def get_targets(session: Annotated[Session, Depends(get_db)]) -> Any:
-    """Get all Scraping Targets from the database."""
-    targets = crud.read_targets(session)
+def get_targets(
+    session: Annotated[Session, Depends(get_db)],
+    fields: Annotated[list[str] | None, Depends(get_fields)],
+) -> Any:
+    """Get all Scraping Targets from the database.
+
+    Use `fields` to only select the named fields of each Scraping Target.
+    """
+    targets = crud.read_targets(session, fields)
     logging.info("Getting all targets from database")
     return targets
 
@@ -46,6 +63,9 @@ def new_target(
     """Create a new Scraping Target in the database.
 
     ## Usage Notes
+    `scrape_interval` is the number of seconds between scrapes of the Target when the
+    scraper runs as a scheduler. It defaults to once a day.
+
     ### Amazon UK Target
     - `site` must be set to `amz`
     - `sku` must be set to the Amazon product ASIN
@@ -58,18 +78,272 @@ def new_target(
     - `site` must be set to `go_od`
     - `sku` must be set to the Product ID and name as set in the URL of the product page on Go Outdoors. For example, for the product at `https://www.gooutdoors.co.uk/15903050/family-tent-123456`, the `sku` would be `family-tent-123456`
     """
+    target = _new_target_model(new_target)
+    created_target = crud.create_target(session, target)
+
+    msg = f"Created new target with sku '{new_target.sku}' in database"
+    logging.info(msg=msg)
+    return created_target
+
+
+def _new_target_model(new_target: schema.TargetIn) -> models.ScrapeTargets:
+    """Create a database model for a new Scraping Target."""
     now = datetime.now(tz=timezone.utc)
     last = datetime(1970, 1, 1, tzinfo=timezone.utc)
-    target = models.ScrapeTargets(
+    return models.ScrapeTargets(
         **new_target.model_dump(),
         date_added=now,
         last_scraped=last,
     )
-    created_target = crud.create_target(session, target)
 
-    msg = f"Created new target with sku '{new_target.sku}' in database"
+
+def _create_targets(
+    session: Session,
+    new_targets: Sequence[tuple[int, schema.TargetIn]],
+) -> list[schema.BulkTargetResult]:
+    """Create the indexed Scraping Targets in one transaction and report the result of each."""
+    created = crud.create_targets(
+        session,
+        [_new_target_model(new_target) for _, new_target in new_targets],
+    )
+    return [
+        schema.BulkTargetResult(
+            index=index,
+            status="created",
+            target=schema.TargetOut.model_validate(target, from_attributes=True),
+        )
+        if target is not None
+        else schema.BulkTargetResult(
+            index=index,
+            status="conflict",
+            detail=messages.TargetExistsMessage().detail,
+        )
+        for (index, _), target in zip(new_targets, created)
+    ]
+
+
+def _bulk_results(
+    targets: Sequence[models.ScrapeTargets | None],
+    success_status: str,
+) -> list[schema.BulkTargetResult]:
+    """Report the result of each item of a bulk update or delete."""
+    return [
+        schema.BulkTargetResult(
+            index=index,
+            status=success_status,
+            target=schema.TargetOut.model_validate(target, from_attributes=True),
+        )
+        if target is not None
+        else schema.BulkTargetResult(
+            index=index,
+            status="not_found",
+            detail=messages.TargetDoesNotExistMessage().detail,
+        )
+        for index, target in enumerate(targets)
+    ]
+
+
+@router.post(
+    "/bulk",
+    response_model=list[schema.BulkTargetResult],
+    response_description="The result for each Scraping Target, in the order they were sent",
+)
+def new_targets(
+    new_targets: Annotated[
+        list[schema.TargetIn],
+        Body(min_length=1, max_length=crud.BULK_LIMIT),
+    ],
+    session: Annotated[Session, Depends(get_db)],
+) -> Any:
+    """Create many Scraping Targets in the database at once.
+
+    All Scraping Targets are created in a single transaction. Each result has a `status`
+    of `created`, or `conflict` if the Scraping Target already exists.
+
+    See *Usage Notes* for `POST /targets/` for helpful details about creating Scraping Targets.
+    """
+    results = _create_targets(session, list(enumerate(new_targets)))
+    msg = f"Created {sum(r.status == 'created' for r in results)} of {len(results)} new targets in database"
     logging.info(msg=msg)
-    return created_target
+    return results
+
+
+@router.put(
+    "/bulk",
+    response_model=list[schema.BulkTargetResult],
+    response_description="The result for each Scraping Target, in the order they were sent",
+)
+def update_targets(
+    new_targets: Annotated[
+        list[schema.TargetUpdateIn],
+        Body(min_length=1, max_length=crud.BULK_LIMIT),
+    ],
+    session: Annotated[Session, Depends(get_db)],
+) -> Any:
+    """Update many Scraping Targets in the database at once.
+
+    All Scraping Targets are updated in a single transaction. Each result has a `status`
+    of `updated`, or `not_found` if there is no Scraping Target with that `id`.
+    """
+    updated = crud.update_targets(
+        session,
+        [(new_target.id, new_target) for new_target in new_targets],
+    )
+    msg = f"Updated {sum(t is not None for t in updated)} of {len(updated)} targets in database"
+    logging.info(msg=msg)
+    return _bulk_results(updated, "updated")
+
+
+@router.delete(
+    "/bulk",
+    response_model=list[schema.BulkTargetResult],
+    response_description="The result for each Scraping Target id, in the order they were sent",
+)
+def delete_targets(
+    target_ids: Annotated[
+        list[int],
+        Body(min_length=1, max_length=crud.BULK_LIMIT),
+    ],
+    session: Annotated[Session, Depends(get_db)],
+) -> Any:
+    """Delete many Scraping Targets from the database at once.
+
+    The request body is a list of Scraping Target ids. All Scraping Targets are deleted in
+    a single transaction. Each result has a `status` of `deleted`, or `not_found` if there
+    is no Scraping Target with that id.
+    """
+    deleted = crud.delete_targets(session, target_ids)
+    msg = f"Deleted {sum(t is not None for t in deleted)} of {len(deleted)} targets from database"
+    logging.info(msg=msg)
+    return _bulk_results(deleted, "deleted")
+
+
+async def _read_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a stream of bytes into lines without reading it all into memory.
+
+    The lines are left as bytes so each is decoded on its own, and a line that is not
+    UTF-8 only makes that line invalid. A newline byte is never part of a multi-byte
+    UTF-8 character, so splitting before decoding is safe.
+    """
+    buffer = b""
+    async for chunk in stream:
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if buffer:
+        yield buffer.rstrip(b"\r")
+
+
+@router.post(
+    "/bulk/upload",
+    response_model=list[schema.BulkTargetResult],
+    response_description="The result for each Scraping Target, in the order they appear in the upload",
+    responses={
+        status.HTTP_415_UNSUPPORTED_MEDIA_TYPE: {
+            "model": messages.UnsupportedUploadMessage,
+        },
+    },
+)
+async def upload_targets(
+    request: Request,
+    session: Annotated[Session, Depends(get_db)],
+) -> Any:
+    """Create Scraping Targets from an uploaded file of any size.
+
+    Send the file as the request body with a `Content-Type` of either:
+    - `text/csv`: a header line of `site,sku,send_notification` followed by one Scraping Target per line
+    - `application/x-ndjson`: one JSON Scraping Target per line
+
+    The upload is streamed and created in transactions of up to 500 Scraping Targets. Each
+    result has a `status` of `created`, `conflict` if the Scraping Target already exists, or
+    `invalid` if the line could not be read (including lines that are not UTF-8).
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("text/csv"):
+        is_csv = True
+    elif content_type.startswith(("application/x-ndjson", "application/jsonl")):
+        is_csv = False
+    else:
+        raise crud.UnsupportedUploadError
+
+    results: list[schema.BulkTargetResult] = []
+    batch: list[tuple[int, schema.TargetIn]] = []
+    header: list[str] | None = None
+    index = 0
+    async for line in _read_lines(request.stream()):
+        if not line.strip():
+            continue
+        if is_csv and header is None:
+            header = [column.strip() for column in next(csv.reader([line.decode(errors="replace")]))]
+            continue
+        try:
+            if header is not None:
+                item: Any = dict(zip(header, next(csv.reader([line.decode()]))))
+            else:
+                item = json.loads(line.decode())
+            batch.append((index, schema.TargetIn.model_validate(item)))
+        except (ValueError, ValidationError) as e:
+            results.append(schema.BulkTargetResult(index=index, status="invalid", detail=str(e)))
+        index += 1
+
+        if len(batch) == crud.BULK_LIMIT:
+            results.extend(await run_in_threadpool(_create_targets, session, batch))
+            batch = []
+    if batch:
+        results.extend(await run_in_threadpool(_create_targets, session, batch))
+
+    results.sort(key=lambda result: result.index)
+    msg = f"Created {sum(r.status == 'created' for r in results)} of {len(results)} uploaded targets in database"
+    logging.info(msg=msg)
+    return results
+
+
+@router.get(
+    "/search",
+    response_model=list[schema.TargetSearchResultOut],
+    response_description="The Scraping Targets that match the query, best match first",
+)
+def search_targets(
+    session: Annotated[Session, Depends(get_db)],
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+) -> Any:
+    """Search the SKUs and latest scraped titles of the Scraping Targets.
+
+    Each word of `q` matches the words that start with it, ignoring case and accents,
+    and a Scraping Target must match every word. The results are ranked by how well
+    they match and carry the latest scraped title, or null if the Scraping Target has
+    not been scraped.
+    """
+    rows = crud.search_targets(session, q, limit)
+    msg = f"Found {len(rows)} targets matching {q!r}"
+    logging.info(msg=msg)
+    return [
+        schema.TargetSearchResultOut(
+            **schema.TargetOut.model_validate(target, from_attributes=True).model_dump(),
+            title=title or None,
+            rank=rank,
+        )
+        for target, title, rank in rows
+    ]
+
+
+@router.get(
+    "/stats",
+    response_model=list[schema.TargetStatsOut],
+    response_description="The statistics of every Scraping Target with scrape data",
+)
+def get_all_target_stats(
+    session: Annotated[Session, Depends(get_db)],
+) -> Any:
+    """Get the statistics of the scrape data of every Scraping Target that has been scraped.
+
+    The statistics are kept up to date as scrape data is saved, so they are read
+    without going through the scrape data history.
+    """
+    stats = crud.read_all_target_stats(session)
+    logging.info("Getting the statistics of all targets from database")
+    return stats
 
 
 @router.get(
@@ -97,6 +371,58 @@ def get_target(
     return target
 
 
+@router.get(
+    "/{target_id}/timeouts",
+    response_model=list[schema.ScrapeTimeoutOut],
+    response_description="The timeouts recorded while scraping the Scraping Target",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "model": messages.TargetDoesNotExistMessage,
+        },
+    },
+)
+def get_target_timeouts(
+    target_id: int,
+    session: Annotated[Session, Depends(get_db)],
+) -> Any:
+    """Get the timeouts recorded while scraping a Scraping Target, most recent first.
+
+    Each timeout names the stage that timed out (connect, navigation, readiness or
+    parse) so slow Scraping Targets can be found.
+    """
+    timeouts = crud.read_scrape_timeouts(session, target_id)
+    msg = f"Getting timeouts of target with id {target_id} from database"
+    logging.info(msg=msg)
+    return timeouts
+
+
+@router.get(
+    "/{target_id}/stats",
+    response_model=schema.TargetStatsOut | None,
+    response_description="The statistics of the Scraping Target, or null if it has no scrape data",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "model": messages.TargetDoesNotExistMessage,
+        },
+    },
+)
+def get_target_stats(
+    target_id: int,
+    session: Annotated[Session, Depends(get_db)],
+) -> Any:
+    """Get the statistics of the scrape data of a Scraping Target.
+
+    The statistics are the number of scrape data, the lowest and highest prices and
+    when they were first seen, when the Scraping Target was first and last scraped,
+    and the mean, variance and standard deviation of its prices. Prices that could
+    not be parsed are counted but left out of the price statistics.
+    """
+    stats = crud.read_target_stats(session, target_id)
+    msg = f"Getting the statistics of target with id {target_id} from database"
+    logging.info(msg=msg)
+    return stats
+
+
 @router.put(
     "/{target_id}",
     response_model=schema.TargetOut,
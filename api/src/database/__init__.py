@@ -1,8 +1,9 @@
 from pathlib import Path
-from typing import Generator
+from typing import Callable, Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, inspect, text
 from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
 
 from .models import Base
 
@@ -10,7 +11,27 @@ root_dir = Path(__file__).resolve().parent.parent.parent
 db_location = root_dir / "intrepid.db"
 engine = create_engine(f"sqlite:////{db_location}")
 
+
+def _add_missing_columns(engine: Engine) -> None:
+    """Add columns that were added to the models after their table was created."""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    definition = CreateColumn(column).compile(dialect=engine.dialect)  # type: ignore[no-untyped-call]
+                    connection.execute(
+                        text(f"ALTER TABLE {table.name} ADD COLUMN {definition}"),
+                    )
+
+
 Base.metadata.create_all(bind=engine, checkfirst=True)
+_add_missing_columns(engine)
+# create_all only creates indexes alongside new tables so add any new ones to existing tables
+for table in Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -20,3 +41,8 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def get_session_factory() -> Callable[[], Session]:
+    """Get a function that opens a database session, for work that outlives the request."""
+    return lambda: Session(engine)
@@ -1,12 +1,51 @@
 """Create Read Update & Delete operations for the database."""
 
-from typing import Sequence
-
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-
-from .models import ScrapedData, ScrapeTargets
-from .schema import TargetIn
+import re
+from datetime import datetime, timedelta
+from typing import Any, Iterator, Sequence
+
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    Row,
+    RowMapping,
+    and_,
+    column,
+    delete,
+    func,
+    literal,
+    literal_column,
+    or_,
+    over,
+    select,
+    table,
+    tuple_,
+    update,
+)
+from sqlalchemy.orm import Session, aliased, selectinload
+from sqlalchemy.sql.elements import KeyedColumnElement
+
+from src.functions.utils import parse_price, utcnow
+
+from .models import (
+    Base,
+    ChangeLog,
+    NotificationState,
+    ScrapedData,
+    ScrapeRun,
+    ScrapeRunTarget,
+    ScrapeTargets,
+    ScrapeTimeout,
+    SiteCircuit,
+    TargetStats,
+)
+from .schema import ScrapeDataPartialOut, TargetBase, TargetIn, TargetPartialOut
+
+# the maximum number of items accepted by the bulk functions
+BULK_LIMIT = 500
+
+# the full-text index of the targets, which is created and kept in sync by SQL rather than a model
+_target_search = table("target_search", column("rowid"), column("title"), column("rank"))
 
 
 class TargetExistsError(Exception):
@@ -21,11 +60,53 @@ class ScrapedDataDoesNotExistError(Exception):
     """Raised when scraped data does not exist in the database."""
 
 
+class UnsupportedUploadError(Exception):
+    """Raised when an upload of targets is not in a supported format."""
+
+
+class InvalidFieldError(Exception):
+    """Raised when a requested field is not a field of the partial response model."""
+
+
+# the fields that can be selected are those of the partial response model of each table
+_PARTIAL_FIELDS: dict[type[Base], set[str]] = {
+    ScrapeTargets: set(TargetPartialOut.model_fields),
+    ScrapedData: set(ScrapeDataPartialOut.model_fields),
+}
+
+
+def _columns(model: type[Base], fields: Sequence[str]) -> list[KeyedColumnElement[Any]]:
+    """Get the table columns for the given field names.
+
+    Raises:
+        InvalidFieldError: If a field is not a field of the model's partial response model.
+    """
+    columns = model.__table__.c
+    invalid = [field for field in fields if field not in _PARTIAL_FIELDS[model]]
+    if invalid:
+        msg = f"Invalid fields for {model.__tablename__}: {', '.join(invalid)}"
+        raise InvalidFieldError(msg)
+    return [columns[field] for field in dict.fromkeys(fields)]
+
+
 # ----------------------
 # FUNCTIONS FOR TARGETS
 # ----------------------
-def read_targets(session: Session) -> Sequence[ScrapeTargets]:
-    """Get all scraping targets from database."""
+def read_targets(
+    session: Session,
+    fields: Sequence[str] | None = None,
+) -> Sequence[ScrapeTargets] | Sequence[RowMapping]:
+    """Get all scraping targets from database.
+
+    If `fields` are given only those columns are selected and the rows are
+    returned as mappings instead of models.
+
+    Raises:
+        InvalidFieldError: If one of the fields is not a field of the partial response model.
+    """
+    if fields:
+        return session.execute(select(*_columns(ScrapeTargets, fields))).mappings().all()
+
     stmt = select(ScrapeTargets)
     return session.scalars(stmt).all()
 
@@ -45,6 +126,34 @@ def read_target(
     return session.scalar(stmt)
 
 
+def search_targets(
+    session: Session,
+    query: str,
+    limit: int,
+) -> Sequence[Row[tuple[ScrapeTargets, str, float]]]:
+    """Search the SKUs and latest titles of the targets, best match first.
+
+    Each word of the query matches the words that start with it, and every word must
+    match. The query is reduced to its words, so it cannot contain FTS5 syntax.
+
+    Returns:
+        Sequence: Each matching target with its latest title and its rank, lower is better.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return []
+
+    match = " ".join(f'"{word}"*' for word in words)
+    stmt = (
+        select(ScrapeTargets, _target_search.c.title, _target_search.c.rank)
+        .join(_target_search, _target_search.c.rowid == ScrapeTargets.id)
+        .where(literal_column("target_search").op("MATCH")(match))
+        .order_by(_target_search.c.rank)
+        .limit(limit)
+    )
+    return session.execute(stmt).all()
+
+
 def _target_exists(session: Session, target_site: str, target_sku: str) -> bool:
     """Check if a scraping target exists in the database."""
     stmt = select(ScrapeTargets).where(
@@ -69,6 +178,16 @@ def create_target(session: Session, target: ScrapeTargets) -> ScrapeTargets:
     return target
 
 
+def _apply_update(target: ScrapeTargets, new_target: TargetBase) -> None:
+    """Copy the new values onto a scraping target."""
+    target.site = new_target.site
+    target.sku = new_target.sku
+    target.send_notification = new_target.send_notification
+    target.scrape_interval = new_target.scrape_interval
+    # start adapting again from the new scrape interval
+    target.current_interval = None
+
+
 def update_target(
     session: Session,
     target_id: int,
@@ -84,9 +203,7 @@ def update_target(
     if target is None:
         raise TargetDoesNotExistError
 
-    target.site = new_target.site
-    target.sku = new_target.sku
-    target.send_notification = new_target.send_notification
+    _apply_update(target, new_target)
     session.commit()
     session.refresh(target)
     return target
@@ -108,11 +225,217 @@ def delete_target(session: Session, target_id: int) -> ScrapeTargets:
     return target
 
 
+def read_target_schedules(session: Session) -> Sequence[Row[tuple[int, datetime, int]]]:
+    """Get the id, last scraped time and scrape interval of every scraping target.
+
+    The current interval is used in place of the scrape interval once it has been adapted.
+    """
+    stmt = select(
+        ScrapeTargets.id,
+        ScrapeTargets.last_scraped,
+        func.coalesce(ScrapeTargets.current_interval, ScrapeTargets.scrape_interval),
+    )
+    return session.execute(stmt).all()
+
+
+def claim_due_targets(
+    session: Session,
+    worker_id: str,
+    limit: int,
+    lease_seconds: float,
+) -> list[ScrapeTargets]:
+    """Lease up to `limit` due scraping targets to a worker, most overdue first.
+
+    A target is due when its (current) interval has passed since it was last scraped,
+    and it can be claimed when it has no lease or its lease has expired, for example
+    because the worker holding it crashed.
+
+    The claim runs in an immediate transaction, which takes the database write lock
+    before the due targets are read, so two workers can never claim the same target.
+    This commits any open transaction on the session.
+    """
+    session.commit()
+    session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+
+    now = utcnow()
+    interval = func.coalesce(ScrapeTargets.current_interval, ScrapeTargets.scrape_interval)
+    due_days = func.julianday(ScrapeTargets.last_scraped) + interval / 86400.0
+    stmt = (
+        select(ScrapeTargets)
+        .where(
+            due_days <= func.julianday(literal(now, DateTime)),
+            or_(ScrapeTargets.lease_expires.is_(None), ScrapeTargets.lease_expires <= now),
+        )
+        .order_by(due_days)
+        .limit(limit)
+    )
+    targets = list(session.scalars(stmt))
+    for target in targets:
+        target.leased_by = worker_id
+        target.lease_expires = now + timedelta(seconds=lease_seconds)
+    session.commit()
+    return targets
+
+
+def renew_target_lease(
+    session: Session,
+    target_id: int,
+    worker_id: str,
+    lease_seconds: float,
+) -> bool:
+    """Extend a worker's lease on a scraping target.
+
+    Returns:
+        bool: True if the worker still held the lease, False if it had been claimed by another worker.
+    """
+    now = utcnow()
+    stmt = (
+        update(ScrapeTargets)
+        .where(ScrapeTargets.id == target_id, ScrapeTargets.leased_by == worker_id)
+        .values(lease_expires=now + timedelta(seconds=lease_seconds))
+    )
+    renewed = session.execute(stmt).rowcount == 1
+    session.commit()
+    return renewed
+
+
+def release_target_lease(
+    session: Session,
+    target_id: int,
+    worker_id: str,
+    hold_until: datetime | None = None,
+) -> None:
+    """Release a worker's lease on a scraping target.
+
+    If `hold_until` is given the lease is kept until then so that no worker
+    retries the target before that time.
+    """
+    stmt = (
+        update(ScrapeTargets)
+        .where(ScrapeTargets.id == target_id, ScrapeTargets.leased_by == worker_id)
+        .values(
+            leased_by=None if hold_until is None else worker_id,
+            lease_expires=hold_until,
+        )
+    )
+    session.execute(stmt)
+    session.commit()
+
+
+def _existing_targets(
+    session: Session,
+    site_skus: Sequence[tuple[str, str]],
+) -> set[tuple[str, str]]:
+    """Get which of the (site, sku) pairs already exist in the database in a single query."""
+    if not site_skus:
+        return set()
+    stmt = select(ScrapeTargets.site, ScrapeTargets.sku).where(
+        tuple_(ScrapeTargets.site, ScrapeTargets.sku).in_(site_skus),
+    )
+    return set(session.execute(stmt).tuples())
+
+
+def _read_targets_by_id(
+    session: Session,
+    target_ids: Sequence[int],
+    for_delete: bool = False,
+) -> dict[int, ScrapeTargets]:
+    """Get the scraping targets with the given ids in a single query."""
+    stmt = select(ScrapeTargets).where(ScrapeTargets.id.in_(target_ids))
+    if for_delete:
+        # load the scrape data that will be cascade deleted up front instead of one target at a time
+        stmt = stmt.options(selectinload(ScrapeTargets.scraped_data))
+    return {target.id: target for target in session.scalars(stmt)}
+
+
+def create_targets(
+    session: Session,
+    targets: Sequence[ScrapeTargets],
+) -> list[ScrapeTargets | None]:
+    """Create many scraping targets in the database in a single transaction.
+
+    Targets that already exist in the database, or that appear earlier in `targets`,
+    are not created.
+
+    Returns:
+        list: The created target, or None if the target already exists, for each target.
+    """
+    existing = _existing_targets(session, [(t.site, t.sku) for t in targets])
+
+    results: list[ScrapeTargets | None] = []
+    for target in targets:
+        if (target.site, target.sku) in existing:
+            results.append(None)
+            continue
+        existing.add((target.site, target.sku))
+        session.add(target)
+        results.append(target)
+    session.commit()
+
+    # refresh the new targets in one query rather than one per target
+    _read_targets_by_id(session, [t.id for t in results if t is not None])
+    return results
+
+
+def update_targets(
+    session: Session,
+    new_targets: Sequence[tuple[int, TargetBase]],
+) -> list[ScrapeTargets | None]:
+    """Update many scraping targets in the database in a single transaction.
+
+    Returns:
+        list: The updated target, or None if the target does not exist, for each target id.
+    """
+    targets = _read_targets_by_id(session, [target_id for target_id, _ in new_targets])
+
+    results: list[ScrapeTargets | None] = []
+    for target_id, new_target in new_targets:
+        target = targets.get(target_id)
+        if target is not None:
+            _apply_update(target, new_target)
+        results.append(target)
+    session.commit()
+
+    _read_targets_by_id(session, list(targets))
+    return results
+
+
+def delete_targets(session: Session, target_ids: Sequence[int]) -> list[ScrapeTargets | None]:
+    """Delete many scraping targets from the database in a single transaction.
+
+    Returns:
+        list: The deleted target, or None if the target does not exist, for each target id.
+    """
+    targets = _read_targets_by_id(session, target_ids, for_delete=True)
+
+    results: list[ScrapeTargets | None] = []
+    for target_id in target_ids:
+        target = targets.pop(target_id, None)
+        if target is not None:
+            session.delete(target)
+        results.append(target)
+    session.commit()
+    return results
+
+
 # ---------------------------
 # FUNCTIONS FOR SCRAPED DATA
 # ---------------------------
-def read_scrape_data(session: Session) -> Sequence[ScrapedData]:
-    """Get all scrape data from database."""
+def read_scrape_data(
+    session: Session,
+    fields: Sequence[str] | None = None,
+) -> Sequence[ScrapedData] | Sequence[RowMapping]:
+    """Get all scrape data from database.
+
+    If `fields` are given only those columns are selected and the rows are
+    returned as mappings instead of models.
+
+    Raises:
+        InvalidFieldError: If one of the fields is not a field of the partial response model.
+    """
+    if fields:
+        return session.execute(select(*_columns(ScrapedData, fields))).mappings().all()
+
     stmt = select(ScrapedData)
     return session.scalars(stmt).all()
 
@@ -120,19 +443,228 @@ def read_scrape_data(session: Session) -> Sequence[ScrapedData]:
 def read_scrape_data_for_target(
     session: Session,
     target_id: int,
-) -> Sequence[ScrapedData]:
+    fields: Sequence[str] | None = None,
+) -> Sequence[ScrapedData] | Sequence[RowMapping]:
     """Get all scrape data for a target from database.
 
+    See `read_scrape_data` for details of the `fields` argument.
+
     Raises:
         TargetDoesNotExistError: If the target does not exist in the database.
+        InvalidFieldError: If one of the fields is not a field of the partial response model.
     """
     if not read_target(session, target_id):
         raise TargetDoesNotExistError
 
+    if fields:
+        stmt = select(*_columns(ScrapedData, fields)).where(
+            ScrapedData.scrape_target_id == target_id,
+        )
+        return session.execute(stmt).mappings().all()
+
     stmt = select(ScrapedData).where(ScrapedData.scrape_target_id == target_id)
     return session.scalars(stmt).all()
 
 
+def read_scrape_data_for_targets(
+    session: Session,
+    target_ids: Sequence[int],
+    since: datetime | None = None,
+    per_target_limit: int | None = None,
+) -> dict[int, list[ScrapedData]]:
+    """Get the scrape data for many targets from database in a single query.
+
+    Args:
+        session: The database session.
+        target_ids: The targets to get scrape data for.
+        since: If set, only scrape data from this time onwards is returned.
+        per_target_limit: If set, only this many of the newest scrape data are returned for each target.
+
+    Returns:
+        dict: The scrape data for each target id, newest first. Targets without
+        scrape data (including targets that do not exist) have an empty list.
+    """
+    filters: list[ColumnElement[bool]] = [ScrapedData.scrape_target_id.in_(target_ids)]
+    if since is not None:
+        filters.append(ScrapedData.timestamp >= since)
+
+    ranked = (
+        select(
+            ScrapedData,
+            over(
+                func.row_number(),
+                partition_by=ScrapedData.scrape_target_id,
+                order_by=(ScrapedData.timestamp.desc(), ScrapedData.id.desc()),
+            ).label("row_number"),
+        )
+        .where(*filters)
+        .subquery()
+    )
+    ranked_data = aliased(ScrapedData, ranked)
+    stmt = select(ranked_data).order_by(ranked_data.scrape_target_id, ranked.c.row_number)
+    if per_target_limit is not None:
+        stmt = stmt.where(ranked.c.row_number <= per_target_limit)
+
+    history: dict[int, list[ScrapedData]] = {target_id: [] for target_id in target_ids}
+    for scraped_data in session.scalars(stmt):
+        history[scraped_data.scrape_target_id].append(scraped_data)
+    return history
+
+
+def create_scrape_data(  # noqa: PLR0913
+    session: Session,
+    target_id: int,
+    price: str,
+    title: str,
+    timestamp: datetime,
+    page_hash: str | None = None,
+    content_hash: str | None = None,
+    notification_state: NotificationState | None = None,
+) -> ScrapedData:
+    """Save new scrape data for a target and update when the target was last scraped.
+
+    The scrape data is folded into the target's statistics. If the hashes of the page
+    and its content are given they are saved on the target and its count of unchanged
+    observations starts again. The target's `notification_state`, if given, is saved
+    in the same transaction so it never disagrees with the scrape data.
+
+    Raises:
+        TargetDoesNotExistError: If the target does not exist in the database.
+    """
+    target = read_target(session, target_id)
+
+    if target is None:
+        raise TargetDoesNotExistError
+
+    scraped_data = ScrapedData(
+        scrape_target_id=target_id,
+        price=price,
+        title=title,
+        timestamp=timestamp,
+    )
+    session.add(scraped_data)
+    target.last_scraped = timestamp
+    if target.stats is None:
+        target.stats = TargetStats(scrape_target_id=target_id)
+    target.stats.add(parse_price(price), timestamp)
+    if content_hash is not None:
+        target.page_hash = page_hash
+        target.content_hash = content_hash
+        target.unchanged_observations = 0
+    if notification_state is not None:
+        session.merge(notification_state)
+    session.commit()
+    return scraped_data
+
+
+def record_unchanged_scrape(
+    session: Session,
+    target_id: int,
+    timestamp: datetime,
+    page_hash: str,
+    count: bool = True,
+) -> ScrapeTargets:
+    """Record a scrape that found the same content as the last one, without saving new scrape data.
+
+    Args:
+        session (Session): The database session.
+        target_id (int): The id of the target.
+        timestamp (datetime): When the target was scraped.
+        page_hash (str): The hash of the scraped page.
+        count (bool): Whether to count the observation, in the target and its statistics,
+            otherwise only the time of the scrape and the page hash are saved.
+
+    Raises:
+        TargetDoesNotExistError: If the target does not exist in the database.
+    """
+    target = read_target(session, target_id)
+
+    if target is None:
+        raise TargetDoesNotExistError
+
+    target.last_scraped = timestamp
+    target.page_hash = page_hash
+    if count:
+        target.unchanged_observations += 1
+        if target.stats is not None:
+            target.stats.add_unchanged(timestamp)
+    session.commit()
+    return target
+
+
+def read_latest_price(session: Session, target_id: int) -> str | None:
+    """Get the most recently scraped price of a target, or None if it has not been scraped."""
+    stmt = (
+        select(ScrapedData.price)
+        .where(ScrapedData.scrape_target_id == target_id)
+        .order_by(ScrapedData.timestamp.desc(), ScrapedData.id.desc())
+        .limit(1)
+    )
+    return session.scalar(stmt)
+
+
+def read_latest_scrape_data_id(session: Session) -> int:
+    """Get the id of the newest scrape data in the database, or 0 if there is none."""
+    return session.scalar(select(func.max(ScrapedData.id))) or 0
+
+
+def read_scrape_data_after(  # noqa: PLR0913
+    session: Session,
+    after_id: int,
+    up_to_id: int | None = None,
+    target_id: int | None = None,
+    site: str | None = None,
+    limit: int = 500,
+) -> Sequence[ScrapedData]:
+    """Get scrape data with an id greater than `after_id` in id order.
+
+    Args:
+        session: The database session.
+        after_id: Only scrape data newer than this id is returned.
+        up_to_id: If set, only scrape data up to and including this id is returned.
+        target_id: If set, only scrape data for this target is returned.
+        site: If set, only scrape data for targets on this site is returned.
+        limit: The maximum number of rows to return.
+    """
+    stmt = select(ScrapedData).where(ScrapedData.id > after_id)
+    if up_to_id is not None:
+        stmt = stmt.where(ScrapedData.id <= up_to_id)
+    if target_id is not None:
+        stmt = stmt.where(ScrapedData.scrape_target_id == target_id)
+    if site is not None:
+        stmt = stmt.join(ScrapedData.scrape_target).where(ScrapeTargets.site == site)
+    stmt = stmt.order_by(ScrapedData.id).limit(limit)
+    return session.scalars(stmt).all()
+
+
+def stream_scrape_data_with_targets(
+    session: Session,
+    after_id: int,
+    batch_size: int,
+) -> Iterator[Sequence[Row[tuple[int, int, str, str, str, str, datetime]]]]:
+    """Stream the scrape data with an id greater than `after_id` in id order, in batches.
+
+    Each row is the id, target id, site, SKU, title, price and timestamp of a scrape
+    data, so the history can be read without loading it all at once.
+    """
+    stmt = (
+        select(
+            ScrapedData.id,
+            ScrapedData.scrape_target_id,
+            ScrapeTargets.site,
+            ScrapeTargets.sku,
+            ScrapedData.title,
+            ScrapedData.price,
+            ScrapedData.timestamp,
+        )
+        .join(ScrapedData.scrape_target)
+        .where(ScrapedData.id > after_id)
+        .order_by(ScrapedData.id)
+        .execution_options(yield_per=batch_size)
+    )
+    yield from session.execute(stmt).partitions()
+
+
 def read_scrape_data_by_id(session: Session, scrape_data_id: int) -> ScrapedData:
     """Get specific scrape data by id from database.
 
@@ -151,10 +683,252 @@ def read_scrape_data_by_id(session: Session, scrape_data_id: int) -> ScrapedData
 def delete_scrape_data(session: Session, scrape_data_id: int) -> ScrapedData:
     """Delete scrape data for a target from the database.
 
+    A deleted minimum or maximum cannot be taken back out of the running statistics,
+    so the statistics of the target are rebuilt from its remaining scrape data.
+
     Raises:
         ScrapedDataDoesNotExistError: If the scraped data does not exist in the database.
     """
     scraped_data = read_scrape_data_by_id(session, scrape_data_id)
     session.delete(scraped_data)
-    session.commit()
+    session.flush()
+    rebuild_target_stats(session, scraped_data.scrape_target_id)
     return scraped_data
+
+
+# ---------------------------
+# FUNCTIONS FOR TARGET STATS
+# ---------------------------
+def read_target_stats(session: Session, target_id: int) -> TargetStats | None:
+    """Get the statistics of a target's scrape data, or None if it has no scrape data.
+
+    Raises:
+        TargetDoesNotExistError: If the target does not exist in the database.
+    """
+    if read_target(session, target_id) is None:
+        raise TargetDoesNotExistError
+    return session.get(TargetStats, target_id)
+
+
+def read_all_target_stats(session: Session) -> Sequence[TargetStats]:
+    """Get the statistics of the scrape data of every target that has any."""
+    stmt = select(TargetStats).order_by(TargetStats.scrape_target_id)
+    return session.scalars(stmt).all()
+
+
+def rebuild_target_stats(session: Session, target_id: int | None = None) -> int:
+    """Rebuild the statistics from the scrape data history, of one target or of every target.
+
+    Returns:
+        int: The number of targets whose statistics were rebuilt.
+    """
+    # the unchanged scrapes are not in the scrape data history so they are kept
+    unchanged_stmt = select(TargetStats.scrape_target_id, TargetStats.unchanged_count, TargetStats.last_seen)
+    stmt = delete(TargetStats)
+    if target_id is not None:
+        unchanged_stmt = unchanged_stmt.where(TargetStats.scrape_target_id == target_id)
+        stmt = stmt.where(TargetStats.scrape_target_id == target_id)
+    unchanged = {row.scrape_target_id: row for row in session.execute(unchanged_stmt)}
+    session.execute(stmt)
+    session.expire_all()
+    stats = TargetStats.build(session, target_id)
+    for target_stats in stats:
+        if target_stats.scrape_target_id in unchanged:
+            previous = unchanged[target_stats.scrape_target_id]
+            target_stats.unchanged_count = previous.unchanged_count
+            target_stats.last_seen = max(target_stats.last_seen, previous.last_seen)
+    session.add_all(stats)
+    session.commit()
+    return len(stats)
+
+
+# --------------------------
+# FUNCTIONS FOR SCRAPE RUNS
+# --------------------------
+# the statuses of the targets a resumed scrape run does not scrape again, the others are retried
+DONE_STATUSES = ("success", "unchanged")
+
+
+def start_scrape_run(session: Session, started_since: datetime | None = None) -> ScrapeRun:
+    """Get the latest unfinished scrape run to resume it, or start a new one.
+
+    If `started_since` is given, unfinished runs started before that time are too old
+    to resume, as their targets are due again. They are finished and a new run starts.
+    """
+    if started_since is not None:
+        stale = select(ScrapeRun.id).where(ScrapeRun.finished.is_(None), ScrapeRun.started < started_since)
+        session.execute(delete(ScrapeRunTarget).where(ScrapeRunTarget.scrape_run_id.in_(stale)))
+        session.execute(
+            update(ScrapeRun)
+            .where(ScrapeRun.id.in_(stale))
+            .values(finished=utcnow()),
+        )
+        session.commit()
+
+    stmt = (
+        select(ScrapeRun)
+        .where(ScrapeRun.finished.is_(None))
+        .order_by(ScrapeRun.id.desc())
+        .limit(1)
+    )
+    scrape_run = session.scalars(stmt).first()
+
+    if scrape_run is None:
+        scrape_run = ScrapeRun(started=utcnow())
+        session.add(scrape_run)
+        session.commit()
+    return scrape_run
+
+
+def read_pending_targets(
+    session: Session,
+    scrape_run_id: int,
+    fresh_since: datetime | None = None,
+) -> Sequence[ScrapeTargets]:
+    """Get the targets that have not yet been scraped successfully in a scrape run.
+
+    Targets that failed or were skipped are returned again so a resumed run retries
+    them. If `fresh_since` is given, targets last scraped at or after that time are
+    skipped too.
+    """
+    done = select(ScrapeRunTarget.scrape_target_id).where(
+        ScrapeRunTarget.scrape_run_id == scrape_run_id,
+        ScrapeRunTarget.status.in_(DONE_STATUSES),
+    )
+    stmt = select(ScrapeTargets).where(ScrapeTargets.id.not_in(done)).order_by(ScrapeTargets.id)
+    if fresh_since is not None:
+        stmt = stmt.where(ScrapeTargets.last_scraped < fresh_since)
+    return session.scalars(stmt).all()
+
+
+def record_scrape_run_target(
+    session: Session,
+    scrape_run_id: int,
+    target_id: int,
+    status: str,
+) -> None:
+    """Record the status of a target scraped in a scrape run."""
+    session.merge(
+        ScrapeRunTarget(
+            scrape_run_id=scrape_run_id,
+            scrape_target_id=target_id,
+            status=status,
+            timestamp=utcnow(),
+        ),
+    )
+    session.commit()
+
+
+def finish_scrape_run(session: Session, scrape_run_id: int) -> None:
+    """Mark a scrape run as finished so the next run starts from the first target.
+
+    The statuses of the run's targets are only needed to resume it, so they are deleted.
+    """
+    stmt = (
+        update(ScrapeRun)
+        .where(ScrapeRun.id == scrape_run_id)
+        .values(finished=utcnow())
+    )
+    session.execute(stmt)
+    session.execute(delete(ScrapeRunTarget).where(ScrapeRunTarget.scrape_run_id == scrape_run_id))
+    session.commit()
+
+
+# ------------------------------
+# FUNCTIONS FOR SCRAPE TIMEOUTS
+# ------------------------------
+def create_scrape_timeout(
+    session: Session,
+    target_id: int,
+    stage: str,
+    seconds: float,
+    scrape_run_id: int | None = None,
+) -> ScrapeTimeout:
+    """Record that a stage of scraping a target timed out."""
+    scrape_timeout = ScrapeTimeout(
+        scrape_target_id=target_id,
+        scrape_run_id=scrape_run_id,
+        stage=stage,
+        seconds=seconds,
+        timestamp=utcnow(),
+    )
+    session.add(scrape_timeout)
+    session.commit()
+    return scrape_timeout
+
+
+def read_scrape_timeouts(session: Session, target_id: int) -> Sequence[ScrapeTimeout]:
+    """Get the timeouts recorded for a target, most recent first.
+
+    Raises:
+        TargetDoesNotExistError: If the target does not exist in the database.
+    """
+    if read_target(session, target_id) is None:
+        raise TargetDoesNotExistError
+
+    stmt = (
+        select(ScrapeTimeout)
+        .where(ScrapeTimeout.scrape_target_id == target_id)
+        .order_by(ScrapeTimeout.id.desc())
+    )
+    return session.scalars(stmt).all()
+
+
+# ----------------------------
+# FUNCTIONS FOR SITE CIRCUITS
+# ----------------------------
+def read_site_circuits(session: Session) -> Sequence[SiteCircuit]:
+    """Get the circuit breaker state of every site that has one."""
+    return session.scalars(select(SiteCircuit)).all()
+
+
+def save_site_circuit(session: Session, circuit: SiteCircuit) -> None:
+    """Save the circuit breaker state of a site, which may belong to another session."""
+    session.merge(circuit)
+    session.commit()
+
+
+# ----------------------------------
+# FUNCTIONS FOR NOTIFICATION STATES
+# ----------------------------------
+def read_notification_state(session: Session, target_id: int) -> NotificationState | None:
+    """Get what the notification rules remember about a target's prices, or None if they have seen none."""
+    return session.get(NotificationState, target_id)
+
+
+# -------------------------
+# FUNCTIONS FOR CHANGE LOG
+# -------------------------
+def read_changes(
+    session: Session,
+    since: int,
+    limit: int,
+) -> Sequence[Row[tuple[ChangeLog, ScrapeTargets, ScrapedData]]]:
+    """Get the changes recorded after the `since` sequence number in sequence order.
+
+    Each change is returned with the current state of the row it refers to. The row
+    is None for deletes and for rows that have since been deleted.
+    """
+    stmt = (
+        select(ChangeLog, ScrapeTargets, ScrapedData)
+        .outerjoin(
+            ScrapeTargets,
+            and_(
+                ChangeLog.table_name == ScrapeTargets.__tablename__,
+                ChangeLog.row_id == ScrapeTargets.id,
+                ChangeLog.operation != "delete",
+            ),
+        )
+        .outerjoin(
+            ScrapedData,
+            and_(
+                ChangeLog.table_name == ScrapedData.__tablename__,
+                ChangeLog.row_id == ScrapedData.id,
+                ChangeLog.operation != "delete",
+            ),
+        )
+        .where(ChangeLog.id > since)
+        .order_by(ChangeLog.id)
+        .limit(limit)
+    )
+    return session.execute(stmt).all()
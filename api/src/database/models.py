@@ -1,20 +1,52 @@
 """Database models."""
 
 from datetime import datetime
-from typing import List
+from typing import Callable, List
 
-from sqlalchemy import ForeignKey
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy import (
+    Connection,
+    ForeignKey,
+    Index,
+    Table,
+    event,
+    insert,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    Mapper,
+    Session,
+    mapped_column,
+    relationship,
+)
+
+from src.functions.utils import parse_price, utcnow
 
 
 class Base(DeclarativeBase):
     """Base class for all database models."""
 
 
+# scrape targets once a day unless told otherwise
+DEFAULT_SCRAPE_INTERVAL = 24 * 60 * 60
+
+
 class ScrapeTargets(Base):
     """This table stores the targets to scrape.
 
-    A target is a combination of a site and a SKU.
+    A target is a combination of a site and a SKU. The scrape interval is the
+    number of seconds between scrapes of the target. The current interval is the
+    scrape interval as adapted to how often the target's price changes, if it has
+    been adapted.
+
+    A worker that is scraping the target holds a lease on it until the lease expires.
+
+    The page and content hashes are those of the last page the price and title were
+    found on, so an unchanged page can be skipped. The unchanged observations are the
+    number of scrapes since then that found the same price and title.
     """
 
     __tablename__ = "scrape_targets"
@@ -25,11 +57,24 @@ class ScrapeTargets(Base):
     send_notification: Mapped[bool]
     date_added: Mapped[datetime]
     last_scraped: Mapped[datetime]
+    scrape_interval: Mapped[int] = mapped_column(
+        default=DEFAULT_SCRAPE_INTERVAL,
+        server_default=str(DEFAULT_SCRAPE_INTERVAL),
+    )
+    current_interval: Mapped[int | None]
+    leased_by: Mapped[str | None]
+    lease_expires: Mapped[datetime | None]
+    page_hash: Mapped[str | None]
+    content_hash: Mapped[str | None]
+    unchanged_observations: Mapped[int] = mapped_column(default=0, server_default="0")
 
     scraped_data: Mapped[List["ScrapedData"]] = relationship(
         back_populates="scrape_target",
         cascade="all, delete-orphan",
     )
+    notification_state: Mapped["NotificationState | None"] = relationship(cascade="all, delete-orphan")
+    stats: Mapped["TargetStats | None"] = relationship(cascade="all, delete-orphan")
+    scrape_run_targets: Mapped[List["ScrapeRunTarget"]] = relationship(cascade="all, delete-orphan")
 
     def __repr__(self) -> str:
         """Return a string representation of the object."""
@@ -40,6 +85,9 @@ class ScrapedData(Base):
     """This table stores the scraped data."""
 
     __tablename__ = "scraped_data"
+    __table_args__ = (
+        Index("ix_scraped_data_target_timestamp", "scrape_target_id", "timestamp"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)  # noqa: A003
     scrape_target_id: Mapped[int] = mapped_column(ForeignKey("scrape_targets.id"))
@@ -52,3 +100,346 @@ class ScrapedData(Base):
     def __repr__(self) -> str:
         """Return a string representation of the object."""
         return f"{self.__class__.__name__}(scrape_target_id={self.scrape_target_id!r}, title={self.title!r}, price={self.price!r})"
+
+
+class NotificationState(Base):
+    """This table stores what the notification rules remember about the prices of each target.
+
+    It is updated with every new price so the rules never read the price history.
+    The lowest price is not kept here, as it is in the target's statistics.
+    """
+
+    __tablename__ = "notification_states"
+
+    scrape_target_id: Mapped[int] = mapped_column(ForeignKey("scrape_targets.id"), primary_key=True)
+    last_price: Mapped[float]
+    ewma: Mapped[float]
+    observations: Mapped[int]
+    updated: Mapped[datetime]
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(scrape_target_id={self.scrape_target_id!r}, last_price={self.last_price!r}, ewma={self.ewma!r})"
+
+
+class TargetStats(Base):
+    """This table stores running statistics of the scrape data of each target.
+
+    It is updated in constant time with every new scrape data, so the statistics
+    are never computed from the scrape data history. The count is the number of
+    scrape data, the price count the number of those with a price that could be
+    parsed, and the mean and M2 (the sum of squared differences from the mean) are
+    kept with Welford's algorithm so the variance of the prices can be derived.
+
+    The unchanged count is the number of scrapes that found the same price and
+    title as the last one and were only counted, which also move the last seen time.
+    """
+
+    __tablename__ = "target_stats"
+
+    scrape_target_id: Mapped[int] = mapped_column(ForeignKey("scrape_targets.id"), primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+    price_count: Mapped[int] = mapped_column(default=0)
+    first_seen: Mapped[datetime]
+    last_seen: Mapped[datetime]
+    min_price: Mapped[float | None]
+    min_price_at: Mapped[datetime | None]
+    max_price: Mapped[float | None]
+    max_price_at: Mapped[datetime | None]
+    mean_price: Mapped[float | None]
+    m2: Mapped[float] = mapped_column(default=0.0)
+    unchanged_count: Mapped[int] = mapped_column(default=0, server_default="0")
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(scrape_target_id={self.scrape_target_id!r}, count={self.count!r}, min_price={self.min_price!r})"
+
+    def add(self, price: float | None, timestamp: datetime) -> None:
+        """Fold a new scrape data into the statistics.
+
+        Args:
+            price (float | None): The parsed price, or None if the price could not be parsed.
+            timestamp (datetime): When the data was scraped.
+        """
+        self.count = (self.count or 0) + 1
+        self.first_seen = min(self.first_seen or timestamp, timestamp)
+        self.last_seen = max(self.last_seen or timestamp, timestamp)
+        if price is None:
+            return
+
+        if self.min_price is None or price < self.min_price:
+            self.min_price, self.min_price_at = price, timestamp
+        if self.max_price is None or price > self.max_price:
+            self.max_price, self.max_price_at = price, timestamp
+        self.price_count = (self.price_count or 0) + 1
+        mean = self.mean_price or 0.0
+        delta = price - mean
+        self.mean_price = mean + delta / self.price_count
+        self.m2 = (self.m2 or 0.0) + delta * (price - self.mean_price)
+
+    def add_unchanged(self, timestamp: datetime) -> None:
+        """Count a scrape that found the same price and title as the last one."""
+        self.unchanged_count = (self.unchanged_count or 0) + 1
+        self.last_seen = max(self.last_seen or timestamp, timestamp)
+
+    @classmethod
+    def build(cls, session: Session, target_id: int | None = None) -> list["TargetStats"]:
+        """Compute the statistics from the scrape data history, of one target or of all of them.
+
+        The scrape data is streamed so the history is never held in memory.
+        """
+        stmt = select(ScrapedData.scrape_target_id, ScrapedData.price, ScrapedData.timestamp).order_by(ScrapedData.id)
+        if target_id is not None:
+            stmt = stmt.where(ScrapedData.scrape_target_id == target_id)
+
+        stats: dict[int, TargetStats] = {}
+        for scrape_target_id, price, timestamp in session.execute(stmt.execution_options(yield_per=1000)):
+            if scrape_target_id not in stats:
+                stats[scrape_target_id] = cls(scrape_target_id=scrape_target_id)
+            stats[scrape_target_id].add(parse_price(price), timestamp)
+        return list(stats.values())
+
+
+class ScrapeRun(Base):
+    """This table stores each run of the scraper over every target.
+
+    A run is finished once every target has been scraped, so an unfinished run
+    can be resumed after the scraper was interrupted.
+    """
+
+    __tablename__ = "scrape_runs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)  # noqa: A003
+    started: Mapped[datetime]
+    finished: Mapped[datetime | None]
+
+    targets: Mapped[List["ScrapeRunTarget"]] = relationship(
+        back_populates="scrape_run",
+        cascade="all, delete-orphan",
+    )
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(id={self.id!r}, started={self.started!r}, finished={self.finished!r})"
+
+
+class ScrapeRunTarget(Base):
+    """This table stores the status of each target scraped in an unfinished scrape run.
+
+    The rows of a run are deleted when it finishes.
+    """
+
+    __tablename__ = "scrape_run_targets"
+
+    scrape_run_id: Mapped[int] = mapped_column(ForeignKey("scrape_runs.id"), primary_key=True)
+    scrape_target_id: Mapped[int] = mapped_column(ForeignKey("scrape_targets.id"), primary_key=True)
+    status: Mapped[str]
+    timestamp: Mapped[datetime]
+
+    scrape_run: Mapped["ScrapeRun"] = relationship(back_populates="targets")
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(scrape_run_id={self.scrape_run_id!r}, scrape_target_id={self.scrape_target_id!r}, status={self.status!r})"
+
+
+class ScrapeTimeout(Base):
+    """This table records every stage of scraping a target that timed out."""
+
+    __tablename__ = "scrape_timeouts"
+
+    id: Mapped[int] = mapped_column(primary_key=True)  # noqa: A003
+    scrape_target_id: Mapped[int] = mapped_column(index=True)
+    scrape_run_id: Mapped[int | None]
+    stage: Mapped[str]
+    seconds: Mapped[float]
+    timestamp: Mapped[datetime]
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(scrape_target_id={self.scrape_target_id!r}, stage={self.stage!r}, seconds={self.seconds!r})"
+
+
+class SiteCircuit(Base):
+    """This table stores the circuit breaker state of each site.
+
+    A site's circuit opens after too many failed scrapes, and its targets are
+    skipped until the cool-down has passed. Then a single probe decides whether
+    the circuit closes again or stays open for a longer cool-down.
+
+    The failures and attempts are counted over the recent results, the outcomes of
+    the site's last scrapes ("1" for a failure and "0" for a success), oldest first.
+    """
+
+    __tablename__ = "site_circuits"
+
+    site: Mapped[str] = mapped_column(primary_key=True)
+    state: Mapped[str] = mapped_column(default="closed")
+    consecutive_failures: Mapped[int] = mapped_column(default=0)
+    failures: Mapped[int] = mapped_column(default=0)
+    attempts: Mapped[int] = mapped_column(default=0)
+    recent_results: Mapped[str] = mapped_column(default="", server_default="")
+    cooldown: Mapped[int | None]
+    open_until: Mapped[datetime | None]
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(site={self.site!r}, state={self.state!r}, open_until={self.open_until!r})"
+
+
+class ChangeLog(Base):
+    """This table records every insert, update and delete of the targets and scrape data.
+
+    Updates are only recorded if they changed a column that users see and edit, so
+    the scraper's own bookkeeping (such as leases, hashes and when a target was last
+    scraped) is not replicated. The id is a sequence number that clients can use as
+    a cursor to replicate the database incrementally.
+    """
+
+    __tablename__ = "change_log"
+
+    id: Mapped[int] = mapped_column(primary_key=True)  # noqa: A003
+    table_name: Mapped[str]
+    row_id: Mapped[int]
+    operation: Mapped[str]
+    timestamp: Mapped[datetime]
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(table_name={self.table_name!r}, row_id={self.row_id!r}, operation={self.operation!r})"
+
+
+# the columns whose updates are recorded, the others are written by the scraper for its own use
+# and are left out of the synced targets (see `SyncTargetOut`)
+_SYNCED_COLUMNS: dict[type[Base], tuple[str, ...]] = {
+    ScrapeTargets: ("site", "sku", "send_notification", "scrape_interval"),
+    ScrapedData: ("scrape_target_id", "title", "price", "timestamp"),
+}
+
+
+def _change_recorder(operation: str) -> Callable[[Mapper[Base], Connection, Base], None]:
+    """Create a mapper event listener that records the operation in the change log.
+
+    Updates are only recorded if they changed one of the model's synced columns.
+    """
+
+    def record_change(mapper: Mapper[Base], connection: Connection, target: Base) -> None:
+        if operation == "update":
+            state = inspect(target)
+            if not any(state.attrs[column].history.has_changes() for column in _SYNCED_COLUMNS[type(target)]):
+                return
+        connection.execute(
+            insert(ChangeLog).values(
+                table_name=mapper.local_table.name,  # type: ignore[attr-defined]
+                row_id=mapper.primary_key_from_instance(target)[0],
+                operation=operation,
+                timestamp=utcnow(),
+            ),
+        )
+
+    return record_change
+
+
+for model in (ScrapeTargets, ScrapedData):
+    for operation in ("insert", "update", "delete"):
+        event.listen(model, f"after_{operation}", _change_recorder(operation))
+
+
+# create the change log after the tables it backfills from
+ChangeLog.__table__.add_is_dependent_on(ScrapeTargets.__table__)  # type: ignore[attr-defined]
+ChangeLog.__table__.add_is_dependent_on(ScrapedData.__table__)  # type: ignore[attr-defined]
+
+
+@event.listens_for(ChangeLog.__table__, "after_create")
+def _backfill_change_log(table: Table, connection: Connection, **kwargs: object) -> None:
+    """Record existing rows as inserts so a full sync can start from an empty cursor."""
+    connection.execute(
+        text(
+            "INSERT INTO change_log (table_name, row_id, operation, timestamp) "
+            "SELECT 'scrape_targets', id, 'insert', date_added FROM scrape_targets ORDER BY id",
+        ),
+    )
+    connection.execute(
+        text(
+            "INSERT INTO change_log (table_name, row_id, operation, timestamp) "
+            "SELECT 'scraped_data', id, 'insert', timestamp FROM scraped_data ORDER BY id",
+        ),
+    )
+
+
+# create the statistics after the table they are built from
+TargetStats.__table__.add_is_dependent_on(ScrapedData.__table__)  # type: ignore[attr-defined]
+
+
+@event.listens_for(TargetStats.__table__, "after_create")
+def _backfill_target_stats(table: Table, connection: Connection, **kwargs: object) -> None:
+    """Build the statistics of the existing scrape data so they are complete from the start."""
+    with Session(bind=connection) as session:
+        session.add_all(TargetStats.build(session))
+        # the session joins the transaction creating the table so this does not commit it
+        session.commit()
+
+
+# a full-text index of each target's SKU and latest title, which SQLite keeps in sync with triggers
+_TARGET_SEARCH_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS target_search_target_insert AFTER INSERT ON scrape_targets BEGIN
+        INSERT INTO target_search (rowid, sku, title) VALUES (new.id, new.sku, '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS target_search_target_update AFTER UPDATE OF sku ON scrape_targets BEGIN
+        UPDATE target_search SET sku = new.sku WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS target_search_target_delete AFTER DELETE ON scrape_targets BEGIN
+        DELETE FROM target_search WHERE rowid = old.id;
+    END
+    """,
+    # only index a new title, and only if the scrape data is the target's latest
+    """
+    CREATE TRIGGER IF NOT EXISTS target_search_data_insert AFTER INSERT ON scraped_data BEGIN
+        UPDATE target_search SET title = new.title
+        WHERE rowid = new.scrape_target_id AND title IS NOT new.title AND NOT EXISTS (
+            SELECT 1 FROM scraped_data WHERE scrape_target_id = new.scrape_target_id AND timestamp > new.timestamp
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS target_search_data_delete AFTER DELETE ON scraped_data BEGIN
+        UPDATE target_search SET title = coalesce((
+            SELECT title FROM scraped_data WHERE scrape_target_id = old.scrape_target_id
+            ORDER BY timestamp DESC, id DESC LIMIT 1
+        ), '')
+        WHERE rowid = old.scrape_target_id;
+    END
+    """,
+)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_target_search(metadata: object, connection: Connection, **kwargs: object) -> None:
+    """Create the full-text index of the targets and its triggers, indexing the existing targets."""
+    exists = connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'target_search'")).first()
+    if exists is None:
+        connection.execute(
+            text("CREATE VIRTUAL TABLE target_search USING fts5(sku, title, prefix = '2 3', tokenize = 'unicode61 remove_diacritics 2')"),
+        )
+        connection.execute(
+            text(
+                "INSERT INTO target_search (rowid, sku, title) "
+                "SELECT id, sku, coalesce(("
+                "SELECT title FROM scraped_data WHERE scrape_target_id = scrape_targets.id "
+                "ORDER BY timestamp DESC, id DESC LIMIT 1"
+                "), '') FROM scrape_targets",
+            ),
+        )
+    for trigger in _TARGET_SEARCH_TRIGGERS:
+        connection.execute(text(trigger))
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_target_search(metadata: object, connection: Connection, **kwargs: object) -> None:
+    """Drop the full-text index of the targets, whose triggers are dropped with their tables."""
+    connection.execute(text("DROP TABLE IF EXISTS target_search"))
@@ -1,8 +1,11 @@
 """Pydantic models."""
 
+import math
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, computed_field
+
+from .models import DEFAULT_SCRAPE_INTERVAL
 
 
 class TargetBase(BaseModel):
@@ -11,18 +14,49 @@ class TargetBase(BaseModel):
     site: str
     sku: str
     send_notification: bool
+    scrape_interval: int = Field(default=DEFAULT_SCRAPE_INTERVAL, ge=60)
 
 
 class TargetIn(TargetBase):
     """model for a new scraping target."""
 
 
+class TargetUpdateIn(TargetBase):
+    """model for updating an existing scraping target in bulk."""
+
+    id: int  # noqa: A003
+
+
 class TargetOut(TargetBase):
     """model for a scraping target."""
 
     id: int  # noqa: A003
     date_added: datetime
     last_scraped: datetime
+    current_interval: int | None = None
+
+
+class SyncTargetOut(TargetBase):
+    """model for a scraping target replicated by the sync, without the scraper's own bookkeeping."""
+
+    id: int  # noqa: A003
+    date_added: datetime
+
+
+class TargetSearchResultOut(TargetOut):
+    """model for a scraping target found by a search."""
+
+    title: str | None
+    rank: float
+
+
+class BulkTargetResult(BaseModel):
+    """model for the result of a single item of a bulk operation on scraping targets."""
+
+    index: int
+    status: str
+    target: TargetOut | None = None
+    detail: str | None = None
 
 
 class ScrapeDataBase(BaseModel):
@@ -42,3 +76,92 @@ class ScrapeDataOut(ScrapeDataBase):
     """model for a scrape data."""
 
     id: int  # noqa: A003
+
+
+class TargetPartialOut(BaseModel):
+    """model for a scraping target narrowed down to a subset of its fields."""
+
+    id: int | None = None  # noqa: A003
+    site: str | None = None
+    sku: str | None = None
+    send_notification: bool | None = None
+    scrape_interval: int | None = None
+    current_interval: int | None = None
+    date_added: datetime | None = None
+    last_scraped: datetime | None = None
+
+
+class TargetScrapeDataOut(BaseModel):
+    """model for the scrape data of a single scraping target."""
+
+    scrape_target_id: int
+    scrape_data: list[ScrapeDataOut]
+
+
+class ScrapeDataPartialOut(BaseModel):
+    """model for a scrape data narrowed down to a subset of its fields."""
+
+    id: int | None = None  # noqa: A003
+    scrape_target_id: int | None = None
+    title: str | None = None
+    price: str | None = None
+    timestamp: datetime | None = None
+
+
+class ScrapeTimeoutOut(BaseModel):
+    """model for a stage of scraping a target that timed out."""
+
+    scrape_target_id: int
+    scrape_run_id: int | None
+    stage: str
+    seconds: float
+    timestamp: datetime
+
+
+class TargetStatsOut(BaseModel):
+    """model for the statistics of the scrape data of a scraping target."""
+
+    scrape_target_id: int
+    count: int
+    price_count: int
+    first_seen: datetime
+    last_seen: datetime
+    min_price: float | None
+    min_price_at: datetime | None
+    max_price: float | None
+    max_price_at: datetime | None
+    mean_price: float | None
+    unchanged_count: int
+    m2: float = Field(exclude=True)
+
+    @computed_field  # type: ignore[misc]
+    @property
+    def price_variance(self) -> float | None:
+        """The sample variance of the prices, if there are at least two."""
+        return self.m2 / (self.price_count - 1) if self.price_count > 1 else None
+
+    @computed_field  # type: ignore[misc]
+    @property
+    def price_stddev(self) -> float | None:
+        """The sample standard deviation of the prices, if there are at least two."""
+        variance = self.price_variance
+        return math.sqrt(variance) if variance is not None else None
+
+
+class ChangeOut(BaseModel):
+    """model for a single change to the database."""
+
+    seq: int
+    table_name: str
+    operation: str
+    row_id: int
+    target: SyncTargetOut | None = None
+    scrape_data: ScrapeDataOut | None = None
+
+
+class SyncOut(BaseModel):
+    """model for a page of changes to the database."""
+
+    changes: list[ChangeOut]
+    cursor: int
+    has_more: bool
@@ -0,0 +1,131 @@
+"""Export the scrape data history as Parquet files partitioned by site and month."""
+
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple, Sequence
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+from src.database import crud
+from src.functions.utils import parse_price
+
+EXPORT_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("scrape_target_id", pa.int64()),
+        ("sku", pa.string()),
+        ("title", pa.string()),
+        ("price", pa.float64()),
+        ("price_text", pa.string()),
+        ("timestamp", pa.timestamp("us")),
+        ("site", pa.string()),
+        ("month", pa.string()),
+    ],
+)
+# the partition columns are kept in the directory names, such as site=amz/month=2023-01
+PARTITIONING = ds.partitioning(pa.schema([("site", pa.string()), ("month", pa.string())]), flavor="hive")
+# readers of the dataset skip files starting with an underscore
+STATE_FILE = "_export_state.json"
+
+# held while the API exports so two requests never write the same files at once
+export_lock = threading.Lock()
+
+
+class ExportResult(NamedTuple):
+    """The result of exporting the scrape data.
+
+    Attributes:
+        rows (int): The number of scrape data exported.
+        last_id (int): The id of the last scrape data exported, which the next export starts after.
+        files (list): The Parquet files written.
+    """
+
+    rows: int
+    last_id: int
+    files: list[str]
+
+
+def read_last_exported_id(directory: Path) -> int:
+    """Get the id of the last scrape data exported to a directory, or 0 if none has been."""
+    try:
+        state = json.loads((directory / STATE_FILE).read_text())
+    except FileNotFoundError:
+        return 0
+    return int(state["last_id"])
+
+
+def _write_last_exported_id(directory: Path, last_id: int) -> None:
+    # write to a temporary file first so the state is never read half written
+    temporary = directory / f"{STATE_FILE}.tmp"
+    temporary.write_text(json.dumps({"last_id": last_id}))
+    temporary.replace(directory / STATE_FILE)
+
+
+def _to_record_batch(rows: Sequence[Row[tuple[int, int, str, str, str, str, datetime]]]) -> pa.RecordBatch:
+    ids, target_ids, sites, skus, titles, prices, timestamps = zip(*rows)
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(ids, pa.int64()),
+            pa.array(target_ids, pa.int64()),
+            pa.array(skus, pa.string()),
+            pa.array(titles, pa.string()),
+            pa.array([parse_price(price) for price in prices], pa.float64()),
+            pa.array(prices, pa.string()),
+            pa.array(timestamps, pa.timestamp("us")),
+            pa.array(sites, pa.string()),
+            pa.array([timestamp.strftime("%Y-%m") for timestamp in timestamps], pa.string()),
+        ],
+        schema=EXPORT_SCHEMA,
+    )
+
+
+def export_scrape_data(session: Session, directory: Path, batch_size: int = 10_000) -> ExportResult:
+    """Export the scrape data added since the last export as Parquet files partitioned by site and month.
+
+    The new scrape data is read from the database in batches of `batch_size` and
+    each batch is appended to the dataset as new files, named after the first id in
+    the batch, in a `site=<site>/month=<YYYY-MM>` directory for each partition. The id
+    of the last scrape data exported is saved in the directory after each batch, so
+    an interrupted export resumes after the last batch it finished and overwrites any
+    files of the batch it was writing.
+
+    The price is exported both parsed, as a number that is null if the price could not
+    be parsed, and as scraped. The directory can be read with `pandas.read_parquet` or
+    `pyarrow.dataset.dataset(directory, partitioning="hive")`.
+
+    Args:
+        session (Session): The database session.
+        directory (Path): The directory of the dataset.
+        batch_size (int): The number of scrape data read from the database at a time.
+
+    Returns:
+        ExportResult: The number of scrape data exported, the last id and the files written.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    after_id = read_last_exported_id(directory)
+    count, last_id, files = 0, after_id, []
+
+    for rows in crud.stream_scrape_data_with_targets(session, after_id, batch_size):
+        # the batches are written here, not by pyarrow's threads, as the session belongs to this thread
+        ds.write_dataset(
+            _to_record_batch(rows),
+            directory,
+            format="parquet",
+            partitioning=PARTITIONING,
+            basename_template=f"part-{rows[0][0]}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_visitor=lambda written: files.append(written.path),
+        )
+        count += len(rows)
+        last_id = rows[-1][0]
+        _write_last_exported_id(directory, last_id)
+
+    msg = f"Exported {count} scrape data after id {after_id} to {len(files)} files in '{directory}'"
+    logging.info(msg=msg)
+    return ExportResult(rows=count, last_id=last_id, files=files)
@@ -0,0 +1,225 @@
+"""A compressed store for the pages of failed scrapes, with each distinct page stored once."""
+
+import atexit
+import gzip
+import hashlib
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from src import settings
+from src.functions.utils import utcnow
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, size INTEGER NOT NULL, last_used REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS dumps (
+    id INTEGER PRIMARY KEY,
+    target_id INTEGER NOT NULL,
+    sku TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    digest TEXT NOT NULL REFERENCES blobs (digest)
+);
+CREATE INDEX IF NOT EXISTS ix_dumps_target_id ON dumps (target_id);
+CREATE INDEX IF NOT EXISTS ix_dumps_digest ON dumps (digest);
+"""
+
+
+class HtmlDump(NamedTuple):
+    """A page dumped for a target.
+
+    Attributes:
+        target_id (int): The id of the target the page was scraped for.
+        sku (str): The SKU of the target.
+        timestamp (datetime): When the page was dumped (in UTC).
+        digest (str): The hash of the page, which identifies its blob.
+    """
+
+    target_id: int
+    sku: str
+    timestamp: datetime
+    digest: str
+
+
+class _Job(NamedTuple):
+    target_id: int
+    sku: str
+    timestamp: datetime
+    html: str
+
+
+class HtmlDumpStore:
+    """Store the pages of failed scrapes, compressed and deduplicated, within a size and age budget.
+
+    Each page is stored once, gzipped, in a blob named after the hash of its content,
+    so the hundreds of identical captcha pages of a blocked run take the space of one.
+    An index in the directory records which target each page was dumped for and when.
+
+    Pages are written on a background thread so a scrape never waits for the disk.
+    After each write the least recently dumped blobs are evicted until the blobs fit
+    in `max_bytes`, and blobs not dumped for `max_age` seconds are removed.
+
+    Attributes:
+        directory (Path): The directory the blobs and the index are stored in.
+        max_bytes (int): The most space the compressed blobs take up.
+        max_age (float): How long a blob is kept after it was last dumped (in seconds).
+        queue_size (int): The number of pages waiting to be written, after which pages are dropped.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, max_age: float, queue_size: int = 32):
+        """Initialise a new instance of the HtmlDumpStore class, starting the writer thread."""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.queue_size = queue_size
+        self._jobs: queue.Queue[_Job | None] = queue.Queue(queue_size)
+        self._thread = threading.Thread(target=self._write_jobs, daemon=True)
+        self._thread.start()
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(directory={self.directory!r}, max_bytes={self.max_bytes!r})"
+
+    def __enter__(self) -> "HtmlDumpStore":
+        """Return the store."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Write the waiting pages and stop the writer thread."""
+        self.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.directory / "index.db", timeout=30)
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.html.gz"
+
+    def dump(self, target_id: int, sku: str, html: str) -> None:
+        """Queue a page to be stored, dropping it if too many pages are already waiting.
+
+        Args:
+            target_id (int): The id of the target the page was scraped for.
+            sku (str): The SKU of the target.
+            html (str): The HTML content of the page.
+        """
+        timestamp = utcnow()
+        try:
+            self._jobs.put_nowait(_Job(target_id, sku, timestamp, html))
+        except queue.Full:
+            msg = f"Dropped the page of '{sku}' as {self.queue_size} pages are waiting to be written"
+            logging.warning(msg=msg)
+
+    def flush(self) -> None:
+        """Wait until every queued page has been written."""
+        self._jobs.join()
+
+    def close(self) -> None:
+        """Write the queued pages and stop the writer thread."""
+        if self._thread.is_alive():
+            self._jobs.put(None)
+            self._thread.join()
+
+    def _write_jobs(self) -> None:
+        connection = self._connect()
+        while (job := self._jobs.get()) is not None:
+            self._store(connection, job)
+            self._jobs.task_done()
+        self._jobs.task_done()
+        connection.close()
+
+    def _store(self, connection: sqlite3.Connection, job: _Job) -> None:
+        try:
+            self._write(connection, job)
+            self._evict(connection)
+            connection.commit()
+        except Exception as e:
+            connection.rollback()
+            msg = f"Could not dump the page of '{job.sku}': {e}"
+            logging.exception(msg=msg)
+
+    def _write(self, connection: sqlite3.Connection, job: _Job) -> None:
+        content = job.html.encode()
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first so a blob is never read half written
+            temporary = path.with_suffix(".tmp")
+            temporary.write_bytes(gzip.compress(content))
+            temporary.replace(path)
+        connection.execute(
+            "INSERT INTO blobs (digest, size, last_used) VALUES (?, ?, ?) "
+            "ON CONFLICT (digest) DO UPDATE SET last_used = excluded.last_used",
+            (digest, path.stat().st_size, time.time()),
+        )
+        connection.execute(
+            "INSERT INTO dumps (target_id, sku, timestamp, digest) VALUES (?, ?, ?, ?)",
+            (job.target_id, job.sku, job.timestamp.isoformat(), digest),
+        )
+        msg = f"Dumped the page of '{job.sku}' as {digest}"
+        logging.info(msg=msg)
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        """Remove the blobs older than `max_age`, then the least recently used until they fit in `max_bytes`."""
+        cutoff = time.time() - self.max_age
+        evicted = [digest for (digest,) in connection.execute("SELECT digest FROM blobs WHERE last_used < ?", (cutoff,))]
+        recent = connection.execute(
+            "SELECT digest, size FROM blobs WHERE last_used >= ? ORDER BY last_used DESC",
+            (cutoff,),
+        )
+        total = 0
+        for digest, size in recent.fetchall():
+            total += size
+            if total > self.max_bytes:
+                evicted.append(digest)
+
+        for digest in evicted:
+            connection.execute("DELETE FROM dumps WHERE digest = ?", (digest,))
+            connection.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            self._blob_path(digest).unlink(missing_ok=True)
+        if evicted:
+            msg = f"Evicted {len(evicted)} dumped pages"
+            logging.info(msg=msg)
+
+    def read_dumps(self, target_id: int) -> list[HtmlDump]:
+        """Get the pages dumped for a target, newest first."""
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT target_id, sku, timestamp, digest FROM dumps WHERE target_id = ? ORDER BY id DESC",
+                (target_id,),
+            ).fetchall()
+        connection.close()
+        return [HtmlDump(target_id, sku, datetime.fromisoformat(timestamp), digest) for target_id, sku, timestamp, digest in rows]
+
+    def read_page(self, digest: str) -> str:
+        """Get the HTML content of a dumped page.
+
+        Raises:
+            FileNotFoundError: If the page is not in the store, or has been evicted.
+        """
+        return gzip.decompress(self._blob_path(digest).read_bytes()).decode()
+
+
+_store: HtmlDumpStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_dump_store() -> HtmlDumpStore:
+    """Get the process's dump store, created from the settings on first use and closed at exit."""
+    global _store  # noqa: PLW0603
+    with _store_lock:
+        if _store is None:
+            _store = HtmlDumpStore(
+                Path(settings.HTML_DUMP_DIR),
+                max_bytes=settings.HTML_DUMP_MAX_BYTES,
+                max_age=settings.HTML_DUMP_MAX_AGE,
+            )
+            atexit.register(_store.close)
+        return _store
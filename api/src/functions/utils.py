@@ -1,10 +1,19 @@
 """General functions for the app."""
 
 import logging
+import re
 from datetime import datetime, timezone
 from pathlib import Path
 
 
+def utcnow() -> datetime:
+    """Get the current time in UTC without timezone info, as it is stored in SQLite.
+
+    This is different from `datetime.now()`, which returns the local time.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 def write_file(directory: Path, filename: str, content: str) -> Path:
     """Write a file to a directory and return the path to the file."""
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
@@ -15,3 +24,17 @@ def write_file(directory: Path, filename: str, content: str) -> Path:
         msg = f"writing file to '{file.name}'"
         logging.info(msg=msg)
         return file
+
+
+def parse_price(price: str) -> float | None:
+    """Get the amount of a price such as "£1,299.99" or "12,50 €", or None if it has no amount."""
+    digits = re.sub(r"[^\d.,]", "", price)
+    if not re.search(r"\d", digits):
+        return None
+    # a comma followed by two digits at the end is a decimal comma, otherwise commas separate thousands
+    if re.search(r",\d{2}$", digits) and "." not in digits:
+        digits = digits.replace(",", ".")
+    try:
+        return float(digits.replace(",", ""))
+    except ValueError:
+        return None
@@ -27,6 +27,24 @@ class ScrapeDataDoesNotExistMessage(BaseModel):
     detail: str = "Scrape data not found"
 
 
+class InvalidFieldMessage(BaseModel):
+    """Error message for when a requested field does not exist."""
+
+    detail: str = "Invalid field requested"
+
+
+class UnsupportedUploadMessage(BaseModel):
+    """Error message for when an upload is not in a supported format."""
+
+    detail: str = "Upload must be CSV (text/csv) or NDJSON (application/x-ndjson)"
+
+
+class ExportStartedMessage(BaseModel):
+    """Message for when an export of the scrape data has started in the background."""
+
+    detail: str = "Export started"
+
+
 class DatabaseErrorMessage(BaseModel):
     """Error message for when there is a database error."""
 
@@ -0,0 +1,13 @@
+from .dispatcher import Notification, NotificationDispatcher
+from .rules import NotificationRules, PriceState
+from .transport import NotificationRejectedError, PushoverTransport, Transport
+
+__all__ = [
+    "Notification",
+    "NotificationDispatcher",
+    "NotificationRejectedError",
+    "NotificationRules",
+    "PriceState",
+    "PushoverTransport",
+    "Transport",
+]
@@ -0,0 +1,184 @@
+"""Send notifications from a background thread so the scrapers never wait for them."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from .transport import NotificationRejectedError, Transport, truncate
+
+
+class Notification(NamedTuple):
+    """A notification about a target."""
+
+    target_id: int
+    title: str
+    message: str
+
+
+class NotificationDispatcher:
+    """Queue notifications and send them on a background thread.
+
+    A notification for a target that already has one waiting replaces it, so only
+    the latest price of a target is sent. Once `queue_size` targets have a
+    notification waiting any more are dropped. A notification that could not be
+    sent is retried `retries` times, waiting twice as long after each attempt, up
+    to `max_backoff` seconds, unless the transport rejected it.
+
+    With `digest` the notifications are held until `flush()` is called and then
+    sent as a single notification, for example once per scrape run. A digest longer
+    than `max_length` is split into several, each with a line for every target.
+
+    Attributes:
+        transport (Transport): Delivers the notifications.
+        queue_size (int): The number of targets whose notifications can wait to be sent.
+        retries (int): The number of times a notification is retried.
+        backoff (float): How long to wait before the first retry (in seconds).
+        max_backoff (float): The longest to wait before a retry (in seconds).
+        digest (bool): Whether to send the waiting notifications as one when flushed.
+        max_length (int): The longest message of a digest, which is Pushover's limit by default.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        transport: Transport,
+        queue_size: int = 100,
+        retries: int = 3,
+        backoff: float = 1,
+        max_backoff: float = 60,
+        digest: bool = False,
+        max_length: int = 1024,
+    ):
+        """Initialise a new instance of the NotificationDispatcher class, starting the sending thread."""
+        self.transport = transport
+        self.queue_size = queue_size
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.digest = digest
+        self.max_length = max_length
+        self._pending: OrderedDict[int, Notification] = OrderedDict()
+        self._condition = threading.Condition()
+        self._sending = False
+        self._flushing = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._send_pending, daemon=True)
+        self._thread.start()
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(transport={self.transport!r}, digest={self.digest!r})"
+
+    def __enter__(self) -> "NotificationDispatcher":
+        """Return the dispatcher."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Send the waiting notifications and stop the sending thread."""
+        self.close()
+
+    def notify(self, target_id: int, title: str, message: str) -> None:
+        """Queue a notification about a target, replacing any that is still waiting to be sent.
+
+        Args:
+            target_id (int): The id of the target the notification is about.
+            title (str): The title of the notification.
+            message (str): The message of the notification.
+        """
+        with self._condition:
+            if target_id not in self._pending and len(self._pending) >= self.queue_size:
+                msg = f"Dropped the notification '{title}' as {self.queue_size} notifications are waiting"
+                logging.warning(msg=msg)
+                return
+            self._pending[target_id] = Notification(target_id, title, message)
+            self._condition.notify_all()
+
+    def flush(self) -> None:
+        """Wait until the waiting notifications have been sent, sending them as a digest if enabled."""
+        with self._condition:
+            self._flushing = True
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: not self._pending and not self._sending)
+            self._flushing = False
+
+    def close(self) -> None:
+        """Send the waiting notifications and stop the sending thread."""
+        if not self._thread.is_alive():
+            return
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _ready(self) -> bool:
+        return bool(self._pending) and (not self.digest or self._flushing)
+
+    def _send_pending(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed or self._ready())
+                if not self._ready():
+                    return
+                if self.digest:
+                    batch = list(self._pending.values())
+                    self._pending.clear()
+                else:
+                    batch = [self._pending.popitem(last=False)[1]]
+                self._sending = True
+            try:
+                self._send(batch)
+            finally:
+                with self._condition:
+                    self._sending = False
+                    self._condition.notify_all()
+
+    def _messages(self, batch: list[Notification]) -> list[tuple[str, str]]:
+        """Get the title and message of a notification, or of each part of a digest."""
+        if len(batch) == 1:
+            return [(batch[0].title, batch[0].message)]
+
+        parts: list[str] = []
+        for notification in batch:
+            line = truncate(f"{notification.title}: {notification.message}", self.max_length)
+            if parts and len(parts[-1]) + len(line) < self.max_length:
+                parts[-1] += f"\n{line}"
+            else:
+                parts.append(line)
+        title = f"{len(batch)} price updates"
+        if len(parts) == 1:
+            return [(title, parts[0])]
+        return [(f"{title} ({number}/{len(parts)})", part) for number, part in enumerate(parts, start=1)]
+
+    def _send(self, batch: list[Notification]) -> None:
+        """Send a notification, or a digest of several."""
+        for title, message in self._messages(batch):
+            self._send_message(title, message)
+
+    def _send_message(self, title: str, message: str) -> None:
+        """Send a single notification, retrying with backoff."""
+        for attempt in range(self.retries + 1):
+            error = self._try_send(title, message)
+            if error is None:
+                msg = f"Sent notification '{title}'"
+                logging.info(msg=msg)
+                return
+            if isinstance(error, NotificationRejectedError):
+                msg = f"Gave up sending notification '{title}' as it was rejected: {error}"
+                logging.error(msg=msg)
+                return
+            if attempt < self.retries:
+                delay = min(self.backoff * 2**attempt, self.max_backoff)
+                msg = f"Could not send notification '{title}', retrying in {delay}s: {error}"
+                logging.warning(msg=msg)
+                time.sleep(delay)
+        msg = f"Gave up sending notification '{title}' after {self.retries + 1} attempts"
+        logging.error(msg=msg)
+
+    def _try_send(self, title: str, message: str) -> Exception | None:
+        try:
+            self.transport.send(title=title, message=message)
+        except Exception as e:
+            return e
+        return None
@@ -0,0 +1,118 @@
+"""Rules that decide whether a new price is worth a notification."""
+
+import re
+from typing import NamedTuple
+
+_DROP_RULE = re.compile(r"^(drop|below_average)\s*>\s*(\d+(?:\.\d+)?)%$")
+
+
+class PriceState(NamedTuple):
+    """What the rules remember about the prices of a target.
+
+    Attributes:
+        last_price (float): The most recent price.
+        min_price (float): The lowest price.
+        ewma (float): The exponentially weighted moving average of the prices.
+        observations (int): The number of prices seen.
+    """
+
+    last_price: float
+    min_price: float
+    ewma: float
+    observations: int
+
+
+class NotificationRules:
+    """Decide whether a new price is worth a notification, from a few numbers kept for each target.
+
+    Each new price is evaluated against the target's `PriceState` and folded into
+    it in constant time, so the price history is never read. The first price of a
+    target is only recorded.
+
+    Attributes:
+        drop_percent (float | None): Notify when the price drops by more than this
+            percentage since the last price.
+        below_average_percent (float | None): Notify when the price is more than this
+            percentage below the moving average.
+        all_time_low (bool): Notify when the price is lower than any before it.
+        any_change (bool): Notify whenever the price changes.
+        ewma_alpha (float): The weight of a new price in the moving average.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        drop_percent: float | None = None,
+        below_average_percent: float | None = None,
+        all_time_low: bool = False,
+        any_change: bool = False,
+        ewma_alpha: float = 0.3,
+    ):
+        """Initialise a new instance of the NotificationRules class."""
+        self.drop_percent = drop_percent
+        self.below_average_percent = below_average_percent
+        self.all_time_low = all_time_low
+        self.any_change = any_change
+        self.ewma_alpha = ewma_alpha
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return (
+            f"{self.__class__.__name__}(drop_percent={self.drop_percent!r}, "
+            f"below_average_percent={self.below_average_percent!r}, all_time_low={self.all_time_low!r}, "
+            f"any_change={self.any_change!r})"
+        )
+
+    @classmethod
+    def parse(cls, spec: str, ewma_alpha: float = 0.3) -> "NotificationRules":
+        """Create the rules from a comma separated list such as "drop>5%,all_time_low".
+
+        The rules are "drop>N%", "below_average>N%", "all_time_low" and "any_change".
+
+        Raises:
+            ValueError: If a rule is not recognised.
+        """
+        rules = cls(ewma_alpha=ewma_alpha)
+        for rule in filter(None, (part.strip() for part in spec.split(","))):
+            if rule in ("all_time_low", "any_change"):
+                setattr(rules, rule, True)
+            elif match := _DROP_RULE.match(rule):
+                setattr(rules, f"{match[1]}_percent", float(match[2]))
+            else:
+                msg = f"Unknown notification rule {rule!r}"
+                raise ValueError(msg)
+        return rules
+
+    def evaluate(self, state: PriceState | None, price: float) -> tuple[PriceState, list[str]]:
+        """Evaluate a new price of a target.
+
+        Args:
+            state (PriceState | None): The target's state, or None if this is its first price.
+            price (float): The new price.
+
+        Returns:
+            tuple: The target's new state and the reasons to notify, if any.
+        """
+        if state is None:
+            return PriceState(price, price, price, 1), []
+
+        reasons = []
+        if self.any_change and price != state.last_price:
+            reasons.append(f"was {state.last_price:.2f}")
+        if self.drop_percent is not None and state.last_price > 0:
+            drop = (state.last_price - price) / state.last_price * 100
+            if drop > self.drop_percent:
+                reasons.append(f"down {drop:.0f}% from {state.last_price:.2f}")
+        if self.below_average_percent is not None and state.ewma > 0:
+            below = (state.ewma - price) / state.ewma * 100
+            if below > self.below_average_percent:
+                reasons.append(f"{below:.0f}% below the average of {state.ewma:.2f}")
+        if self.all_time_low and price < state.min_price:
+            reasons.append("new all-time low")
+
+        new_state = PriceState(
+            last_price=price,
+            min_price=min(state.min_price, price),
+            ewma=self.ewma_alpha * price + (1 - self.ewma_alpha) * state.ewma,
+            observations=state.observations + 1,
+        )
+        return new_state, reasons
@@ -0,0 +1,85 @@
+"""The transports that deliver notifications."""
+
+from http import HTTPStatus
+from typing import Protocol
+
+import httpx
+
+
+class NotificationRejectedError(Exception):
+    """An exception raised when a notification is rejected, so sending it again would not help."""
+
+
+def truncate(text: str, length: int) -> str:
+    """Shorten a text to at most `length` characters, ending it with an ellipsis if it was cut."""
+    return text if len(text) <= length else f"{text[: length - 1]}…"
+
+
+class Transport(Protocol):
+    """Delivers a notification, raising an exception if it could not be delivered."""
+
+    def send(self, title: str, message: str) -> None:
+        """Deliver a notification."""
+
+
+class PushoverTransport:
+    """Deliver notifications with the Pushover API.
+
+    Unlike `PushoverAPIClient` a request that fails raises an exception, so the
+    dispatcher can retry it, unless Pushover rejected the notification itself. A
+    title or message longer than Pushover allows is cut short.
+
+    Attributes:
+        api_token (str): The Pushover application's API token.
+        user_key (str): The Pushover user key of the recipient.
+        url (str): The messages endpoint, which tests can point at a local server.
+        timeout (float): How long a request can take (in seconds).
+        sound (str): The sound the notifications make.
+    """
+
+    URL = "https://api.pushover.net/1/messages.json"
+    # the longest title and message Pushover accepts
+    MAX_TITLE_LENGTH = 250
+    MAX_MESSAGE_LENGTH = 1024
+
+    def __init__(  # noqa: PLR0913
+        self,
+        api_token: str | None,
+        user_key: str | None,
+        url: str = URL,
+        timeout: float = 10,
+        sound: str = "pushover",
+    ):
+        """Initialise a new instance of the PushoverTransport class."""
+        self.api_token = api_token
+        self.user_key = user_key
+        self.url = url
+        self.timeout = timeout
+        self.sound = sound
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(url={self.url!r})"
+
+    def send(self, title: str, message: str) -> None:
+        """Deliver a notification.
+
+        Raises:
+            NotificationRejectedError: If Pushover rejects the notification, other than for the rate limit.
+            httpx.HTTPError: If the request fails.
+        """
+        response = httpx.post(
+            self.url,
+            data={
+                "token": self.api_token,
+                "user": self.user_key,
+                "title": truncate(title, self.MAX_TITLE_LENGTH),
+                "message": truncate(message, self.MAX_MESSAGE_LENGTH),
+                "sound": self.sound,
+            },
+            timeout=self.timeout,
+        )
+        if response.is_client_error and response.status_code != HTTPStatus.TOO_MANY_REQUESTS:
+            msg = f"Pushover rejected the notification '{title}' ({response.status_code}): {response.text}"
+            raise NotificationRejectedError(msg)
+        response.raise_for_status()
@@ -0,0 +1,43 @@
+from .adaptive import AdaptiveIntervalPolicy
+from .circuit import CircuitBreaker, CircuitOpenError
+from .factories import (
+    create_interval_policy,
+    create_notification_dispatcher,
+    create_notification_rules,
+    create_scrape_job,
+)
+from .job import (
+    ContentHashes,
+    TargetSnapshot,
+    save_result,
+    scrape_target,
+    scrape_target_by_id,
+    site_timeouts,
+)
+from .pipeline import DeadlineExceededError, PipelineItem, ScrapePipeline
+from .run import scrape_all
+from .scheduler import ScrapeScheduler
+from .worker import LeaseWorker, default_worker_id
+
+__all__ = [
+    "AdaptiveIntervalPolicy",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "create_interval_policy",
+    "create_notification_dispatcher",
+    "create_notification_rules",
+    "create_scrape_job",
+    "ContentHashes",
+    "TargetSnapshot",
+    "save_result",
+    "scrape_target",
+    "scrape_target_by_id",
+    "site_timeouts",
+    "scrape_all",
+    "DeadlineExceededError",
+    "PipelineItem",
+    "ScrapePipeline",
+    "ScrapeScheduler",
+    "LeaseWorker",
+    "default_worker_id",
+]
@@ -0,0 +1,52 @@
+"""Adapt how often a target is scraped to how often its price changes."""
+
+
+class AdaptiveIntervalPolicy:
+    """Lengthen a target's scrape interval while its price is stable and shorten it when it moves.
+
+    A target is never scraped more often than its own `scrape_interval` or the
+    `min_interval`, whichever is shorter, so a price that keeps moving does not make
+    a daily target scraped every minute.
+
+    Attributes:
+        min_interval (int): The shortest interval a target can be scraped at, unless its
+            own scrape interval is shorter (in seconds).
+        max_interval (int): The longest interval a target can be scraped at (in seconds).
+        growth (float): The factor the interval is multiplied by when the price is unchanged.
+        shrink (float): The factor the interval is multiplied by when the price changes.
+    """
+
+    def __init__(
+        self,
+        min_interval: int,
+        max_interval: int,
+        growth: float,
+        shrink: float,
+    ):
+        """Initialise a new instance of the AdaptiveIntervalPolicy class."""
+        if min_interval > max_interval:
+            msg = f"min_interval ({min_interval}) must not be greater than max_interval ({max_interval})"
+            raise ValueError(msg)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.growth = growth
+        self.shrink = shrink
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(min_interval={self.min_interval!r}, max_interval={self.max_interval!r}, growth={self.growth!r}, shrink={self.shrink!r})"
+
+    def next_interval(self, interval: int, scrape_interval: int, price_changed: bool) -> int:
+        """Get the interval to use after a scrape that found the price changed or unchanged.
+
+        Args:
+            interval (int): The target's current interval (in seconds).
+            scrape_interval (int): The interval the target is configured with (in seconds).
+            price_changed (bool): Whether the scrape found the price changed.
+
+        Returns:
+            int: The target's next interval (in seconds).
+        """
+        factor = self.shrink if price_changed else self.growth
+        min_interval = min(scrape_interval, self.min_interval)
+        return round(min(max(interval * factor, min_interval), self.max_interval))
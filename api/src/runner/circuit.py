@@ -0,0 +1,160 @@
+"""A circuit breaker for each site, to stop scraping sites that are blocking the scraper."""
+
+import logging
+import threading
+from datetime import timedelta
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from src.database import crud
+from src.database.models import SiteCircuit
+from src.functions.utils import utcnow
+from src.scraper import ScraperError
+
+
+class CircuitOpenError(ScraperError):
+    """An exception raised when a target is skipped because its site's circuit is open."""
+
+
+
+class CircuitBreaker:
+    """Skip the targets of sites that keep failing, for example because they return captcha pages.
+
+    A site's circuit opens when `failure_count` scrapes in a row have failed, or when
+    at least `failure_rate` of its last `window` scrapes have failed (once there have
+    been `min_attempts` since it last closed), so old failures stop counting against
+    a site that has recovered. While it is open the site's targets are skipped. Once
+    the cool-down has passed the circuit is half open: a single target is scraped as a
+    probe, and the circuit closes if it succeeds or opens again for twice as long if it
+    fails, up to `max_cooldown`. Only the probe's result decides, so the results of
+    targets that were already being scraped when the circuit opened are ignored.
+
+    The state is saved in the database after every change, so the next run starts
+    where this one left off. The breaker can be used from several threads, as the
+    pipeline checks it while fetching and records the outcomes while saving.
+
+    Attributes:
+        session_factory (Callable): Creates the database sessions used to save the state.
+        failure_count (int): The number of failures in a row that open a circuit.
+        failure_rate (float): The share of failed scrapes that opens a circuit.
+        min_attempts (int): The number of scrapes before the failure rate is considered.
+        window (int): The number of recent scrapes the failure rate is taken over.
+        cooldown (float): How long a circuit first stays open (in seconds).
+        max_cooldown (float): The longest a circuit stays open (in seconds).
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        session_factory: Callable[[], Session],
+        failure_count: int,
+        failure_rate: float,
+        min_attempts: int,
+        window: int,
+        cooldown: float,
+        max_cooldown: float,
+    ):
+        """Initialise a new instance of the CircuitBreaker class, loading the saved state."""
+        self.session_factory = session_factory
+        self.failure_count = failure_count
+        self.failure_rate = failure_rate
+        self.min_attempts = min_attempts
+        self.window = window
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        # the id of the target each half open circuit is probing with
+        self._probing: dict[str, int] = {}
+        self._lock = threading.Lock()
+        with session_factory() as session:
+            self._circuits = {circuit.site: circuit for circuit in crud.read_site_circuits(session)}
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(failure_count={self.failure_count!r}, failure_rate={self.failure_rate!r})"
+
+    def _circuit(self, site: str) -> SiteCircuit:
+        if site not in self._circuits:
+            self._circuits[site] = SiteCircuit(
+                site=site,
+                state="closed",
+                consecutive_failures=0,
+                failures=0,
+                attempts=0,
+                recent_results="",
+            )
+        return self._circuits[site]
+
+    def _save(self, circuit: SiteCircuit) -> None:
+        with self.session_factory() as session:
+            crud.save_site_circuit(session, circuit)
+
+    def state(self, site: str) -> str:
+        """Get the state of a site's circuit: "closed", "open" or "half_open"."""
+        return self._circuit(site).state
+
+    def allow(self, site: str, target_id: int) -> bool:
+        """Check whether a target of the site should be scraped.
+
+        Once the cool-down of an open circuit has passed this lets one probe through.
+        """
+        with self._lock:
+            return self._allow(site, target_id)
+
+    def _allow(self, site: str, target_id: int) -> bool:
+        circuit = self._circuit(site)
+        if circuit.state == "open" and circuit.open_until is not None and circuit.open_until <= utcnow():
+            circuit.state = "half_open"
+            self._save(circuit)
+        if circuit.state == "half_open" and site not in self._probing:
+            self._probing[site] = target_id
+            return True
+        return circuit.state == "closed"
+
+    def record(self, site: str, target_id: int, success: bool) -> None:
+        """Record whether a target of the site was scraped, opening or closing its circuit."""
+        with self._lock:
+            self._record(site, target_id, success)
+
+    def _record(self, site: str, target_id: int, success: bool) -> None:
+        circuit = self._circuit(site)
+        probe = self._probing.get(site) == target_id
+        if probe:
+            del self._probing[site]
+        elif circuit.state != "closed":
+            # only the probe decides whether an open circuit closes
+            return
+
+        if success:
+            if probe:
+                msg = f"Closing the circuit for '{site}'"
+                logging.info(msg=msg)
+                circuit.state = "closed"
+                circuit.cooldown = None
+                circuit.open_until = None
+                circuit.recent_results = ""
+            circuit.consecutive_failures = 0
+        else:
+            circuit.consecutive_failures += 1
+        # keep the outcomes of the last `window` scrapes only
+        circuit.recent_results = (circuit.recent_results + ("0" if success else "1"))[-self.window :]
+        circuit.failures = circuit.recent_results.count("1")
+        circuit.attempts = len(circuit.recent_results)
+        if not success and (probe or self._should_open(circuit)):
+            self._open(circuit)
+        self._save(circuit)
+
+    def _should_open(self, circuit: SiteCircuit) -> bool:
+        if circuit.state != "closed":
+            return False
+        if circuit.consecutive_failures >= self.failure_count:
+            return True
+        return circuit.attempts >= self.min_attempts and circuit.failures / circuit.attempts >= self.failure_rate
+
+    def _open(self, circuit: SiteCircuit) -> None:
+        # double the cool-down each time a probe fails
+        cooldown = self.cooldown if circuit.cooldown is None else circuit.cooldown * 2
+        circuit.cooldown = int(min(cooldown, self.max_cooldown))
+        circuit.state = "open"
+        circuit.open_until = utcnow() + timedelta(seconds=circuit.cooldown)
+        msg = f"Opening the circuit for '{circuit.site}' until {circuit.open_until}"
+        logging.warning(msg=msg)
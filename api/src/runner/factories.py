@@ -0,0 +1,75 @@
+"""Create the notification and scheduling objects the run scripts share from the settings."""
+
+import functools
+from typing import Callable
+
+from src import settings
+from src.notifications import (
+    NotificationDispatcher,
+    NotificationRules,
+    PushoverTransport,
+)
+
+from .adaptive import AdaptiveIntervalPolicy
+from .job import scrape_target_by_id
+
+
+def create_notification_dispatcher(digest: bool = False) -> NotificationDispatcher:
+    """Create a dispatcher that sends notifications with Pushover.
+
+    Args:
+        digest (bool): Whether to send the notifications as one when flushed.
+
+    Returns:
+        NotificationDispatcher: The dispatcher, with its sending thread started.
+    """
+    return NotificationDispatcher(
+        PushoverTransport(
+            api_token=settings.NOTIFICATION_TOKEN,
+            user_key=settings.NOTIFICATION_USER_KEY,
+        ),
+        queue_size=settings.NOTIFICATION_QUEUE_SIZE,
+        retries=settings.NOTIFICATION_RETRIES,
+        backoff=settings.NOTIFICATION_BACKOFF,
+        digest=digest,
+    )
+
+
+def create_interval_policy() -> AdaptiveIntervalPolicy | None:
+    """Create the policy that adapts the scrape intervals, or None if it is disabled."""
+    if not settings.ADAPTIVE_INTERVALS:
+        return None
+    return AdaptiveIntervalPolicy(
+        min_interval=settings.ADAPTIVE_MIN_INTERVAL,
+        max_interval=settings.ADAPTIVE_MAX_INTERVAL,
+        growth=settings.ADAPTIVE_GROWTH,
+        shrink=settings.ADAPTIVE_SHRINK,
+    )
+
+
+def create_notification_rules() -> NotificationRules | None:
+    """Create the notification rules, or None if every price is notified.
+
+    Raises:
+        ValueError: If a rule is not recognised.
+    """
+    if not settings.NOTIFICATION_RULES:
+        return None
+    return NotificationRules.parse(settings.NOTIFICATION_RULES, ewma_alpha=settings.NOTIFICATION_EWMA_ALPHA)
+
+
+def create_scrape_job(notification: NotificationDispatcher) -> Callable[[int], bool]:
+    """Create the job that scrapes a target by its id, for the scheduler and the lease workers.
+
+    Args:
+        notification (NotificationDispatcher): Sends the notifications of the scraped targets.
+
+    Returns:
+        Callable: Scrapes the target with the given id, returning whether it was found.
+    """
+    return functools.partial(
+        scrape_target_by_id,
+        notification=notification,
+        interval_policy=create_interval_policy(),
+        rules=create_notification_rules(),
+    )
@@ -0,0 +1,229 @@
+"""Scrape a single target and save the result to the database."""
+
+import logging
+from datetime import datetime
+from typing import Callable, NamedTuple
+
+from sqlalchemy.orm import Session
+
+from src import settings
+from src.database import crud, engine
+from src.database.models import NotificationState, ScrapeTargets
+from src.functions.html_dumps import get_dump_store
+from src.functions.utils import parse_price, utcnow
+from src.notifications import NotificationDispatcher, NotificationRules, PriceState
+from src.scraper import BaseScraper, ScrapeTimeoutError, Timeouts, get_scraper
+
+from .adaptive import AdaptiveIntervalPolicy
+
+
+class TargetSnapshot(NamedTuple):
+    """The fields of a scraping target needed to scrape it, detached from any database session."""
+
+    id: int  # noqa: A003
+    site: str
+    sku: str
+    send_notification: bool
+    scrape_interval: int
+    current_interval: int | None
+    page_hash: str | None = None
+    content_hash: str | None = None
+
+    @classmethod
+    def from_target(cls, target: ScrapeTargets) -> "TargetSnapshot":
+        """Take a snapshot of a scraping target."""
+        return cls(
+            id=target.id,
+            site=target.site,
+            sku=target.sku,
+            send_notification=target.send_notification,
+            scrape_interval=target.scrape_interval,
+            current_interval=target.current_interval,
+            page_hash=target.page_hash,
+            content_hash=target.content_hash,
+        )
+
+
+class ContentHashes(NamedTuple):
+    """The hashes of a scraped page and of the price and title found on it.
+
+    Attributes:
+        page (str): The hash of the page's HTML content.
+        content (str | None): The hash of the price and title.
+    """
+
+    page: str
+    content: str | None
+
+
+def site_timeouts(site: str) -> Timeouts:
+    """Get the timeouts of a site from the settings."""
+    return Timeouts(**settings.get_site_timeouts(site))
+
+
+def _evaluate_rules(
+    session: Session,
+    rules: NotificationRules,
+    target_id: int,
+    price: str,
+    timestamp: datetime,
+) -> tuple[list[str] | None, NotificationState | None]:
+    """Evaluate a new price against the notification rules, before the price is saved.
+
+    The lowest price is read from the target's statistics, which the new price has
+    not been folded into yet.
+
+    Returns:
+        tuple: The reasons to notify, or None if the price has no amount to evaluate,
+        and the target's new state to save with the price.
+    """
+    amount = parse_price(price)
+    if amount is None:
+        return None, None
+    previous = crud.read_notification_state(session, target_id)
+    state = None
+    if previous is not None:
+        stats = crud.read_target_stats(session, target_id)
+        min_price = previous.last_price if stats is None or stats.min_price is None else stats.min_price
+        state = PriceState(previous.last_price, min_price, previous.ewma, previous.observations)
+    state, reasons = rules.evaluate(state, amount)
+    new_state = NotificationState(
+        scrape_target_id=target_id,
+        last_price=state.last_price,
+        ewma=state.ewma,
+        observations=state.observations,
+        updated=timestamp,
+    )
+    return reasons, new_state
+
+
+def save_result(  # noqa: PLR0913
+    session_factory: Callable[[], Session],
+    product: TargetSnapshot,
+    scraper: BaseScraper,
+    found: bool,
+    notification: NotificationDispatcher,
+    interval_policy: AdaptiveIntervalPolicy | None = None,
+    hashes: ContentHashes | None = None,
+    rules: NotificationRules | None = None,
+) -> bool:
+    """Save the result of a scraper that has run and send a notification if needed.
+
+    The scraped data is saved in a brief session of its own so the database is
+    never locked for longer than the write.
+
+    If an `interval_policy` is given the target's current interval is adapted to
+    whether its price has changed since the last scrape. The `hashes` of the page,
+    if given, are saved on the target so that an unchanged page can be skipped.
+
+    If `rules` are given a notification is only sent when the new price meets one
+    of them (or has no amount to evaluate), otherwise it is sent for every price.
+
+    Returns:
+        bool: True if the price and title were found, otherwise False.
+    """
+    if not found:
+        msg = f"Could not find price and title for '{product.sku}'"
+        logging.warning(msg=msg)
+        # error getting data so we save the raw html for debugging
+        get_dump_store().dump(product.id, product.sku, str(scraper.get_html()))
+        return False
+
+    # a field found with a fallback means its preferred selector has likely stopped working
+    for field, source in (scraper.fallbacks or {}).items():
+        msg = f"Found the {field} of '{product.sku}' with fallback '{source}', its preferred selector may be broken"
+        logging.warning(msg=msg)
+
+    price = scraper.get_price()
+    title = scraper.get_title()
+    timestamp = utcnow()
+
+    # save data to database and send notification if needed
+    reasons, state = None, None
+    with session_factory() as session:
+        if interval_policy is not None:
+            target = crud.read_target(session, product.id)
+            if target is not None:
+                previous_price = crud.read_latest_price(session, product.id)
+                interval = product.current_interval or product.scrape_interval
+                target.current_interval = interval_policy.next_interval(
+                    interval,
+                    product.scrape_interval,
+                    price_changed=previous_price is not None and previous_price != price,
+                )
+        if rules is not None:
+            reasons, state = _evaluate_rules(session, rules, product.id, price, timestamp)
+        crud.create_scrape_data(
+            session,
+            product.id,
+            price=price,
+            title=title,
+            timestamp=timestamp,
+            page_hash=None if hashes is None else hashes.page,
+            content_hash=None if hashes is None else hashes.content,
+            notification_state=state,
+        )
+
+    if product.send_notification and reasons != []:
+        message = f"{price} ({', '.join(reasons)})" if reasons else price
+        notification.notify(product.id, title=title, message=message)
+        msg = f"Queued notification for '{product.sku}'"
+        logging.info(msg=msg)
+    return True
+
+
+def scrape_target(
+    session_factory: Callable[[], Session],
+    product: TargetSnapshot,
+    notification: NotificationDispatcher,
+    interval_policy: AdaptiveIntervalPolicy | None = None,
+    rules: NotificationRules | None = None,
+) -> bool:
+    """Scrape a target, save the scraped data and send a notification if needed.
+
+    No database session is open while the target is scraped. A stage of scraping
+    that times out is recorded against the target.
+
+    Returns:
+        bool: True if the price and title were found, otherwise False.
+    Raises:
+        ScraperError: If an error occurs while scraping.
+    """
+    msg = f"Getting data for '{product.sku}'"
+    logging.info(msg=msg)
+    scraper = get_scraper(
+        site=product.site,
+        product_id=product.sku,
+        timeouts=site_timeouts(product.site),
+    )
+    try:
+        found = scraper.run()
+    except ScrapeTimeoutError as e:
+        with session_factory() as session:
+            crud.create_scrape_timeout(session, product.id, e.stage, e.seconds)
+        raise
+    return save_result(session_factory, product, scraper, found, notification, interval_policy, rules=rules)
+
+
+def scrape_target_by_id(
+    target_id: int,
+    notification: NotificationDispatcher,
+    interval_policy: AdaptiveIntervalPolicy | None = None,
+    rules: NotificationRules | None = None,
+) -> bool:
+    """Scrape a target, reading it in a brief database session of its own.
+
+    Returns:
+        bool: True if the price and title were found, otherwise False (including
+        when the target no longer exists).
+    Raises:
+        ScraperError: If an error occurs while scraping.
+    """
+    with Session(engine) as session:
+        target = crud.read_target(session, target_id)
+        if target is None:
+            msg = f"Target with id {target_id} no longer exists"
+            logging.info(msg=msg)
+            return False
+        product = TargetSnapshot.from_target(target)
+    return scrape_target(lambda: Session(engine), product, notification, interval_policy, rules)
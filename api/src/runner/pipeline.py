@@ -0,0 +1,323 @@
+"""Scrape targets in a pipeline of fetch, parse and persist stages."""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Awaitable, Callable, Iterable, NamedTuple, TypeVar
+
+from src.scraper import (
+    BaseScraper,
+    BrowserPool,
+    HostRateLimiter,
+    ScraperError,
+    ScrapeTimeoutError,
+    Timeouts,
+    get_scraper,
+)
+
+from .circuit import CircuitBreaker, CircuitOpenError
+from .job import ContentHashes, TargetSnapshot, site_timeouts
+
+T = TypeVar("T")
+
+
+class DeadlineExceededError(ScraperError):
+    """An exception raised when a target is deferred because the run's deadline has passed."""
+
+
+class PipelineItem(NamedTuple):
+    """A target passing through the pipeline.
+
+    Attributes:
+        product (TargetSnapshot): The target being scraped.
+        scraper (BaseScraper | None): The target's scraper, or None if it could not be created.
+        html (str | None): The fetched page, from when it has been fetched until it has been parsed.
+        found (bool): Whether the price and title were found, once the page has been parsed.
+        error (ScraperError | None): The error that stopped the target from being scraped.
+        hashes (ContentHashes | None): The hashes of the page and its content, if they were hashed.
+        unchanged (bool): Whether the page or its content is the same as at the last scrape.
+    """
+
+    product: TargetSnapshot
+    scraper: BaseScraper | None = None
+    html: str | None = None
+    found: bool = False
+    error: ScraperError | None = None
+    hashes: ContentHashes | None = None
+    unchanged: bool = False
+
+
+class ScrapePipeline:
+    """Scrape targets in three stages connected by bounded queues.
+
+    Pages are fetched in threads so several fetches overlap, parsed in the executor
+    (a process pool spreads the parsing across cores) and persisted one at a time
+    in a thread of their own, so the database writes never block the event loop. Each queue holds at most `queue_size` items, so a slow stage
+    holds back the stages before it instead of letting pages pile up in memory.
+
+    With more than one fetch worker the next pages are already loading (in the
+    shared `browser`, for the scrapers that use one) while a page is parsed and
+    saved, within the `rate_limiter`'s limit for each host.
+
+    Targets whose site's circuit is open in the `breaker` are skipped without
+    being fetched, and the outcome of every other target is recorded in it.
+
+    Targets whose scrapers share a page key (such as two `amz-g` targets with the
+    same search) fetch the page once and each extract their own data from it.
+
+    If `unchanged` is given every page is hashed, and a page that is the same as
+    at the target's last scrape is not parsed. A page whose price and title are
+    the same is not persisted either: both are passed to `unchanged` instead.
+
+    Every stage has a timeout for each site, and once the `deadline` has passed no
+    more targets are fetched: the rest are reported as deferred.
+
+    Attributes:
+        persist (Callable): Saves a parsed target, given the target, its scraper, whether
+            the price and title were found and the hashes of the page, if it was hashed.
+        on_error (Callable): Called with the target and the error when a target could not be scraped.
+        executor (Executor): Runs the scrapers' `extract()` methods.
+        fetch_workers (int): The number of pages fetched at the same time.
+        parse_workers (int): The number of pages parsed at the same time.
+        queue_size (int): The number of items each queue holds.
+        rate_limiter (HostRateLimiter | None): Spaces out the requests to each host.
+        browser (BrowserPool | None): The browser shared by the scrapers that use one.
+        breaker (CircuitBreaker | None): Skips the targets of sites that keep failing.
+        timeouts (Callable): Gets the timeouts of a site.
+        deadline (float | None): The `time.monotonic()` time after which no more targets are fetched.
+        unchanged (Callable | None): Called with the target and the hashes of its page when
+            the page is unchanged, otherwise pages are not hashed.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        persist: Callable[[TargetSnapshot, BaseScraper, bool, ContentHashes | None], None],
+        on_error: Callable[[TargetSnapshot, ScraperError], None],
+        executor: Executor,
+        fetch_workers: int,
+        parse_workers: int,
+        queue_size: int,
+        rate_limiter: HostRateLimiter | None = None,
+        browser: BrowserPool | None = None,
+        breaker: CircuitBreaker | None = None,
+        timeouts: Callable[[str], Timeouts] = site_timeouts,
+        deadline: float | None = None,
+        unchanged: Callable[[TargetSnapshot, ContentHashes], None] | None = None,
+    ):
+        """Initialise a new instance of the ScrapePipeline class."""
+        self.persist = persist
+        self.on_error = on_error
+        self.executor = executor
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.rate_limiter = rate_limiter
+        self.browser = browser
+        self.breaker = breaker
+        self.timeouts = timeouts
+        self.deadline = deadline
+        self.unchanged = unchanged
+        self._pages: dict[str, asyncio.Future[str]] = {}
+        self._page_users: Counter[str] = Counter()
+
+    def _past_deadline(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(fetch_workers={self.fetch_workers!r}, parse_workers={self.parse_workers!r})"
+
+    def _create_scraper(self, product: TargetSnapshot) -> PipelineItem:
+        """Create the scraper of a target."""
+        try:
+            scraper = get_scraper(
+                site=product.site,
+                product_id=product.sku,
+                browser=self.browser,
+                timeouts=self.timeouts(product.site),
+            )
+        except Exception as e:
+            return PipelineItem(product, error=ScraperError(str(e)))
+        return PipelineItem(product, scraper)
+
+    async def _fetch_page(self, scraper: BaseScraper) -> str:
+        """Fetch a page in a thread, or wait for the page if another target is already fetching it.
+
+        Raises:
+            ScraperError: If the page could not be fetched.
+        """
+        key = scraper.page_key()
+        page = self._pages.get(key)
+        if page is None:
+            page = self._pages[key] = asyncio.get_running_loop().create_future()
+            if self.rate_limiter is not None:
+                # space out the requests to each site to avoid getting blocked
+                await asyncio.sleep(self.rate_limiter.reserve(scraper.URL))
+            try:
+                page.set_result(await asyncio.to_thread(scraper.fetch))
+            except ScraperError as e:
+                page.set_exception(e)
+            except Exception as e:
+                msg = f"{scraper!r}: {e}"
+                page.set_exception(ScraperError(msg))
+        else:
+            msg = f"Reusing the page fetched for {key}"
+            logging.info(msg=msg)
+
+        try:
+            return await page
+        finally:
+            self._release_page(key)
+
+    def _release_page(self, key: str) -> None:
+        """Forget a page once every target that shares it has it or will not fetch it."""
+        self._page_users[key] -= 1
+        if self._page_users[key] <= 0:
+            del self._page_users[key]
+            self._pages.pop(key, None)
+
+    async def _fetch(self, item: PipelineItem) -> PipelineItem:
+        """Fetch the page of a target."""
+        product, scraper = item.product, item.scraper
+        if scraper is None:
+            return item
+        error: ScraperError | None = item.error
+        if error is None and self._past_deadline():
+            msg = f"Deferring '{product.sku}' as the run's deadline has passed"
+            error = DeadlineExceededError(msg)
+        elif error is None and self.breaker is not None and not self.breaker.allow(product.site, product.id):
+            msg = f"Skipping '{product.sku}' as the circuit for '{product.site}' is open"
+            error = CircuitOpenError(msg)
+        if error is not None:
+            # the target will not fetch its page, so it no longer keeps it for the others
+            self._release_page(scraper.page_key())
+            return PipelineItem(product, error=error)
+
+        msg = f"Getting data for '{product.sku}'"
+        logging.info(msg=msg)
+        try:
+            html = await self._fetch_page(scraper)
+        except ScraperError as e:
+            return item._replace(error=e)
+        return item._replace(html=html)
+
+    async def _parse(self, item: PipelineItem) -> PipelineItem:
+        """Extract the price and title from a fetched page in the executor."""
+        if item.error is not None or item.scraper is None or item.html is None:
+            return item
+
+        # the page is only passed on by the scraper if it is needed for debugging
+        product, scraper, html = item.product, item.scraper, item.html
+        item = item._replace(html=None)
+        page_hash = None
+        if self.unchanged is not None:
+            page_hash = scraper.page_hash(html)
+            # only pages the price and title were found on are hashed, so there is nothing to parse
+            if page_hash == product.page_hash:
+                return item._replace(found=True, hashes=ContentHashes(page_hash, product.content_hash), unchanged=True)
+
+        loop = asyncio.get_running_loop()
+        seconds = scraper.timeouts.parse
+        try:
+            extraction = await asyncio.wait_for(
+                loop.run_in_executor(self.executor, scraper.extract, html),
+                timeout=seconds,
+            )
+            found = scraper.load(html, extraction)
+        except asyncio.TimeoutError:  # not the builtin TimeoutError before Python 3.11
+            error = ScrapeTimeoutError(stage="parse", seconds=seconds, url=scraper.URL)
+            return item._replace(error=error)
+        except Exception as e:
+            msg = f"{scraper!r}: {e}"
+            return item._replace(error=ScraperError(msg))
+        if page_hash is None or not found:
+            return item._replace(found=found)
+        hashes = ContentHashes(page_hash, extraction.digest())
+        return item._replace(found=found, hashes=hashes, unchanged=hashes.content == product.content_hash)
+
+    def _persist(self, item: PipelineItem) -> None:
+        """Save a parsed target, or report why it could not be scraped."""
+        skipped = isinstance(item.error, (CircuitOpenError, DeadlineExceededError))
+        if self.breaker is not None and not skipped:
+            self.breaker.record(item.product.site, item.product.id, success=item.error is None and item.found)
+
+        if item.unchanged and self.unchanged is not None and item.hashes is not None:
+            msg = f"'{item.product.sku}' is unchanged since its last scrape"
+            logging.info(msg=msg)
+            try:
+                self.unchanged(item.product, item.hashes)
+            except Exception as e:
+                msg = f"Unexpected error saving '{item.product.sku}': {e}"
+                logging.exception(msg=msg)
+                self.on_error(item.product, ScraperError(msg))
+            return
+
+        if item.error is None and item.scraper is not None:
+            try:
+                self.persist(item.product, item.scraper, item.found, item.hashes)
+            except Exception as e:
+                msg = f"Unexpected error saving '{item.product.sku}': {e}"
+                logging.exception(msg=msg)
+                self.on_error(item.product, ScraperError(msg))
+            return
+
+        error = item.error or ScraperError(f"Could not scrape '{item.product.sku}'")
+        if skipped:
+            logging.info(msg=str(error))
+        else:
+            msg = f"Scraper failure: {error}"
+            logging.error(msg=msg)
+        self.on_error(item.product, error)
+
+    async def _worker(
+        self,
+        inbox: asyncio.Queue[T | None],
+        outbox: asyncio.Queue[PipelineItem | None],
+        stage: Callable[[T], Awaitable[PipelineItem]],
+    ) -> None:
+        """Move items from one queue to the next through a stage until a None is received."""
+        while (item := await inbox.get()) is not None:
+            await outbox.put(await stage(item))
+
+    async def run(self, products: Iterable[TargetSnapshot]) -> None:
+        """Scrape the targets, returning once every target has been persisted."""
+        items = [self._create_scraper(product) for product in products]
+        # targets that share a page (such as the same search) fetch it once
+        self._pages = {}
+        self._page_users = Counter(item.scraper.page_key() for item in items if item.scraper is not None)
+
+        fetch_queue: asyncio.Queue[PipelineItem | None] = asyncio.Queue(self.queue_size)
+        parse_queue: asyncio.Queue[PipelineItem | None] = asyncio.Queue(self.queue_size)
+        persist_queue: asyncio.Queue[PipelineItem | None] = asyncio.Queue(self.queue_size)
+
+        loop = asyncio.get_running_loop()
+        # the targets are saved one at a time, in a thread so the event loop keeps fetching
+        with ThreadPoolExecutor(max_workers=1) as saver:
+
+            async def persister() -> None:
+                while (item := await persist_queue.get()) is not None:
+                    await loop.run_in_executor(saver, self._persist, item)
+
+            fetchers = [
+                asyncio.create_task(self._worker(fetch_queue, parse_queue, self._fetch))
+                for _ in range(self.fetch_workers)
+            ]
+            parsers = [
+                asyncio.create_task(self._worker(parse_queue, persist_queue, self._parse))
+                for _ in range(self.parse_workers)
+            ]
+            persist_task = asyncio.create_task(persister())
+
+            # every stage is told to stop once the stage before it has finished
+            for item in items:
+                await fetch_queue.put(item)
+            for _ in fetchers:
+                await fetch_queue.put(None)
+            await asyncio.gather(*fetchers)
+            for _ in parsers:
+                await parse_queue.put(None)
+            await asyncio.gather(*parsers)
+            await persist_queue.put(None)
+            await persist_task
@@ -0,0 +1,190 @@
+"""Scrape every target in a resumable scrape run."""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from src.database import crud
+from src.functions.utils import utcnow
+from src.notifications import NotificationDispatcher, NotificationRules
+from src.scraper import (
+    BaseScraper,
+    BrowserPool,
+    HostRateLimiter,
+    ScraperError,
+    ScrapeTimeoutError,
+)
+
+from .circuit import CircuitBreaker, CircuitOpenError
+from .job import ContentHashes, TargetSnapshot, save_result
+from .pipeline import DeadlineExceededError, ScrapePipeline
+
+UNCHANGED_MODES = ("off", "skip", "count")
+
+
+def _since(seconds: float) -> datetime | None:
+    """Get the time this many seconds ago, or None if the number of seconds is 0."""
+    if not seconds:
+        return None
+    now = utcnow()
+    return now - timedelta(seconds=seconds)
+
+
+def _check_unchanged_mode(unchanged: str) -> None:
+    """Check what to do with unchanged targets is one of the `UNCHANGED_MODES`.
+
+    Raises:
+        ValueError: If it is not.
+    """
+    if unchanged not in UNCHANGED_MODES:
+        msg = f"Unknown unchanged mode {unchanged!r}, expected one of {UNCHANGED_MODES}"
+        raise ValueError(msg)
+
+
+def scrape_all(  # noqa: PLR0913
+    session_factory: Callable[[], Session],
+    notification: NotificationDispatcher,
+    freshness_window: float = 0,
+    host_interval: float = 1,
+    prefetch_depth: int = 0,
+    parse_workers: int | None = None,
+    queue_size: int = 4,
+    executor: Executor | None = None,
+    breaker: CircuitBreaker | None = None,
+    deadline: float = 0,
+    unchanged: str = "off",
+    browser_state_dir: Path | None = None,
+    rules: NotificationRules | None = None,
+    max_run_age: float = 0,
+) -> int:
+    """Scrape every target, resuming the previous run if it was interrupted.
+
+    The targets left to scrape are read into snapshots up front and every write
+    happens in a brief session of its own, so no database connection is held
+    while the targets are scraped. The status of each target is recorded as it
+    is saved, so a restarted run skips the targets that were already scraped
+    before it was interrupted. A run started more than `max_run_age` seconds ago
+    is not resumed, so a run that crashed or keeps passing its `deadline` does not
+    hold back the targets it already scraped once they are due again.
+
+    The targets are scraped in a `ScrapePipeline`, with the pages parsed in a
+    process pool unless another `executor` is given. The browser scrapers share
+    one browser, in which the next `prefetch_depth` pages load while a page is
+    parsed and saved. The targets of sites whose circuit is open in the `breaker`
+    are skipped. Stages that time out are recorded against their target, and
+    once the `deadline` has passed the remaining targets are left for the next
+    run to resume.
+
+    Unless `unchanged` is "off" the pages are hashed, and a target whose page, or
+    price and title, are the same as at its last scrape is recorded as unchanged
+    without saving new scrape data or sending a notification, only the time it was
+    scraped. With "count" the unchanged observation is also counted on the target
+    and in its statistics.
+
+    The notifications are queued as the targets are saved and flushed once the
+    run is over, so a dispatcher that sends digests sends one for the run. With
+    `rules` only the prices that meet one of them are notified.
+
+    Args:
+        session_factory (Callable): Creates the database sessions.
+        notification (NotificationDispatcher): Queues the price notifications.
+        freshness_window (float): Skip targets scraped within this many seconds.
+        host_interval (float): The minimum time between requests to the same site (in seconds).
+        prefetch_depth (int): The number of pages that load ahead of the page being parsed.
+        parse_workers (int | None): The number of pages parsed at the same time,
+            defaults to the number of CPU cores.
+        queue_size (int): The number of pages held between the pipeline's stages.
+        executor (Executor | None): Runs the parsing instead of a new process pool.
+        breaker (CircuitBreaker | None): Skips the targets of sites that keep failing.
+        deadline (float): Stop starting new targets after this many seconds (0 never stops).
+        unchanged (str): What to do with unchanged targets: "off", "skip" or "count".
+        browser_state_dir (Path | None): Where the browser saves the sites' consent state between runs.
+        rules (NotificationRules | None): Decide which new prices are notified, otherwise every price is.
+        max_run_age (float): Start a new run instead of resuming one started more than this
+            many seconds ago (0 resumes a run of any age).
+
+    Returns:
+        int: The number of targets that were scraped in this invocation.
+    Raises:
+        ValueError: If `unchanged` is not one of "off", "skip" or "count".
+    """
+    _check_unchanged_mode(unchanged)
+    run_deadline = time.monotonic() + deadline if deadline else None
+    fresh_since = _since(freshness_window)
+
+    with session_factory() as session:
+        scrape_run_id = crud.start_scrape_run(session, _since(max_run_age)).id
+        products = [
+            TargetSnapshot.from_target(target)
+            for target in crud.read_pending_targets(session, scrape_run_id, fresh_since)
+        ]
+
+    msg = f"Scrape run {scrape_run_id} has {len(products)} targets left"
+    logging.info(msg=msg)
+
+    def record(product: TargetSnapshot, status: str) -> None:
+        with session_factory() as session:
+            crud.record_scrape_run_target(session, scrape_run_id, product.id, status)
+
+    def persist(product: TargetSnapshot, scraper: BaseScraper, found: bool, hashes: ContentHashes | None) -> None:
+        saved = save_result(session_factory, product, scraper, found, notification, hashes=hashes, rules=rules)
+        record(product, "success" if saved else "failed")
+
+    def record_unchanged(product: TargetSnapshot, hashes: ContentHashes) -> None:
+        # the target was scraped either way, so it is not due again until its next interval
+        with session_factory() as session:
+            timestamp = utcnow()
+            crud.record_unchanged_scrape(session, product.id, timestamp, hashes.page, count=unchanged == "count")
+        record(product, "unchanged")
+
+    deferred = []
+
+    def on_error(product: TargetSnapshot, error: ScraperError) -> None:
+        if isinstance(error, DeadlineExceededError):
+            deferred.append(product)
+            return
+        if isinstance(error, ScrapeTimeoutError):
+            with session_factory() as session:
+                crud.create_scrape_timeout(session, product.id, error.stage, error.seconds, scrape_run_id)
+        record(product, "skipped" if isinstance(error, CircuitOpenError) else "failed")
+
+    parse_workers = parse_workers or os.cpu_count() or 1
+    pool = executor or ProcessPoolExecutor(max_workers=parse_workers)
+    try:
+        with BrowserPool(max_pages=prefetch_depth + 1, state_dir=browser_state_dir) as browser:
+            pipeline = ScrapePipeline(
+                persist=persist,
+                on_error=on_error,
+                executor=pool,
+                fetch_workers=prefetch_depth + 1,
+                parse_workers=parse_workers,
+                queue_size=queue_size,
+                rate_limiter=HostRateLimiter(host_interval),
+                browser=browser,
+                breaker=breaker,
+                deadline=run_deadline,
+                unchanged=None if unchanged == "off" else record_unchanged,
+            )
+            asyncio.run(pipeline.run(products))
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+    # send the run's notifications, as a digest if the dispatcher sends one
+    notification.flush()
+
+    if deferred:
+        msg = f"Scrape run {scrape_run_id} passed its deadline with {len(deferred)} targets left"
+        logging.warning(msg=msg)
+        return len(products) - len(deferred)
+
+    with session_factory() as session:
+        crud.finish_scrape_run(session, scrape_run_id)
+    return len(products)
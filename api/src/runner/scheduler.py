@@ -0,0 +1,153 @@
+"""A long running scheduler that scrapes each target when it is due."""
+
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from src.database import crud
+from src.functions.utils import utcnow
+
+
+class ScrapeScheduler:
+    """Run a scrape job for each target when it is due.
+
+    Targets are kept in a priority queue ordered by the time they are next due, which
+    is their `last_scraped` time plus their `scrape_interval`. The queue is rebuilt
+    from the database every `refresh_interval` seconds so targets that are added,
+    edited or deleted through the API are picked up without a restart. Due targets
+    are handed to a pool of worker threads.
+
+    Attributes:
+        job (Callable): Scrapes the target with the given id. Returns True on success.
+        session_factory (Callable): Creates the database sessions used to read the targets.
+        workers (int): The number of targets that are scraped at the same time.
+        refresh_interval (float): How often the targets are reloaded (in seconds).
+        retry_interval (float): How long to wait before a failed target is tried again (in seconds).
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        job: Callable[[int], bool],
+        session_factory: Callable[[], Session],
+        workers: int,
+        refresh_interval: float,
+        retry_interval: float,
+    ):
+        """Initialise a new instance of the ScrapeScheduler class."""
+        self.job = job
+        self.session_factory = session_factory
+        self.workers = workers
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+
+        self._queue: list[tuple[datetime, int]] = []
+        self._in_flight: set[int] = set()
+        # the earliest time each target can run again, regardless of its last scrape
+        self._not_before: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(workers={self.workers!r}, refresh_interval={self.refresh_interval!r})"
+
+    def refresh(self) -> None:
+        """Rebuild the queue from the targets in the database."""
+        with self.session_factory() as session:
+            schedules = crud.read_target_schedules(session)
+
+        with self._lock:
+            queue = []
+            for target_id, last_scraped, scrape_interval in schedules:
+                if target_id in self._in_flight:
+                    continue
+                due = last_scraped + timedelta(seconds=scrape_interval)
+                due = max(due, self._not_before.get(target_id, due))
+                queue.append((due, target_id))
+            heapq.heapify(queue)
+            self._queue = queue
+
+            # forget targets that have been deleted
+            target_ids = {target_id for target_id, _, _ in schedules}
+            self._not_before = {
+                target_id: not_before
+                for target_id, not_before in self._not_before.items()
+                if target_id in target_ids
+            }
+
+    def pop_due(self, now: datetime, limit: int) -> list[int]:
+        """Remove up to `limit` targets that are due at `now` from the queue, most overdue first."""
+        due: list[int] = []
+        with self._lock:
+            while self._queue and self._queue[0][0] <= now and len(due) < limit:
+                due.append(heapq.heappop(self._queue)[1])
+            self._in_flight.update(due)
+        return due
+
+    def seconds_until_due(self, now: datetime) -> float | None:
+        """Get the number of seconds until the next target is due, or None if the queue is empty."""
+        with self._lock:
+            if not self._queue:
+                return None
+            return max((self._queue[0][0] - now).total_seconds(), 0)
+
+    def _run_job(self, target_id: int) -> None:
+        """Run the job for a target, stopping it being retried too soon if it failed."""
+        succeeded = False
+        try:
+            succeeded = self.job(target_id)
+            if not succeeded:
+                msg = f"Scrape job for target {target_id} was unsuccessful"
+                logging.warning(msg=msg)
+        except Exception as e:
+            msg = f"Unexpected error in scrape job for target {target_id}: {e}"
+            logging.exception(msg=msg)
+        finally:
+            with self._lock:
+                self._in_flight.discard(target_id)
+                if succeeded:
+                    # a successful scrape moved its last scrape on, so it is due by its own interval
+                    self._not_before.pop(target_id, None)
+                else:
+                    self._not_before[target_id] = utcnow() + timedelta(seconds=self.retry_interval)
+            self._wake.set()
+
+    def run(self) -> None:
+        """Run scrape jobs as targets become due until `stop()` is called.
+
+        Jobs that are already running are allowed to finish before returning.
+        """
+        msg = f"Starting {self!r}"
+        logging.info(msg=msg)
+        next_refresh = 0.0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while not self._stopping.is_set():
+                if time.monotonic() >= next_refresh:
+                    self.refresh()
+                    next_refresh = time.monotonic() + self.refresh_interval
+
+                now = utcnow()
+                with self._lock:
+                    capacity = self.workers - len(self._in_flight)
+                for target_id in self.pop_due(now, capacity):
+                    pool.submit(self._run_job, target_id)
+
+                timeout = next_refresh - time.monotonic()
+                until_due = self.seconds_until_due(now)
+                if until_due is not None:
+                    timeout = min(timeout, until_due)
+                self._wake.wait(timeout=max(timeout, 0))
+                self._wake.clear()
+        logging.info("Scheduler stopped")
+
+    def stop(self) -> None:
+        """Stop the scheduler from starting any more jobs."""
+        self._stopping.set()
+        self._wake.set()
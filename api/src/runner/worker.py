@@ -0,0 +1,120 @@
+"""A scrape worker that leases due targets from the shared database."""
+
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from src.database import crud
+from src.functions.utils import utcnow
+
+
+def default_worker_id() -> str:
+    """Get an id for this worker process that is unique across machines."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseWorker:
+    """Scrape targets leased from the database, alongside any number of other workers.
+
+    Each batch of due targets is claimed atomically, so several workers on different
+    machines (or several processes sharing one SQLite file) never scrape the same
+    target at the same time. If a worker crashes its leases expire and the targets
+    are claimed by another worker.
+
+    Attributes:
+        worker_id (str): Identifies this worker's leases.
+        job (Callable): Scrapes the target with the given id. Returns True on success.
+        session_factory (Callable): Creates the database sessions used to claim targets.
+        batch_size (int): The number of targets claimed at a time.
+        lease_seconds (float): How long a lease lasts before another worker can claim the target.
+        retry_interval (float): How long a target is held after a failed scrape (in seconds).
+        poll_interval (float): How long to wait when no targets are due (in seconds).
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        worker_id: str,
+        job: Callable[[int], bool],
+        session_factory: Callable[[], Session],
+        batch_size: int,
+        lease_seconds: float,
+        retry_interval: float,
+        poll_interval: float,
+    ):
+        """Initialise a new instance of the LeaseWorker class."""
+        self.worker_id = worker_id
+        self.job = job
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.retry_interval = retry_interval
+        self.poll_interval = poll_interval
+        self._stopping = threading.Event()
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(worker_id={self.worker_id!r}, batch_size={self.batch_size!r})"
+
+    def run_once(self) -> int:
+        """Claim a batch of due targets and scrape them.
+
+        Returns:
+            int: The number of targets that were claimed.
+        """
+        with self.session_factory() as session:
+            target_ids = [
+                target.id
+                for target in crud.claim_due_targets(
+                    session,
+                    self.worker_id,
+                    self.batch_size,
+                    self.lease_seconds,
+                )
+            ]
+
+        for target_id in target_ids:
+            if self._stopping.is_set():
+                # let the lease expire so another worker picks the target up
+                break
+            self._scrape(target_id)
+        return len(target_ids)
+
+    def _scrape(self, target_id: int) -> None:
+        """Scrape a leased target and release the lease."""
+        with self.session_factory() as session:
+            if not crud.renew_target_lease(session, target_id, self.worker_id, self.lease_seconds):
+                msg = f"{self!r} lost its lease on target {target_id}"
+                logging.warning(msg=msg)
+                return
+
+        success = False
+        try:
+            success = self.job(target_id)
+        except Exception as e:
+            msg = f"Unexpected error in scrape job for target {target_id}: {e}"
+            logging.exception(msg=msg)
+
+        hold_until = None
+        if not success:
+            now = utcnow()
+            hold_until = now + timedelta(seconds=self.retry_interval)
+        with self.session_factory() as session:
+            crud.release_target_lease(session, target_id, self.worker_id, hold_until)
+
+    def run(self) -> None:
+        """Claim and scrape due targets until `stop()` is called."""
+        msg = f"Starting {self!r}"
+        logging.info(msg=msg)
+        while not self._stopping.is_set():
+            if not self.run_once():
+                self._stopping.wait(timeout=self.poll_interval)
+        logging.info("Worker stopped")
+
+    def stop(self) -> None:
+        """Stop the worker after the target it is scraping."""
+        self._stopping.set()
@@ -1,12 +1,28 @@
 from .amazon_google_scraper import AmazonGoogleScraper
 from .amazon_scraper import AmazonScraper
-from .base_scraper import BaseScraper, ScraperError
+from .base_scraper import (
+    BaseScraper,
+    Extraction,
+    ScraperError,
+    ScrapeTimeoutError,
+    Timeouts,
+)
+from .browser import BrowserPool, HostRateLimiter
+from .fields import Field, FieldExtractor, FieldMatch
 from .go_od_scraper import GoOutdoorsScraper
 from .scraper_dispatcher import InvalidSiteError, get_scraper
 
 __all__ = [
     "ScraperError",
+    "ScrapeTimeoutError",
+    "Timeouts",
     "BaseScraper",
+    "Extraction",
+    "Field",
+    "FieldExtractor",
+    "FieldMatch",
+    "BrowserPool",
+    "HostRateLimiter",
     "get_scraper",
     "InvalidSiteError",
     "AmazonGoogleScraper",
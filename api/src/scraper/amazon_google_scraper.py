@@ -1,10 +1,11 @@
 """Scraper for retrieving Amazon UK product information from the Google Shopping search results page."""
 
 import textdistance as td
-from playwright.sync_api import sync_playwright
-from selectolax.parser import HTMLParser, Node
+from selectolax.parser import HTMLParser
 
-from .base_scraper import BaseScraper, ScraperError
+from .base_scraper import BaseScraper, Extraction, Timeouts
+from .browser import BrowserPool
+from .fields import Field, FieldExtractor, FieldMatch
 
 
 class AmazonGoogleScraper(BaseScraper):
@@ -15,27 +16,45 @@ class AmazonGoogleScraper(BaseScraper):
         PRICE_SELECTOR (str): The CSS selector for the product price element.
         TITLE_SELECTOR (str): The CSS selector for the product title element.
         REJECT_COOKIES_SELECTOR (str): The CSS selector for the reject cookies button element.
+        CONSENT_KEY (str): The name the cookie consent state is shared between searches under.
         PRODUCT_CARDS_SELECTOR (str): The CSS selector for the product card elements.
         PRODUCT_DETAILS_SELECTOR (str): The CSS selector for the product details element.
-        html (HTMLParser): The parsed HTML content of the search results page.
-        node (SelectolaxNode): The current product card node being processed.
+        CARD_EXTRACTOR (FieldExtractor): Finds the title and price of a product card.
+        html (str): The HTML content of the search results page.
     """
 
     PRICE_SELECTOR = "span.T14wmb"
     TITLE_SELECTOR = "h3.sh-np__product-title"
     REJECT_COOKIES_SELECTOR = "div.VfPpkd-RLmnJb"
+    CONSENT_KEY = "google"
     PRODUCT_CARDS_SELECTOR = "div.KZmu8e"
     PRODUCT_DETAILS_SELECTOR = "div.HUOptb"
+    CARD_EXTRACTOR = FieldExtractor(
+        {
+            "title": Field((TITLE_SELECTOR,)),
+            "price": Field((PRICE_SELECTOR,)),
+        },
+    )
 
-    def __init__(self, product_id: str):
+    def __init__(
+        self,
+        product_id: str,
+        browser: BrowserPool | None = None,
+        timeouts: Timeouts | None = None,
+    ):
         """
         Initialise a new instance of the AmazonGoogleScraper class.
 
         Args:
             product_id (str): The search query to use. Ideally this should be the
             product name as it appears on Amazon.
+            browser (BrowserPool | None): A shared browser to load the page with, otherwise
+            a browser is launched for the page.
+            timeouts (Timeouts | None): The timeout of each stage, otherwise the defaults are used.
         """
         self.query = product_id
+        self.browser = browser
+        self.timeouts = timeouts or Timeouts()
         url_query = product_id.replace(" ", "+")
         self.URL = f"https://www.google.com/search?q={url_query}&tbm=shop"
 
@@ -44,60 +63,61 @@ class AmazonGoogleScraper(BaseScraper):
         return f"{self.__class__.__name__}(product_id='{self.query}')"
 
     def __get_html_with_playwright(self) -> str:
-        pw = sync_playwright().start()
-        browser = pw.chromium.launch()
-        context = browser.new_context(extra_http_headers=self._get_headers())
-        page = context.new_page()
-        page.goto(self.URL)
-        page.click(self.REJECT_COOKIES_SELECTOR)
-        page.wait_for_load_state("networkidle")
-        content = page.content()
-        browser.close()
-        pw.stop()
-        return str(content)
-
-    def run(self) -> bool:
-        """Run the scraper.
+        if self.browser is not None:
+            return self.browser.get_content(
+                self.URL,
+                self._get_headers(),
+                self.timeouts,
+                consent_selector=self.REJECT_COOKIES_SELECTOR,
+                consent_key=self.CONSENT_KEY,
+            )
+        # launch a browser for this page alone
+        with BrowserPool(max_pages=1) as browser:
+            return browser.get_content(
+                self.URL,
+                self._get_headers(),
+                self.timeouts,
+                consent_selector=self.REJECT_COOKIES_SELECTOR,
+                consent_key=self.CONSENT_KEY,
+            )
+
+    def page_key(self) -> str:
+        """Get the key of the search, which is the same for queries that only differ in case and spacing.
 
         Returns:
-            bool: True if data is retrieved successfully.
-        Rasises:
-            ScraperError: If an error occurs while scraping.
+            str: The key of the search.
         """
-        try:
-            temp_html = HTMLParser(self.__get_html_with_playwright())
-            self.html = temp_html.html
-
-            product_cards = temp_html.css(self.PRODUCT_CARDS_SELECTOR)
-            if not product_cards:
-                raise AttributeError  # noqa TRY301
-
-            for product_card in product_cards:
-                if product_card.select(self.PRODUCT_DETAILS_SELECTOR).any_text_contains(
-                    "Amazon.co.uk",
-                ) and self.__title_match(product_card):
-                    # Found a likely match
-                    self.price = product_card.css_first(self.PRICE_SELECTOR).text(
-                        strip=True,
-                    )
-                    self.title = product_card.css_first(self.TITLE_SELECTOR).text(
-                        strip=True,
-                    )
-            if not self.price or not self.title:
-                raise AttributeError  # noqa TRY301
-        except AttributeError:
-            self.price = self.PRICE_404
-            self.title = self.TITLE_404
-            return False
-        except Exception as e:
-            msg = f"{self!r}: {e}"
-            raise ScraperError(msg) from e
-        else:
-            return True
+        return f"google:{' '.join(self.query.lower().split())}"
+
+    def fetch(self) -> str:
+        """Download the search results page.
+
+        Returns:
+            str: The HTML content of the search results page.
+        """
+        return self.__get_html_with_playwright()
 
-    def __title_match(self, product_card: Node) -> bool:
+    def extract(self, html: str) -> Extraction:
+        """Extract the price and title of the Amazon UK listing that best matches the query.
+
+        Returns:
+            Extraction: The price and title, or None where they could not be found.
+        """
+        extraction = Extraction(price=None, title=None)
+        for product_card in HTMLParser(html).css(self.PRODUCT_CARDS_SELECTOR):
+            # the seller may be in any of the card's details, not only the first
+            if not any("Amazon.co.uk" in node.text() for node in product_card.css(self.PRODUCT_DETAILS_SELECTOR)):
+                continue
+            fields = self.CARD_EXTRACTOR.extract(product_card)
+            if self.__title_match(fields.get("title")):
+                # Found a likely match
+                extraction = Extraction.from_matches(fields)
+        return extraction
+
+    def __title_match(self, title: FieldMatch | None) -> bool:
         """Return True if the scraped product title has over 50% similarity to the query value."""
-        title = product_card.css_first(self.TITLE_SELECTOR).text(strip=True)
-        similarity: float = td.levenshtein.normalized_similarity(self.query, title)
+        if title is None:
+            return False
+        similarity: float = td.levenshtein.normalized_similarity(self.query, title.value)
         fifty_percent = 0.5
         return similarity > fifty_percent
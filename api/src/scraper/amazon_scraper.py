@@ -1,9 +1,10 @@
 """Scraper for retrieving Amazon UK product information."""
 
-from playwright.sync_api import sync_playwright
 from selectolax.parser import HTMLParser
 
-from .base_scraper import BaseScraper, ScraperError
+from .base_scraper import BaseScraper, Extraction, Timeouts
+from .browser import BrowserPool
+from .fields import Field, FieldExtractor
 
 
 class AmazonScraper(BaseScraper):
@@ -15,24 +16,41 @@ class AmazonScraper(BaseScraper):
     Attributes:
         PRICE_SELECTOR (str): The CSS selector for the product price element.
         TITLE_SELECTOR (str): The CSS selector for the product title element.
+        EXTRACTOR (FieldExtractor): Finds the price and title, falling back to the page's JSON-LD.
         URL (str): The URL of the product page.
         ASIN (str): The Amazon Standard Identification Number (ASIN) of the product.
-        html (HTMLParser): The parsed HTML content of the product page.
+        html (str): The HTML content of the product page.
     """
 
     PRICE_SELECTOR = "span.a-offscreen"
     TITLE_SELECTOR = "span#productTitle"
+    EXTRACTOR = FieldExtractor(
+        {
+            "price": Field((PRICE_SELECTOR,), json_ld=("Offer", "price")),
+            "title": Field((TITLE_SELECTOR,), json_ld=("Product", "name")),
+        },
+    )
     URL = ""
     ASIN = ""
 
-    def __init__(self, product_id: str):
+    def __init__(
+        self,
+        product_id: str,
+        browser: BrowserPool | None = None,
+        timeouts: Timeouts | None = None,
+    ):
         """
         Initialise a new instance of the AmazonScraper class.
 
         Args:
             product_id (str): The Amazon Standard Identification Number (ASIN) of the product to scrape.
+            browser (BrowserPool | None): A shared browser to load the page with, otherwise
+            a browser is launched for the page.
+            timeouts (Timeouts | None): The timeout of each stage, otherwise the defaults are used.
         """
         self.ASIN = product_id
+        self.browser = browser
+        self.timeouts = timeouts or Timeouts()
         self.URL = f"https://www.amazon.co.uk/dp/{product_id}"
 
     def __repr__(self) -> str:
@@ -40,35 +58,24 @@ class AmazonScraper(BaseScraper):
         return f"{self.__class__.__name__}(product_id='{self.ASIN}')"
 
     def __get_html_with_playwright(self) -> str:
-        pw = sync_playwright().start()
-        browser = pw.chromium.launch()
-        context = browser.new_context(extra_http_headers=self._get_headers())
-        page = context.new_page()
-        page.goto(self.URL)
-        content = page.content()
-        browser.close()
-        pw.stop()
-        return str(content)
+        if self.browser is not None:
+            return self.browser.get_content(self.URL, self._get_headers(), self.timeouts)
+        # launch a browser for this page alone
+        with BrowserPool(max_pages=1) as browser:
+            return browser.get_content(self.URL, self._get_headers(), self.timeouts)
 
-    def run(self) -> bool:
-        """Run the scraper.
+    def fetch(self) -> str:
+        """Download the product page.
 
         Returns:
-            bool: True if the scraper ran successfully, False otherwise.
-        Raises:
-            ScraperError: If there was an error running the scraper.
+            str: The HTML content of the product page.
         """
-        try:
-            temp_html = HTMLParser(self.__get_html_with_playwright())
-            self.html = temp_html.html
-            self.price = temp_html.css_first(self.PRICE_SELECTOR).text(strip=True)
-            self.title = temp_html.css_first(self.TITLE_SELECTOR).text(strip=True)
-        except AttributeError:
-            self.price = self.PRICE_404
-            self.title = self.TITLE_404
-            return False
-        except Exception as e:
-            msg = f"{self!r}: {e}"
-            raise ScraperError(msg) from e
-        else:
-            return True
+        return self.__get_html_with_playwright()
+
+    def extract(self, html: str) -> Extraction:
+        """Extract the price and title from the product page.
+
+        Returns:
+            Extraction: The price and title, or None where they could not be found.
+        """
+        return Extraction.from_matches(self.EXTRACTOR.extract(HTMLParser(html)))
@@ -1,38 +1,204 @@
 """The Base Scraper class. Designed to be inherited by other scraper classes."""
 
+import hashlib
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from .fields import FieldMatch
+
+if TYPE_CHECKING:
+    from .browser import BrowserPool
 
 
 class ScraperError(Exception):
     """An exception raised when an error occurs during scraping."""
 
 
+class ScrapeTimeoutError(ScraperError):
+    """An exception raised when a stage of scraping takes longer than its timeout.
+
+    Attributes:
+        stage (str): The stage that timed out: "connect", "navigation", "readiness" or "parse".
+        seconds (float): The timeout of the stage (in seconds).
+    """
+
+    def __init__(self, stage: str, seconds: float, url: str = ""):
+        """Initialise a new instance of the ScrapeTimeoutError class."""
+        super().__init__(f"{stage} timed out after {seconds}s {url}".strip())
+        self.stage = stage
+        self.seconds = seconds
+
+
+class Timeouts(NamedTuple):
+    """The timeout of each stage of scraping a page (in seconds).
+
+    Attributes:
+        connect (float): Connecting to the site.
+        navigation (float): Loading the page.
+        readiness (float): Waiting for the page to be ready after interacting with it.
+        parse (float): Extracting the data from the page.
+    """
+
+    connect: float = 10
+    navigation: float = 30
+    readiness: float = 15
+    parse: float = 30
+
+
+def content_hash(*parts: str) -> str:
+    """Hash some content with blake2b, which is fast enough to hash a whole page.
+
+    Returns:
+        str: The hex digest of the content.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class Extraction(NamedTuple):
+    """The price and title extracted from a page, or None where they could not be found.
+
+    The sources are the selectors (or JSON-LD properties) the fields were found with,
+    where the scraper reports them, and the fallbacks are those of the fields that
+    were not found with their preferred selector.
+    """
+
+    price: str | None
+    title: str | None
+    sources: dict[str, str] | None = None
+    fallbacks: dict[str, str] | None = None
+
+    @classmethod
+    def from_matches(cls, matches: dict[str, FieldMatch]) -> "Extraction":
+        """Create an extraction from the fields found by a `FieldExtractor`."""
+        price, title = matches.get("price"), matches.get("title")
+        return cls(
+            price=None if price is None else price.value,
+            title=None if title is None else title.value,
+            sources={name: match.source for name, match in matches.items()},
+            fallbacks={name: match.source for name, match in matches.items() if match.fallback},
+        )
+
+    def digest(self) -> str:
+        """Hash the price and title, to tell whether they have changed since the last scrape."""
+        return content_hash(self.price or "", self.title or "")
+
+
 class BaseScraper(ABC):
     """An abstract base class for web scrapers.
 
-    Classes that inherit from this class
-    must implement the run() method and ensure that it overwrites the html, price and
-    title attributes.
+    Scraping is split into stages so they can run separately: `fetch()` downloads
+    the page (I/O bound), `extract()` parses it (CPU bound) and `load()` stores the
+    result on the scraper. Classes that inherit from this class must implement
+    `fetch()` and `extract()`. `extract()` must be pure, and the scraper picklable,
+    so that it can run in another process.
 
     Attributes:
         PRICE_404 (str): A string to use when the price cannot be found.
         TITLE_404 (str): A string to use when the title cannot be found.
+        URL (str): The URL of the page to scrape.
+        browser (BrowserPool | None): A shared browser to load pages with, if the scraper uses a browser.
+        timeouts (Timeouts): The timeout of each stage of scraping the page.
+        sources (dict | None): The selectors the fields of the last extraction were found with,
+            to keep track of which selectors still work.
+        fallbacks (dict | None): The fallback selectors of the fields of the last extraction
+            that were not found with their preferred selector.
     """
 
     PRICE_404 = "Price not found"
     TITLE_404 = "Title not found"
+    URL = ""
+    browser: "BrowserPool | None" = None
+    timeouts = Timeouts()
     html: str | None = ""
     price = ""
     title = ""
+    sources: dict[str, str] | None = None
+    fallbacks: dict[str, str] | None = None
+
+    @abstractmethod
+    def fetch(self) -> str:
+        """Download the HTML content of the page.
+
+        Returns:
+            str: The HTML content of the page.
+        """
+        raise NotImplementedError
 
     @abstractmethod
+    def extract(self, html: str) -> Extraction:
+        """Extract the price and title from the HTML content of the page.
+
+        Args:
+            html (str): The HTML content of the page.
+
+        Returns:
+            Extraction: The price and title, or None where they could not be found.
+        """
+        raise NotImplementedError
+
+    def load(self, html: str, extraction: Extraction) -> bool:
+        """Store the extracted data on the scraper.
+
+        The page is only kept if the price or title could not be found, to save it
+        for debugging, as pages can be several MB.
+
+        Returns:
+            bool: True if both the price and the title were found, otherwise False.
+        """
+        self.html = None
+        self.sources = extraction.sources
+        self.fallbacks = extraction.fallbacks
+        if not extraction.price or not extraction.title:
+            self.html = html
+            self.price = self.PRICE_404
+            self.title = self.TITLE_404
+            return False
+        self.price = extraction.price
+        self.title = extraction.title
+        return True
+
     def run(self) -> bool:
         """Download the HTML content of the page and scrape the data.
 
         Returns:
             bool: True if the data was scraped successfully, otherwise False.
+        Raises:
+            ScraperError: If an error occurs while scraping.
         """
-        raise NotImplementedError
+        try:
+            html = self.fetch()
+            return self.load(html, self.extract(html))
+        except ScraperError:
+            raise
+        except Exception as e:
+            msg = f"{self!r}: {e}"
+            raise ScraperError(msg) from e
+
+    def page_key(self) -> str:
+        """Get the key of the page the scraper fetches, which is the same for scrapers that fetch the same page.
+
+        Returns:
+            str: The key of the page.
+        """
+        return self.URL
+
+    def page_hash(self, html: str) -> str:
+        """Hash the HTML content of the page, to tell whether it has changed since the last scrape.
+
+        Returns:
+            str: The hash of the page.
+        """
+        return content_hash(html)
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Leave the browser out when the scraper is pickled to extract in another process."""
+        state = self.__dict__.copy()
+        state.pop("browser", None)
+        return state
 
     def _get_headers(self) -> dict[str, str]:
         """
@@ -47,7 +213,7 @@ class BaseScraper(ABC):
 
     def get_html(self) -> str | None:
         """
-        Get the HTML content of the page.
+        Get the HTML content of the page, which is only kept if the price or title could not be found.
 
         Returns:
             str: The HTML content of the page.
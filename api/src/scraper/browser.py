@@ -0,0 +1,250 @@
+"""A Chromium browser shared by the scrapers, and a rate limiter for the sites they visit."""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Coroutine, TypeVar
+from urllib.parse import urlsplit
+
+from playwright.async_api import (
+    Browser,
+    BrowserContext,
+    Page,
+    Playwright,
+    StorageState,
+    async_playwright,
+)
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from .base_scraper import ScrapeTimeoutError, Timeouts
+
+T = TypeVar("T")
+
+
+class BrowserPool:
+    """A Chromium browser that loads several pages at the same time.
+
+    Launching Chromium for every target is slow, so the browser is launched once,
+    on first use, and each page is loaded in a new browser context of its own.
+    Playwright runs on a dedicated thread with its own event loop, so any thread
+    can call `get_content()` and up to `max_pages` pages navigate at once.
+
+    Sites that show a consent wall before the page only need it dismissed once:
+    the cookies of the first page are captured under a `consent_key` and later
+    contexts start from them, so each page is a single navigation. The captured
+    state is also saved in `state_dir`, if given, for `state_max_age` seconds.
+
+    Attributes:
+        max_pages (int): The number of pages that can load at the same time.
+        state_dir (Path | None): The directory the consent state is saved in.
+        state_max_age (float): How long a saved consent state is used for (in seconds).
+    """
+
+    def __init__(
+        self,
+        max_pages: int,
+        state_dir: Path | None = None,
+        state_max_age: float = 7 * 24 * 60 * 60,
+    ):
+        """Initialise a new instance of the BrowserPool class."""
+        self.max_pages = max_pages
+        self.state_dir = state_dir
+        self.state_max_age = state_max_age
+        self._states: dict[str, StorageState] = {}
+        self._consenting: dict[str, asyncio.Lock] = {}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._playwright: Playwright | None = None
+        self._browser: Browser | None = None
+        self._pages: asyncio.Semaphore | None = None
+        self._launching = asyncio.Lock()
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(max_pages={self.max_pages!r})"
+
+    def __enter__(self) -> "BrowserPool":
+        """Return the pool, the browser is launched when the first page is loaded."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the browser."""
+        self.close()
+
+    def _submit(self, coroutine: Coroutine[Any, Any, T]) -> "Future[T]":
+        """Run a coroutine on the browser's event loop, starting the loop if needed."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                self._thread.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    async def _launch(self) -> tuple[Browser, asyncio.Semaphore]:
+        """Launch the browser unless it is already running."""
+        async with self._launching:
+            if self._browser is None or self._pages is None:
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch()
+                self._pages = asyncio.Semaphore(self.max_pages)
+            return self._browser, self._pages
+
+    def _state_path(self, consent_key: str) -> Path | None:
+        return None if self.state_dir is None else self.state_dir / f"{consent_key}.json"
+
+    def _load_state(self, consent_key: str) -> StorageState | None:
+        """Get the consent state captured this run, or saved in the last `state_max_age` seconds."""
+        if consent_key in self._states:
+            return self._states[consent_key]
+        path = self._state_path(consent_key)
+        if path is None or not path.exists() or time.time() - path.stat().st_mtime > self.state_max_age:
+            return None
+        try:
+            state: StorageState = json.loads(path.read_text())
+        except ValueError:
+            return None
+        self._states[consent_key] = state
+        return state
+
+    async def _save_state(self, consent_key: str, context: BrowserContext) -> None:
+        state = await context.storage_state()
+        self._states[consent_key] = state
+        path = self._state_path(consent_key)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(state))
+        msg = f"Captured the consent state for '{consent_key}'"
+        logging.info(msg=msg)
+
+    async def _consent(self, page: Page, consent_selector: str, timeouts: Timeouts, url: str) -> None:
+        """Dismiss a consent wall and wait for the page to load again."""
+        try:
+            await page.click(consent_selector, timeout=timeouts.readiness * 1000)
+            await page.wait_for_load_state("networkidle", timeout=timeouts.readiness * 1000)
+        except PlaywrightTimeoutError as e:
+            raise ScrapeTimeoutError(stage="readiness", seconds=timeouts.readiness, url=url) from e
+
+    async def _load_page(  # noqa: PLR0913
+        self,
+        browser: Browser,
+        url: str,
+        headers: dict[str, str],
+        timeouts: Timeouts,
+        consent_selector: str | None,
+        consent_key: str | None,
+    ) -> str:
+        state = None if consent_key is None else self._load_state(consent_key)
+        context = await browser.new_context(extra_http_headers=headers, storage_state=state)
+        try:
+            page = await context.new_page()
+            try:
+                await page.goto(url, timeout=timeouts.navigation * 1000)
+            except PlaywrightTimeoutError as e:
+                raise ScrapeTimeoutError(stage="navigation", seconds=timeouts.navigation, url=url) from e
+            # with a consent state the wall is only shown again once the state has expired
+            if consent_selector is not None and (state is None or await page.query_selector(consent_selector)):
+                await self._consent(page, consent_selector, timeouts, url)
+                if consent_key is not None:
+                    await self._save_state(consent_key, context)
+            return str(await page.content())
+        finally:
+            await context.close()
+
+    async def _get_content(  # noqa: PLR0913
+        self,
+        url: str,
+        headers: dict[str, str],
+        timeouts: Timeouts,
+        consent_selector: str | None,
+        consent_key: str | None,
+    ) -> str:
+        browser, pages = await self._launch()
+        async with pages:
+            if consent_key is None or self._load_state(consent_key) is not None:
+                return await self._load_page(browser, url, headers, timeouts, consent_selector, consent_key)
+            # only the first page dismisses the consent wall, the others wait for its state
+            async with self._consenting.setdefault(consent_key, asyncio.Lock()):
+                return await self._load_page(browser, url, headers, timeouts, consent_selector, consent_key)
+
+    def get_content(  # noqa: PLR0913
+        self,
+        url: str,
+        headers: dict[str, str],
+        timeouts: Timeouts,
+        consent_selector: str | None = None,
+        consent_key: str | None = None,
+    ) -> str:
+        """Load a page and get its HTML content, waiting if `max_pages` are already loading.
+
+        Args:
+            url (str): The URL of the page.
+            headers (dict): Extra HTTP headers to send with the requests.
+            timeouts (Timeouts): The navigation and readiness timeouts of the page.
+            consent_selector (str | None): An element that dismisses the site's consent wall,
+                after which the page is given time to load again.
+            consent_key (str | None): The name the site's consent state is captured under,
+                so that later pages skip the consent wall.
+
+        Returns:
+            str: The HTML content of the page.
+        Raises:
+            ScrapeTimeoutError: If the page takes longer than its timeouts.
+        """
+        coroutine = self._get_content(url, headers, timeouts, consent_selector, consent_key)
+        return self._submit(coroutine).result()
+
+    async def _close(self) -> None:
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._browser = None
+        self._playwright = None
+
+    def close(self) -> None:
+        """Close the browser and stop its thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+class HostRateLimiter:
+    """Space out the requests made to each host.
+
+    Attributes:
+        min_interval (float): The minimum time between two requests to the same host (in seconds).
+    """
+
+    def __init__(self, min_interval: float):
+        """Initialise a new instance of the HostRateLimiter class."""
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot: dict[str, float] = {}
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(min_interval={self.min_interval!r})"
+
+    def reserve(self, url: str) -> float:
+        """Reserve the next slot for a request to the URL's host.
+
+        Returns:
+            float: How long to wait before making the request (in seconds).
+        """
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        return slot - now
@@ -0,0 +1,188 @@
+"""A declarative extractor that finds every field of a page in a single pass."""
+
+import json
+import re
+from typing import Any, Iterator, NamedTuple
+
+from selectolax.parser import HTMLParser, Node
+
+JSON_LD_SELECTOR = 'script[type="application/ld+json"]'
+CURRENCY_SYMBOLS = {"GBP": "£", "EUR": "€", "USD": "$"}
+
+# a compound selector such as `span#productTitle` or `span.a-price[data-a-size="xl"]`
+_COMPOUND_SELECTOR = re.compile(r"^(?P<tag>[\w-]*)(?P<rest>(?:[.#][\w-]+|\[[\w-]+(?:=\"?[^\"\]]*\"?)?\])*)$")
+_SELECTOR_PART = re.compile(r"([.#])([\w-]+)|\[([\w-]+)(?:=\"?([^\"\]]*)\"?)?\]")
+
+
+class Field(NamedTuple):
+    """How to find a field of a page.
+
+    Attributes:
+        selectors (tuple): Compound CSS selectors of the field's element, the first is preferred.
+        json_ld (tuple | None): The schema.org type and property to fall back to in the
+            page's JSON-LD, for example ("Offer", "price").
+    """
+
+    selectors: tuple[str, ...]
+    json_ld: tuple[str, str] | None = None
+
+
+class FieldMatch(NamedTuple):
+    """The value of a field and where it was found: a selector or `json-ld:<type>.<property>`.
+
+    A field is found with a fallback when it was not found with its preferred (first)
+    selector, which usually means the page has changed and the selector needs updating.
+    """
+
+    value: str
+    source: str
+    fallback: bool = False
+
+
+class _Selector(NamedTuple):
+    """A compound CSS selector compiled so a node can be matched against it without searching."""
+
+    text: str
+    tag: str
+    id: str | None  # noqa: A003
+    classes: frozenset[str]
+    attributes: tuple[tuple[str, str | None], ...]
+
+    @classmethod
+    def parse(cls, selector: str) -> "_Selector":
+        """Parse a compound CSS selector.
+
+        Raises:
+            ValueError: If the selector is not a compound selector (has combinators).
+        """
+        match = _COMPOUND_SELECTOR.match(selector.strip())
+        if match is None:
+            msg = f"Only compound selectors can be extracted in a single pass, not {selector!r}"
+            raise ValueError(msg)
+        node_id, classes, attributes = None, set(), []
+        for prefix, name, attribute, value in _SELECTOR_PART.findall(match["rest"]):
+            if prefix == "#":
+                node_id = name
+            elif prefix == ".":
+                classes.add(name)
+            else:
+                attributes.append((attribute, value or None))
+        return cls(selector, match["tag"].lower(), node_id, frozenset(classes), tuple(attributes))
+
+    def matches(self, node: Node) -> bool:
+        """Check whether the node itself matches the selector."""
+        if self.tag and node.tag != self.tag:
+            return False
+        node_attributes = node.attributes
+        if self.id is not None and node_attributes.get("id") != self.id:
+            return False
+        if self.classes and not self.classes <= set((node_attributes.get("class") or "").split()):
+            return False
+        return all(
+            name in node_attributes and (value is None or node_attributes[name] == value)
+            for name, value in self.attributes
+        )
+
+
+def _json_ld_objects(data: Any) -> Iterator[dict[str, Any]]:
+    """Walk every object in a JSON-LD document, including nested objects and `@graph` lists."""
+    if isinstance(data, list):
+        for item in data:
+            yield from _json_ld_objects(item)
+    elif isinstance(data, dict):
+        yield data
+        for value in data.values():
+            yield from _json_ld_objects(value)
+
+
+def _json_ld_value(obj: dict[str, Any], prop: str) -> str | None:
+    value = obj.get(prop)
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    # show JSON-LD prices the way the pages show them, for example 30 GBP as £30.00
+    if prop == "price" and obj.get("priceCurrency") in CURRENCY_SYMBOLS:
+        try:
+            return f"{CURRENCY_SYMBOLS[obj['priceCurrency']]}{float(value):.2f}"
+        except ValueError:
+            return str(value)
+    return str(value).strip()
+
+
+class FieldExtractor:
+    """Extract the fields of a page declared in a spec, in a single pass over the page.
+
+    The selectors of every field are combined into one CSS query (with the JSON-LD
+    scripts, if any field falls back to them), so the page is searched once however
+    many fields there are. Each element found is then matched against the compiled
+    selectors to tell which fields it belongs to. A field takes the first element of
+    its most preferred selector, or else the first JSON-LD object of its type with
+    the property.
+
+    The spec is compiled when the extractor is created, so scrapers create theirs
+    once as a class attribute.
+
+    Attributes:
+        fields (dict): The spec of the fields to extract.
+    """
+
+    def __init__(self, fields: dict[str, Field]):
+        """Initialise a new instance of the FieldExtractor class, compiling the spec.
+
+        Raises:
+            ValueError: If a selector is not a compound selector.
+        """
+        self.fields = fields
+        self._selectors = {name: [_Selector.parse(s) for s in field.selectors] for name, field in fields.items()}
+        self._json_ld = {name: field.json_ld for name, field in fields.items() if field.json_ld is not None}
+        queries = list(dict.fromkeys(s for field in fields.values() for s in field.selectors))
+        if self._json_ld:
+            queries.append(JSON_LD_SELECTOR)
+        self._query = ", ".join(queries)
+
+    def __repr__(self) -> str:
+        """Return a string representation of the object."""
+        return f"{self.__class__.__name__}(fields={list(self.fields)!r})"
+
+    def extract(self, root: HTMLParser | Node) -> dict[str, FieldMatch]:
+        """Extract the fields from a page, or from an element of a page.
+
+        Returns:
+            dict: The value of each field that was found and where it was found.
+        """
+        found: dict[str, tuple[int, FieldMatch]] = {}
+        scripts = []
+        for node in root.css(self._query):
+            if self._json_ld and node.tag == "script":
+                scripts.append(node)
+                continue
+            for name, selectors in self._selectors.items():
+                for rank, selector in enumerate(selectors):
+                    if name in found and found[name][0] <= rank:
+                        break
+                    if selector.matches(node):
+                        found[name] = (rank, FieldMatch(node.text(strip=True), selector.text, fallback=rank > 0))
+                        break
+
+        matches = {name: match for name, (_, match) in found.items()}
+        missing = {name: json_ld for name, json_ld in self._json_ld.items() if name not in matches}
+        if missing and scripts:
+            matches.update(self._extract_json_ld(scripts, missing))
+        return matches
+
+    def _extract_json_ld(self, scripts: list[Node], fields: dict[str, tuple[str, str]]) -> dict[str, FieldMatch]:
+        matches: dict[str, FieldMatch] = {}
+        for script in scripts:
+            try:
+                data = json.loads(script.text())
+            except ValueError:
+                continue
+            for obj in _json_ld_objects(data):
+                types = obj.get("@type")
+                types = types if isinstance(types, list) else [types]
+                for name, (schema_type, prop) in fields.items():
+                    if name in matches or schema_type not in types:
+                        continue
+                    value = _json_ld_value(obj, prop)
+                    if value:
+                        matches[name] = FieldMatch(value, f"json-ld:{schema_type}.{prop}", fallback=True)
+        return matches
@@ -3,7 +3,8 @@
 import httpx
 from selectolax.parser import HTMLParser
 
-from .base_scraper import BaseScraper, ScraperError
+from .base_scraper import BaseScraper, Extraction, ScrapeTimeoutError, Timeouts
+from .fields import Field, FieldExtractor
 
 
 class GoOutdoorsScraper(BaseScraper):
@@ -13,23 +14,32 @@ class GoOutdoorsScraper(BaseScraper):
     Attributes:
         PRICE_SELECTOR (str): The CSS selector for the product price element.
         TITLE_SELECTOR (str): The CSS selector for the product title element.
+        EXTRACTOR (FieldExtractor): Finds the price and title, falling back to the page's JSON-LD.
         URL (str): The URL of the product page.
         SKU (str): The SKU of the product.
-        html (HTMLParser): The parsed HTML content of the product page.
+        html (str): The HTML content of the product page.
     """
 
     PRICE_SELECTOR = "span.regular-price"
     TITLE_SELECTOR = "span.product-name"
+    EXTRACTOR = FieldExtractor(
+        {
+            "price": Field((PRICE_SELECTOR,), json_ld=("Offer", "price")),
+            "title": Field((TITLE_SELECTOR,), json_ld=("Product", "name")),
+        },
+    )
     URL = ""
     SKU = ""
 
-    def __init__(self, product_id: str):
+    def __init__(self, product_id: str, timeouts: Timeouts | None = None):
         """Initialise a new instance of the GoOutdoorsScraper class.
 
         Args:
             product_id (str): The product ID in the format found in the URL.
             For example: "waterproof-down-jacket-123456".
+            timeouts (Timeouts | None): The timeout of each stage, otherwise the defaults are used.
         """
+        self.timeouts = timeouts or Timeouts()
         self.SKU = product_id.split("-")[-1]
         self.URL = f"https://www.gooutdoors.co.uk/{self.SKU}/{product_id}"
 
@@ -37,28 +47,28 @@ class GoOutdoorsScraper(BaseScraper):
         """Return a string representation of the object."""
         return f"{self.__class__.__name__}(product_id='{self.SKU}')"
 
-    def run(self) -> bool:
-        """Run the scraper.
+    def fetch(self) -> str:
+        """Download the product page.
 
         Returns:
-            bool: True if the scraper ran successfully, False otherwise.
+            str: The HTML content of the product page.
         Raises:
-            ScraperError: If there was an error running the scraper.
+            ScrapeTimeoutError: If connecting or downloading takes longer than its timeout.
         """
+        timeout = httpx.Timeout(self.timeouts.navigation, connect=self.timeouts.connect)
         try:
-            response = httpx.get(self.URL, headers=self._get_headers())
-            response.raise_for_status()
-            temp_html = HTMLParser(response.text)
+            response = httpx.get(self.URL, headers=self._get_headers(), timeout=timeout)
+        except httpx.ConnectTimeout as e:
+            raise ScrapeTimeoutError(stage="connect", seconds=self.timeouts.connect, url=self.URL) from e
+        except httpx.TimeoutException as e:
+            raise ScrapeTimeoutError(stage="navigation", seconds=self.timeouts.navigation, url=self.URL) from e
+        response.raise_for_status()
+        return response.text
 
-            self.html = temp_html.html
-            self.price = temp_html.css_first(self.PRICE_SELECTOR).text(strip=True)
-            self.title = temp_html.css_first(self.TITLE_SELECTOR).text(strip=True)
-        except AttributeError:
-            self.price = self.PRICE_404
-            self.title = self.TITLE_404
-            return False
-        except Exception as e:
-            msg = f"{self!r}: {e}"
-            raise ScraperError(msg) from e
-        else:
-            return True
+    def extract(self, html: str) -> Extraction:
+        """Extract the price and title from the product page.
+
+        Returns:
+            Extraction: The price and title, or None where they could not be found.
+        """
+        return Extraction.from_matches(self.EXTRACTOR.extract(HTMLParser(html)))
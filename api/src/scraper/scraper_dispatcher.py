@@ -2,7 +2,8 @@
 
 from .amazon_google_scraper import AmazonGoogleScraper
 from .amazon_scraper import AmazonScraper
-from .base_scraper import BaseScraper
+from .base_scraper import BaseScraper, Timeouts
+from .browser import BrowserPool
 from .go_od_scraper import GoOutdoorsScraper
 
 
@@ -10,22 +11,29 @@ class InvalidSiteError(Exception):
     """An exception raised when an invalid site is specified."""
 
 
-def get_scraper(site: str, product_id: str) -> BaseScraper:
+def get_scraper(
+    site: str,
+    product_id: str,
+    browser: BrowserPool | None = None,
+    timeouts: Timeouts | None = None,
+) -> BaseScraper:
     """Return a scraper instance for the specified site and product ID.
 
     Args:
         site (str): The site to scrape. Must be one of "amz", "amz-g", or "go_od".
         product_id (str): The ID of the product to scrape in the format required for the site chosen.
+        browser (BrowserPool | None): A shared browser for the scrapers that load pages in a browser.
+        timeouts (Timeouts | None): The timeout of each stage of scraping, otherwise the defaults are used.
 
     Returns:
         BaseScraper: A scraper instance for the specified site and product ID.
     """
     if site == "amz-g":
-        return AmazonGoogleScraper(product_id)
+        return AmazonGoogleScraper(product_id, browser, timeouts)
     if site == "go_od":
-        return GoOutdoorsScraper(product_id)
+        return GoOutdoorsScraper(product_id, timeouts)
     if site == "amz":
-        return AmazonScraper(product_id)
+        return AmazonScraper(product_id, browser, timeouts)
 
     msg = f"Invalid site: {site}"
     raise InvalidSiteError(msg)
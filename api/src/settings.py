@@ -0,0 +1,123 @@
+"""Settings for the scraper, read from the environment or the `.env` file."""
+
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def get_int(name: str, default: int) -> int:
+    """Get an integer setting from the environment."""
+    value = os.getenv(name)
+    return default if not value else int(value)
+
+
+def get_float(name: str, default: float) -> float:
+    """Get a float setting from the environment."""
+    value = os.getenv(name)
+    return default if not value else float(value)
+
+
+NOTIFICATION_TOKEN = os.getenv("NOTIFICATION_TOKEN")
+NOTIFICATION_USER_KEY = os.getenv("NOTIFICATION_USER_KEY")
+# the number of targets whose notifications can wait to be sent, after which they are dropped
+NOTIFICATION_QUEUE_SIZE = get_int("NOTIFICATION_QUEUE_SIZE", 100)
+# how many times a notification is retried, waiting twice as long each time (in seconds)
+NOTIFICATION_RETRIES = get_int("NOTIFICATION_RETRIES", 3)
+NOTIFICATION_BACKOFF = get_float("NOTIFICATION_BACKOFF", 1)
+# only notify the prices that meet one of these comma separated rules: "drop>N%" (since the last
+# price), "below_average>N%" (of the moving average), "all_time_low" and "any_change",
+# or leave empty to notify every price
+NOTIFICATION_RULES = os.getenv("NOTIFICATION_RULES", "")
+# the weight of a new price in the moving average
+NOTIFICATION_EWMA_ALPHA = get_float("NOTIFICATION_EWMA_ALPHA", 0.3)
+# send one notification listing every price update of a scraper run (set to 1 to enable)
+NOTIFICATION_DIGEST = get_int("NOTIFICATION_DIGEST", 0)
+
+# skip targets scraped within this many seconds when running the scraper (0 scrapes every target)
+SCRAPE_FRESHNESS_WINDOW = get_float("SCRAPE_FRESHNESS_WINDOW", 0)
+# the minimum time between the scraper's requests to the same site (in seconds)
+SCRAPE_HOST_INTERVAL = get_float("SCRAPE_HOST_INTERVAL", 1)
+# where the browser saves the consent state of sites between runs (empty to only keep it for a run)
+BROWSER_STATE_DIR = os.getenv("BROWSER_STATE_DIR", str(Path(__file__).parent.parent / "browser_state"))
+# where the pages of failed scrapes are stored, compressed and each distinct page once
+HTML_DUMP_DIR = os.getenv("HTML_DUMP_DIR", str(Path(__file__).parent.parent / "logs" / "html_dumps"))
+# the most space the stored pages take up (in bytes) and how long each is kept (in seconds)
+HTML_DUMP_MAX_BYTES = get_int("HTML_DUMP_MAX_BYTES", 500 * 1024 * 1024)
+HTML_DUMP_MAX_AGE = get_float("HTML_DUMP_MAX_AGE", 30 * 24 * 60 * 60)
+# the number of pages that load ahead of the page being parsed and saved
+PIPELINE_PREFETCH_DEPTH = get_int("PIPELINE_PREFETCH_DEPTH", 1)
+# the number of processes that parse the fetched pages (0 uses one per CPU core)
+PIPELINE_PARSE_WORKERS = get_int("PIPELINE_PARSE_WORKERS", 0)
+# the number of pages held between the fetch, parse and save stages
+PIPELINE_QUEUE_SIZE = get_int("PIPELINE_QUEUE_SIZE", 4)
+
+# skip a site's targets after this many failed scrapes in a row
+CIRCUIT_FAILURE_COUNT = get_int("CIRCUIT_FAILURE_COUNT", 5)
+# or once this share of its last CIRCUIT_WINDOW scrapes have failed, after CIRCUIT_MIN_ATTEMPTS scrapes
+CIRCUIT_FAILURE_RATE = get_float("CIRCUIT_FAILURE_RATE", 0.8)
+CIRCUIT_MIN_ATTEMPTS = get_int("CIRCUIT_MIN_ATTEMPTS", 10)
+CIRCUIT_WINDOW = get_int("CIRCUIT_WINDOW", 50)
+# how long a site is first skipped for, doubling after each failed probe (in seconds)
+CIRCUIT_COOLDOWN = get_float("CIRCUIT_COOLDOWN", 15 * 60)
+CIRCUIT_MAX_COOLDOWN = get_float("CIRCUIT_MAX_COOLDOWN", 24 * 60 * 60)
+
+# the timeout of each stage of scraping a page (in seconds), which can be set for a single
+# site by adding its name, for example SCRAPE_TIMEOUT_NAVIGATION_AMZ_G
+SCRAPE_TIMEOUTS = {
+    "connect": get_float("SCRAPE_TIMEOUT_CONNECT", 10),
+    "navigation": get_float("SCRAPE_TIMEOUT_NAVIGATION", 30),
+    "readiness": get_float("SCRAPE_TIMEOUT_READINESS", 15),
+    "parse": get_float("SCRAPE_TIMEOUT_PARSE", 30),
+}
+# what to do with a target whose page, or price and title, are the same as at its last scrape:
+# "off" always saves it, "skip" only saves when it was scraped and "count" also counts the unchanged observation
+SCRAPE_UNCHANGED = os.getenv("SCRAPE_UNCHANGED", "off")
+# stop starting new targets once the scraper has run for this many seconds (0 never stops)
+SCRAPE_RUN_DEADLINE = get_float("SCRAPE_RUN_DEADLINE", 0)
+# start a new run instead of resuming an unfinished one started more than this many seconds ago
+# (0 resumes a run of any age), which should be shorter than the time between runs
+SCRAPE_RUN_MAX_AGE = get_float("SCRAPE_RUN_MAX_AGE", 12 * 60 * 60)
+
+
+def get_site_timeouts(site: str) -> dict[str, float]:
+    """Get the timeout of each stage of scraping a site's pages."""
+    suffix = site.upper().replace("-", "_")
+    return {
+        stage: get_float(f"SCRAPE_TIMEOUT_{stage.upper()}_{suffix}", default)
+        for stage, default in SCRAPE_TIMEOUTS.items()
+    }
+
+
+# the number of targets the scheduler scrapes at the same time
+SCHEDULER_WORKERS = get_int("SCHEDULER_WORKERS", 2)
+# how often the scheduler reloads the targets from the database (in seconds)
+SCHEDULER_REFRESH_INTERVAL = get_float("SCHEDULER_REFRESH_INTERVAL", 60)
+# how long the scheduler waits before retrying a target that could not be scraped (in seconds)
+SCHEDULER_RETRY_INTERVAL = get_float("SCHEDULER_RETRY_INTERVAL", 900)
+
+# adapt each target's scrape interval to how often its price changes (set to 0 to disable)
+ADAPTIVE_INTERVALS = get_int("ADAPTIVE_INTERVALS", 1)
+# the bounds of an adapted scrape interval (in seconds), a target configured with a shorter
+# scrape_interval than the shortest is never slowed down as its own interval is its shortest
+ADAPTIVE_MIN_INTERVAL = get_int("ADAPTIVE_MIN_INTERVAL", 15 * 60)
+ADAPTIVE_MAX_INTERVAL = get_int("ADAPTIVE_MAX_INTERVAL", 7 * 24 * 60 * 60)
+# how much the interval grows after an unchanged price and shrinks after a price change
+ADAPTIVE_GROWTH = get_float("ADAPTIVE_GROWTH", 1.5)
+ADAPTIVE_SHRINK = get_float("ADAPTIVE_SHRINK", 0.5)
+
+# identifies this worker's leases when running several workers (defaults to hostname-pid)
+WORKER_ID = os.getenv("WORKER_ID")
+# the number of targets a worker claims at a time
+WORKER_BATCH_SIZE = get_int("WORKER_BATCH_SIZE", 5)
+# how long a worker's lease on a target lasts before another worker can claim it (in seconds)
+WORKER_LEASE_SECONDS = get_float("WORKER_LEASE_SECONDS", 600)
+# how long a worker waits when no targets are due (in seconds)
+WORKER_POLL_INTERVAL = get_float("WORKER_POLL_INTERVAL", 30)
+
+# where the scrape data history is exported as Parquet files partitioned by site and month
+EXPORT_DIR = os.getenv("EXPORT_DIR", str(Path(__file__).parent.parent / "exports"))
+# the number of scrape data read from the database and written at a time when exporting
+EXPORT_BATCH_SIZE = get_int("EXPORT_BATCH_SIZE", 10_000)
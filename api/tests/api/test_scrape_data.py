@@ -1,3 +1,6 @@
+import asyncio
+from datetime import datetime, timezone
+
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
@@ -5,7 +8,10 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from run_api import app
 from src import messages
-from src.database import get_db
+from src.api import scrape_data
+from src.database import crud, get_db, get_session_factory
+from src.database.models import ScrapedData
+from src.functions import export
 from tests.dummy_data import (
     override_get_db,
     scrape_target1,
@@ -23,6 +29,13 @@ def override_dependencies():
 client = TestClient(app)
 
 
+@pytest.fixture()
+def session():
+    db = override_get_db()
+    yield next(db)
+    db.close()
+
+
 def test_get_scrape_data():
     response = client.get("/scrape-data/")
     assert response.status_code == status.HTTP_200_OK
@@ -31,6 +44,21 @@ def test_get_scrape_data():
     assert data[0]["price"] == scraped_data1["price"]
 
 
+def test_get_scrape_data_with_fields():
+    response = client.get("/scrape-data/?fields=id,price,timestamp")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert set(data[0]) == {"id", "price", "timestamp"}
+    assert data[0]["price"] == scraped_data1["price"]
+
+
+def test_get_scrape_data_invalid_field():
+    response = client.get("/scrape-data/?fields=id,unknown")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    data = response.json()
+    assert data == messages.InvalidFieldMessage().model_dump()
+
+
 def test_get_scrape_data_db_error(mocker):
     mocker.patch(
         "src.database.crud.read_scrape_data",
@@ -50,6 +78,33 @@ def test_get_scrape_data_for_target():
     assert data[0]["price"] == scraped_data1["price"]
 
 
+def test_get_scrape_data_for_target_with_fields():
+    response = client.get(f"/scrape-data/target/{scrape_target1['id']}?fields=price")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data == [{"price": scraped_data1["price"]}]
+
+
+def test_get_scrape_data_for_targets():
+    response = client.get("/scrape-data/targets?target_ids=1,2&per_target_limit=5")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [history["scrape_target_id"] for history in data] == [1, 2]
+    assert data[0]["scrape_data"][0]["price"] == scraped_data1["price"]
+    assert data[1]["scrape_data"] == []
+
+
+def test_get_scrape_data_for_targets_since():
+    response = client.get("/scrape-data/targets?target_ids=1&since=2999-01-01T00:00:00Z")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [{"scrape_target_id": 1, "scrape_data": []}]
+
+
+def test_get_scrape_data_for_targets_invalid_ids():
+    response = client.get("/scrape-data/targets?target_ids=1,two")
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 def test_get_scrape_data_for_target_not_found():
     response = client.get("/scrape-data/target/99999")
     assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -121,3 +176,80 @@ def test_delete_scrape_data_db_error(mocker):
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
     data = response.json()
     assert data == messages.DatabaseErrorMessage().model_dump()
+
+
+def test_scrape_data_events_resume(session):
+    events = scrape_data.scrape_data_events(session, last_id=0)
+
+    event = asyncio.run(anext(events))
+    assert event.startswith("id: 1\nevent: scrape-data\n")
+    assert f'"title":"{scraped_data1["title"]}"' in event
+
+
+def test_scrape_data_events_filtered(mocker, session):
+    mocker.patch("src.api.scrape_data.STREAM_POLL_INTERVAL", 0)
+    mocker.patch("src.api.scrape_data.STREAM_KEEPALIVE_INTERVAL", 0)
+    events = scrape_data.scrape_data_events(session, last_id=0, site="other site")
+
+    event = asyncio.run(anext(events))
+    assert event == ": keep-alive\n\n"
+
+
+def test_scrape_data_events_new_rows_only(mocker, session):
+    mocker.patch("src.api.scrape_data.STREAM_POLL_INTERVAL", 0)
+    read_latest_scrape_data_id = crud.read_latest_scrape_data_id
+    calls = []
+
+    def save_new_row_then_read_latest_id(session):
+        # the first call sets the starting cursor, then a new row is saved before the next poll
+        if calls:
+            session.add(
+                ScrapedData(
+                    scrape_target_id=scrape_target1["id"],
+                    title="new title",
+                    price="£5",
+                    timestamp=datetime.now(tz=timezone.utc),
+                ),
+            )
+            session.commit()
+        calls.append(session)
+        return read_latest_scrape_data_id(session)
+
+    mocker.patch(
+        "src.database.crud.read_latest_scrape_data_id",
+        side_effect=save_new_row_then_read_latest_id,
+    )
+    events = scrape_data.scrape_data_events(session, last_id=None)
+
+    event = asyncio.run(anext(events))
+    assert event.startswith("id: 2\n")
+    assert '"title":"new title"' in event
+
+
+def test_export_scrape_data(mocker, tmp_path):
+    mocker.patch("src.settings.EXPORT_DIR", str(tmp_path))
+    # keep the generator so its database is not dropped before the export
+    db = override_get_db()
+    session = next(db)
+    app.dependency_overrides[get_session_factory] = lambda: lambda: session
+    export_scrape_data = mocker.spy(export, "export_scrape_data")
+
+    response = client.post("/scrape-data/export")
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json() == messages.ExportStartedMessage().model_dump()
+    # the test client waits for the background task to finish
+    assert (export_scrape_data.spy_return.rows, export_scrape_data.spy_return.last_id) == (1, 1)
+    assert len(list(tmp_path.glob("site=*/month=*/*.parquet"))) == 1
+
+
+def test_export_scrape_data_error(mocker, tmp_path):
+    mocker.patch("src.settings.EXPORT_DIR", str(tmp_path))
+    mocker.patch("src.functions.export.export_scrape_data", side_effect=SQLAlchemyError)
+    app.dependency_overrides[get_session_factory] = lambda: mocker.MagicMock
+    logging = mocker.patch("src.api.scrape_data.logging")
+
+    response = client.post("/scrape-data/export")
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    logging.exception.assert_called_once()
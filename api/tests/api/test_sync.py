@@ -0,0 +1,71 @@
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import SQLAlchemyError
+
+from run_api import app
+from src import messages
+from src.database import get_db
+from tests.dummy_data import (
+    override_get_db,
+    scrape_target1,
+    scrape_target2,
+    scraped_data1,
+)
+
+
+@pytest.fixture(autouse=True)
+def override_dependencies():
+    app.dependency_overrides[get_db] = override_get_db
+    yield None
+    app.dependency_overrides = {}
+
+
+client = TestClient(app)
+
+
+def test_sync():
+    response = client.get("/sync/")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["has_more"] is False
+    assert data["cursor"] == len(data["changes"])
+
+    targets = [c["target"] for c in data["changes"] if c["table_name"] == "scrape_targets"]
+    assert [t["sku"] for t in targets] == [scrape_target1["sku"], scrape_target2["sku"]]
+    # the scraper's bookkeeping is not synced as its updates are not logged
+    assert "last_scraped" not in targets[0]
+    assert "current_interval" not in targets[0]
+    scrape_data = [c["scrape_data"] for c in data["changes"] if c["table_name"] == "scraped_data"]
+    assert scrape_data[0]["price"] == scraped_data1["price"]
+
+
+def test_sync_pages():
+    response = client.get("/sync/?limit=1")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["has_more"] is True
+    assert data["cursor"] == 1
+    assert len(data["changes"]) == 1
+
+    response = client.get(f"/sync/?since={data['cursor']}")
+    data = response.json()
+    assert data["has_more"] is False
+    assert all(change["seq"] > 1 for change in data["changes"])
+
+
+def test_sync_up_to_date():
+    response = client.get("/sync/?since=99999")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"changes": [], "cursor": 99999, "has_more": False}
+
+
+def test_sync_db_error(mocker):
+    mocker.patch(
+        "src.database.crud.read_changes",
+        side_effect=SQLAlchemyError,
+    )
+    response = client.get("/sync/")
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    data = response.json()
+    assert data == messages.DatabaseErrorMessage().model_dump()
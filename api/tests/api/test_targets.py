@@ -1,3 +1,5 @@
+from datetime import datetime
+
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
@@ -6,6 +8,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from run_api import app
 from src import messages
 from src.database import get_db
+from src.database.models import ScrapeTimeout, TargetStats
 from tests.dummy_data import (
     new_scrape_target,
     override_get_db,
@@ -39,6 +42,20 @@ def test_get_targets():
     assert data[1]["send_notification"] == scrape_target2["send_notification"]
 
 
+def test_get_targets_with_fields():
+    response = client.get("/targets/?fields=id,sku")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data[0] == {"id": scrape_target1["id"], "sku": scrape_target1["sku"]}
+
+
+def test_get_targets_invalid_field():
+    response = client.get("/targets/?fields=id,scraped_data")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    data = response.json()
+    assert data == messages.InvalidFieldMessage().model_dump()
+
+
 def test_get_targets_db_error(mocker):
     mocker.patch(
         "src.database.crud.read_targets",
@@ -93,6 +110,125 @@ def test_get_target_with_id_not_found():
     assert data == messages.TargetDoesNotExistMessage().model_dump()
 
 
+def test_get_target_timeouts(mocker):
+    timeout = ScrapeTimeout(
+        scrape_target_id=1,
+        scrape_run_id=2,
+        stage="navigation",
+        seconds=30.0,
+        timestamp=datetime(2023, 1, 1),  # noqa: DTZ001
+    )
+    mocker.patch("src.database.crud.read_scrape_timeouts", return_value=[timeout])
+
+    response = client.get("/targets/1/timeouts")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [
+        {
+            "scrape_target_id": 1,
+            "scrape_run_id": 2,
+            "stage": "navigation",
+            "seconds": 30.0,
+            "timestamp": "2023-01-01T00:00:00",
+        },
+    ]
+
+
+def test_get_target_timeouts_not_found():
+    response = client.get("/targets/99999/timeouts")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == messages.TargetDoesNotExistMessage().model_dump()
+
+
+def test_search_targets():
+    response = client.get("/targets/search", params={"q": "title1"})
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [(target["id"], target["title"]) for target in data] == [(scrape_target1["id"], "test title1")]
+    assert isinstance(data[0]["rank"], float)
+
+
+def test_search_targets_limit():
+    response = client.get("/targets/search", params={"q": "test", "limit": 1})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 1
+
+
+def test_search_targets_unscraped_title():
+    response = client.get("/targets/search", params={"q": "sku2"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [target["title"] for target in response.json()] == [None]
+
+
+def test_search_targets_no_query():
+    response = client.get("/targets/search", params={"q": ""})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def _target_stats() -> TargetStats:
+    return TargetStats(
+        scrape_target_id=1,
+        count=3,
+        price_count=2,
+        first_seen=datetime(2023, 1, 1),  # noqa: DTZ001
+        last_seen=datetime(2023, 1, 3),  # noqa: DTZ001
+        min_price=6.0,
+        min_price_at=datetime(2023, 1, 2),  # noqa: DTZ001
+        max_price=10.0,
+        max_price_at=datetime(2023, 1, 1),  # noqa: DTZ001
+        mean_price=8.0,
+        m2=8.0,
+        unchanged_count=1,
+    )
+
+
+def test_get_target_stats(mocker):
+    mocker.patch("src.database.crud.read_target_stats", return_value=_target_stats())
+
+    response = client.get("/targets/1/stats")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "scrape_target_id": 1,
+        "count": 3,
+        "price_count": 2,
+        "first_seen": "2023-01-01T00:00:00",
+        "last_seen": "2023-01-03T00:00:00",
+        "min_price": 6.0,
+        "min_price_at": "2023-01-02T00:00:00",
+        "max_price": 10.0,
+        "max_price_at": "2023-01-01T00:00:00",
+        "mean_price": 8.0,
+        "unchanged_count": 1,
+        "price_variance": 8.0,
+        "price_stddev": pytest.approx(2.828, abs=1e-3),
+    }
+
+
+def test_get_target_stats_no_scrape_data():
+    response = client.get(f"/targets/{scrape_target2['id']}/stats")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() is None
+
+
+def test_get_target_stats_not_found():
+    response = client.get("/targets/99999/stats")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == messages.TargetDoesNotExistMessage().model_dump()
+
+
+def test_get_all_target_stats(mocker):
+    mocker.patch("src.database.crud.read_all_target_stats", return_value=[_target_stats()])
+
+    response = client.get("/targets/stats")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [stats["scrape_target_id"] for stats in response.json()] == [1]
+
+
 def test_get_target_with_id_db_error(mocker):
     mocker.patch(
         "src.database.crud.read_target",
@@ -166,3 +302,91 @@ def test_delete_target_db_error(mocker):
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
     data = response.json()
     assert data == messages.DatabaseErrorMessage().model_dump()
+
+
+def test_post_new_targets_bulk():
+    response = client.post("/targets/bulk", json=[new_scrape_target, scrape_target1])
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data[0]["status"] == "created"
+    assert data[0]["target"]["sku"] == new_scrape_target["sku"]
+    assert data[1]["status"] == "conflict"
+    assert data[1]["detail"] == messages.TargetExistsMessage().detail
+
+
+def test_post_new_targets_bulk_too_many():
+    response = client.post("/targets/bulk", json=[new_scrape_target] * 501)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_put_update_targets_bulk():
+    response = client.put(
+        "/targets/bulk",
+        json=[{**new_scrape_target, "id": scrape_target1["id"]}, {**new_scrape_target, "id": 99999}],
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data[0]["status"] == "updated"
+    assert data[0]["target"]["sku"] == new_scrape_target["sku"]
+    assert data[1]["status"] == "not_found"
+
+
+def test_delete_targets_bulk():
+    response = client.request("DELETE", "/targets/bulk", json=[scrape_target2["id"], 99999])
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data[0]["status"] == "deleted"
+    assert data[0]["target"]["id"] == scrape_target2["id"]
+    assert data[1]["status"] == "not_found"
+
+
+def test_upload_targets_csv():
+    content = "site,sku,send_notification\namz,B000001,true\ntest site1,test sku1,true\namz,,maybe\n"
+    response = client.post(
+        "/targets/bulk/upload",
+        content=content,
+        headers={"Content-Type": "text/csv"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [result["status"] for result in data] == ["created", "conflict", "invalid"]
+    assert data[0]["target"]["send_notification"] is True
+
+
+def test_upload_targets_ndjson(mocker):
+    mocker.patch("src.database.crud.BULK_LIMIT", 1)
+    lines = [
+        '{"site": "amz", "sku": "B000001", "send_notification": false}',
+        "not json",
+        '{"site": "amz", "sku": "B000002", "send_notification": true}',
+    ]
+    response = client.post(
+        "/targets/bulk/upload",
+        content="\n".join(lines),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [result["status"] for result in data] == ["created", "invalid", "created"]
+    assert [result["index"] for result in data] == [0, 1, 2]
+
+
+def test_upload_targets_not_utf8():
+    content = "site,sku,send_notification\namz,B000001,true\namz,café,true\n".encode("latin-1")
+    response = client.post(
+        "/targets/bulk/upload",
+        content=content,
+        headers={"Content-Type": "text/csv"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["status"] for result in response.json()] == ["created", "invalid"]
+
+
+def test_upload_targets_unsupported_type():
+    response = client.post(
+        "/targets/bulk/upload",
+        content="{}",
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    assert response.json() == messages.UnsupportedUploadMessage().model_dump()
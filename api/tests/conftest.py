@@ -1,6 +1,7 @@
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
 from src.database.models import Base, ScrapedData, ScrapeTargets
 
@@ -41,7 +42,8 @@ def scraped_data1():
 
 @pytest.fixture()
 def empty_db():
-    engine = create_engine("sqlite:///:memory:")
+    # one connection shared by every thread, as the scrape runs save their results in a thread
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
     Base.metadata.create_all(bind=engine)
     session = Session(bind=engine)
     yield session
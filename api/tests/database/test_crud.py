@@ -1,8 +1,18 @@
+from datetime import datetime, timedelta
+
 import pytest
 from sqlalchemy.orm import Session
 
 from src.database import crud
-from src.database.models import ScrapedData, ScrapeTargets
+from src.database.models import (
+    ChangeLog,
+    NotificationState,
+    ScrapedData,
+    ScrapeRun,
+    ScrapeTargets,
+)
+from src.database.schema import TargetIn
+from src.functions.utils import utcnow
 
 
 def test_read_targets(dummy_db: Session, scrape_target1: ScrapeTargets):
@@ -15,6 +25,22 @@ def test_read_targets(dummy_db: Session, scrape_target1: ScrapeTargets):
     assert result[0].sku == scrape_target1.sku
 
 
+def test_read_targets_with_fields(dummy_db: Session, scrape_target1: ScrapeTargets):
+    result = crud.read_targets(dummy_db, ["id", "sku"])
+
+    assert dict(result[0]) == {"id": 1, "sku": scrape_target1.sku}
+
+
+def test_read_targets_invalid_field(dummy_db: Session):
+    with pytest.raises(crud.InvalidFieldError):
+        crud.read_targets(dummy_db, ["id", "scraped_data"])
+
+
+def test_read_targets_internal_column(dummy_db: Session):
+    with pytest.raises(crud.InvalidFieldError):
+        crud.read_targets(dummy_db, ["id", "leased_by"])
+
+
 def test_read_targets_empty_db(empty_db: Session):
     result = crud.read_targets(empty_db)
 
@@ -64,6 +90,26 @@ def test_update_target(dummy_db: Session, scrape_target1: ScrapeTargets):
     assert result.send_notification == scrape_target1.send_notification
 
 
+def test_update_target_resets_current_interval(dummy_db: Session, scrape_target1: ScrapeTargets):
+    target = crud.read_target(dummy_db, 2)
+    target.current_interval = 60
+    dummy_db.commit()
+
+    result = crud.update_target(dummy_db, 2, scrape_target1)
+
+    assert result.current_interval is None
+
+
+def test_read_target_schedules(dummy_db: Session, scrape_target1: ScrapeTargets):
+    target = crud.read_target(dummy_db, 2)
+    target.current_interval = 60
+    dummy_db.commit()
+
+    result = crud.read_target_schedules(dummy_db)
+
+    assert [(target_id, interval) for target_id, _, interval in result] == [(1, 86400), (2, 60)]
+
+
 def test_update_target_empty_db(empty_db: Session, scrape_target1: ScrapeTargets):
     with pytest.raises(crud.TargetDoesNotExistError):
         crud.update_target(empty_db, 1, scrape_target1)
@@ -94,6 +140,54 @@ def test_delete_target_no_target(dummy_db: Session):
         crud.delete_target(dummy_db, 999999)
 
 
+def test_create_targets(dummy_db: Session, scrape_target1: ScrapeTargets):
+    new = ScrapeTargets(
+        site="new site",
+        sku="new sku",
+        send_notification=False,
+        date_added=scrape_target1.date_added,
+        last_scraped=scrape_target1.last_scraped,
+    )
+    duplicate = ScrapeTargets(
+        site="new site",
+        sku="new sku",
+        send_notification=True,
+        date_added=scrape_target1.date_added,
+        last_scraped=scrape_target1.last_scraped,
+    )
+    existing = ScrapeTargets(
+        site=scrape_target1.site,
+        sku=scrape_target1.sku,
+        send_notification=False,
+        date_added=scrape_target1.date_added,
+        last_scraped=scrape_target1.last_scraped,
+    )
+
+    result = crud.create_targets(dummy_db, [new, duplicate, existing])
+
+    assert result[0] is new
+    assert result[0].id == 3  # noqa: PLR2004
+    assert result[1:] == [None, None]
+    assert len(crud.read_targets(dummy_db)) == 3  # noqa: PLR2004
+
+
+def test_update_targets(dummy_db: Session, scrape_target1: ScrapeTargets):
+    result = crud.update_targets(dummy_db, [(999999, scrape_target1), (2, scrape_target1)])
+
+    assert result[0] is None
+    assert isinstance(result[1], ScrapeTargets)
+    assert result[1].sku == scrape_target1.sku
+
+
+def test_delete_targets(dummy_db: Session):
+    result = crud.delete_targets(dummy_db, [1, 999999, 1])
+
+    assert result[0].id == 1
+    assert result[1:] == [None, None]
+    assert len(crud.read_targets(dummy_db)) == 1
+    assert crud.read_scrape_data(dummy_db) == []
+
+
 def test_read_scrape_data(dummy_db: Session, scraped_data1: ScrapedData):
     result = crud.read_scrape_data(dummy_db)
 
@@ -104,6 +198,17 @@ def test_read_scrape_data(dummy_db: Session, scraped_data1: ScrapedData):
     assert result[0].price == scraped_data1.price
 
 
+def test_read_scrape_data_with_fields(dummy_db: Session, scraped_data1: ScrapedData):
+    result = crud.read_scrape_data(dummy_db, ["id", "price"])
+
+    assert dict(result[0]) == {"id": 1, "price": scraped_data1.price}
+
+
+def test_read_scrape_data_invalid_field(dummy_db: Session):
+    with pytest.raises(crud.InvalidFieldError):
+        crud.read_scrape_data(dummy_db, ["not_a_field"])
+
+
 def test_read_scrape_data_empty_db(empty_db: Session):
     result = crud.read_scrape_data(empty_db)
 
@@ -120,6 +225,15 @@ def test_read_scrape_data_for_target(dummy_db: Session, scraped_data1: ScrapedDa
     assert result[0].price == scraped_data1.price
 
 
+def test_read_scrape_data_for_target_with_fields(
+    dummy_db: Session,
+    scraped_data1: ScrapedData,
+):
+    result = crud.read_scrape_data_for_target(dummy_db, 1, ["title"])
+
+    assert [dict(row) for row in result] == [{"title": scraped_data1.title}]
+
+
 def test_read_scrape_data_for_target_empty_db(empty_db: Session):
     with pytest.raises(crud.TargetDoesNotExistError):
         crud.read_scrape_data_for_target(empty_db, 1)
@@ -130,6 +244,141 @@ def test_read_scrape_data_for_target_no_target(dummy_db: Session):
         crud.read_scrape_data_for_target(dummy_db, 999999)
 
 
+def test_read_scrape_data_for_targets(dummy_db: Session, scraped_data1: ScrapedData):
+    target = crud.read_target(dummy_db, 1)
+    for days in range(1, 4):
+        target.scraped_data.append(
+            ScrapedData(
+                title=scraped_data1.title,
+                price=f"£{days}",
+                timestamp=scraped_data1.timestamp - timedelta(days=days),
+            ),
+        )
+    dummy_db.commit()
+
+    result = crud.read_scrape_data_for_targets(dummy_db, [1, 2, 999999], per_target_limit=2)
+
+    assert list(result) == [1, 2, 999999]
+    assert [data.price for data in result[1]] == [scraped_data1.price, "£1"]
+    assert result[2] == []
+    assert result[999999] == []
+
+
+def test_read_scrape_data_for_targets_since(dummy_db: Session, scraped_data1: ScrapedData):
+    since = scraped_data1.timestamp.replace(tzinfo=None) + timedelta(seconds=1)
+    result = crud.read_scrape_data_for_targets(dummy_db, [1], since=since)
+
+    assert result == {1: []}
+
+
+def test_search_targets_by_sku_and_title(dummy_db: Session):
+    assert [target.id for target, _, _ in crud.search_targets(dummy_db, "sku2", 10)] == [2]
+    assert [(target.id, title) for target, title, _ in crud.search_targets(dummy_db, "TITLE", 10)] == [(1, "test title1")]
+    assert len(crud.search_targets(dummy_db, "test sk", 1)) == 1
+
+
+def test_search_targets_ignores_syntax(dummy_db: Session):
+    assert [target.id for target, _, _ in crud.search_targets(dummy_db, 'sku1" OR', 10)] == []
+    assert crud.search_targets(dummy_db, "***", 10) == []
+
+
+def test_search_targets_follows_latest_title(dummy_db: Session):
+    crud.create_scrape_data(dummy_db, 1, price="£5", title="new tent", timestamp=datetime(2100, 1, 1))  # noqa: DTZ001
+    crud.create_scrape_data(dummy_db, 1, price="£5", title="old stove", timestamp=datetime(2000, 1, 1))  # noqa: DTZ001
+
+    assert [title for _, title, _ in crud.search_targets(dummy_db, "tent", 10)] == ["new tent"]
+    assert crud.search_targets(dummy_db, "stove", 10) == []
+    assert crud.search_targets(dummy_db, "title1", 10) == []
+
+    latest = next(data for data in crud.read_scrape_data_for_target(dummy_db, 1) if data.title == "new tent")
+    crud.delete_scrape_data(dummy_db, latest.id)
+    assert [title for _, title, _ in crud.search_targets(dummy_db, "title1", 10)] == ["test title1"]
+
+
+def test_search_targets_follows_targets(dummy_db: Session):
+    crud.update_target(dummy_db, 2, TargetIn(site="test site2", sku="renamed", send_notification=True))
+    crud.delete_target(dummy_db, 1)
+
+    assert [target.id for target, _, _ in crud.search_targets(dummy_db, "renamed", 10)] == [2]
+    assert crud.search_targets(dummy_db, "test", 10) == []
+
+
+def test_create_scrape_data(dummy_db: Session):
+    timestamp = datetime(2023, 1, 1, 12, 0, 0)  # noqa: DTZ001
+    result = crud.create_scrape_data(dummy_db, 2, price="£5", title="title", timestamp=timestamp)
+
+    assert isinstance(result, ScrapedData)
+    assert result.scrape_target_id == 2  # noqa: PLR2004
+    assert crud.read_target(dummy_db, 2).last_scraped == timestamp
+
+
+def test_create_scrape_data_no_target(dummy_db: Session):
+    timestamp = datetime(2023, 1, 1, 12, 0, 0)  # noqa: DTZ001
+    with pytest.raises(crud.TargetDoesNotExistError):
+        crud.create_scrape_data(dummy_db, 3, price="£5", title="title", timestamp=timestamp)
+
+
+def test_create_scrape_data_saves_hashes(dummy_db: Session):
+    timestamp = datetime(2023, 1, 1, 12, 0, 0)  # noqa: DTZ001
+    crud.record_unchanged_scrape(dummy_db, 2, timestamp=timestamp, page_hash="page")
+    crud.create_scrape_data(
+        dummy_db,
+        2,
+        price="£5",
+        title="title",
+        timestamp=timestamp,
+        page_hash="page",
+        content_hash="content",
+    )
+
+    target = crud.read_target(dummy_db, 2)
+    assert (target.page_hash, target.content_hash, target.unchanged_observations) == ("page", "content", 0)
+
+
+def test_record_unchanged_scrape(dummy_db: Session):
+    timestamp = datetime(2023, 1, 1, 12, 0, 0)  # noqa: DTZ001
+    crud.record_unchanged_scrape(dummy_db, 2, timestamp=timestamp, page_hash="page")
+    target = crud.record_unchanged_scrape(dummy_db, 2, timestamp=timestamp, page_hash="page")
+
+    assert target.unchanged_observations == 2  # noqa: PLR2004
+    assert target.last_scraped == timestamp
+    assert crud.read_latest_price(dummy_db, 2) is None
+
+
+def test_record_unchanged_scrape_counts_in_stats(dummy_db: Session):
+    _create_prices(dummy_db, 2, ["£10"])
+    timestamp = datetime(2023, 1, 2, 12, 0, 0)  # noqa: DTZ001
+    crud.record_unchanged_scrape(dummy_db, 2, timestamp=timestamp, page_hash="page")
+
+    stats = crud.read_target_stats(dummy_db, 2)
+    assert (stats.count, stats.unchanged_count, stats.last_seen) == (1, 1, timestamp)
+
+    # the unchanged scrapes are kept when the statistics are rebuilt
+    crud.rebuild_target_stats(dummy_db, 2)
+    stats = crud.read_target_stats(dummy_db, 2)
+    assert (stats.count, stats.unchanged_count, stats.last_seen) == (1, 1, timestamp)
+
+
+def test_record_unchanged_scrape_not_counted(dummy_db: Session):
+    _create_prices(dummy_db, 2, ["£10"])
+    timestamp = datetime(2023, 1, 2, 12, 0, 0)  # noqa: DTZ001
+    target = crud.record_unchanged_scrape(dummy_db, 2, timestamp=timestamp, page_hash="page", count=False)
+
+    assert (target.last_scraped, target.page_hash, target.unchanged_observations) == (timestamp, "page", 0)
+    assert crud.read_target_stats(dummy_db, 2).unchanged_count == 0
+
+
+def test_record_unchanged_scrape_no_target(dummy_db: Session):
+    timestamp = datetime(2023, 1, 1, 12, 0, 0)  # noqa: DTZ001
+    with pytest.raises(crud.TargetDoesNotExistError):
+        crud.record_unchanged_scrape(dummy_db, 3, timestamp=timestamp, page_hash="page")
+
+
+def test_read_latest_price(dummy_db: Session, scraped_data1: ScrapedData):
+    assert crud.read_latest_price(dummy_db, 1) == scraped_data1.price
+    assert crud.read_latest_price(dummy_db, 2) is None
+
+
 def test_read_scrape_data_by_id(dummy_db: Session, scraped_data1: ScrapedData):
     result = crud.read_scrape_data_by_id(dummy_db, 1)
 
@@ -166,3 +415,274 @@ def test_delete_scrape_data_empty_db(empty_db: Session):
 def test_delete_scrape_data_no_data(dummy_db: Session):
     with pytest.raises(crud.ScrapedDataDoesNotExistError):
         crud.delete_scrape_data(dummy_db, 999999)
+
+
+def _create_prices(session: Session, target_id: int, prices: list[str]) -> None:
+    for hour, price in enumerate(prices):
+        timestamp = datetime(2023, 1, 1, hour)  # noqa: DTZ001
+        crud.create_scrape_data(session, target_id, price=price, title="title", timestamp=timestamp)
+
+
+def test_create_scrape_data_updates_target_stats(dummy_db: Session):
+    _create_prices(dummy_db, 2, ["£10", "£6", "n/a", "£14"])
+
+    stats = crud.read_target_stats(dummy_db, 2)
+    assert (stats.count, stats.price_count) == (4, 3)
+    assert (stats.min_price, stats.min_price_at) == (6, datetime(2023, 1, 1, 1))  # noqa: DTZ001
+    assert (stats.max_price, stats.max_price_at) == (14, datetime(2023, 1, 1, 3))  # noqa: DTZ001
+    assert (stats.first_seen, stats.last_seen) == (datetime(2023, 1, 1, 0), datetime(2023, 1, 1, 3))  # noqa: DTZ001
+    assert stats.mean_price == pytest.approx(10)
+    assert stats.m2 == pytest.approx(32)
+
+
+def test_read_target_stats_no_scrape_data(dummy_db: Session):
+    assert crud.read_target_stats(dummy_db, 2) is None
+
+
+def test_read_target_stats_no_target(dummy_db: Session):
+    with pytest.raises(crud.TargetDoesNotExistError):
+        crud.read_target_stats(dummy_db, 3)
+
+
+def test_read_all_target_stats(dummy_db: Session):
+    _create_prices(dummy_db, 2, ["£5"])
+    _create_prices(dummy_db, 1, ["£7"])
+
+    assert [stats.scrape_target_id for stats in crud.read_all_target_stats(dummy_db)] == [1, 2]
+
+
+def test_rebuild_target_stats(dummy_db: Session):
+    _create_prices(dummy_db, 2, ["£10", "£6", "n/a", "£14"])
+    expected = crud.read_target_stats(dummy_db, 2)
+    expected = (expected.count, expected.min_price, expected.max_price, expected.mean_price, expected.m2)
+
+    # the scrape data of target 1 was added without going through crud so it has no stats yet
+    assert crud.rebuild_target_stats(dummy_db) == 2  # noqa: PLR2004
+
+    rebuilt = crud.read_target_stats(dummy_db, 2)
+    assert (rebuilt.count, rebuilt.min_price, rebuilt.max_price, rebuilt.mean_price, rebuilt.m2) == expected
+    assert crud.read_target_stats(dummy_db, 1).min_price == 10  # noqa: PLR2004
+
+
+def test_delete_scrape_data_rebuilds_target_stats(dummy_db: Session):
+    _create_prices(dummy_db, 2, ["£10", "£6"])
+    lowest = crud.read_scrape_data_for_target(dummy_db, 2)[-1]
+
+    crud.delete_scrape_data(dummy_db, lowest.id)
+
+    stats = crud.read_target_stats(dummy_db, 2)
+    assert (stats.count, stats.min_price) == (1, 10)
+
+
+def test_start_scrape_run(dummy_db: Session):
+    scrape_run = crud.start_scrape_run(dummy_db)
+
+    assert isinstance(scrape_run, ScrapeRun)
+    assert scrape_run.finished is None
+    assert crud.start_scrape_run(dummy_db).id == scrape_run.id
+
+
+def test_start_scrape_run_after_finished(dummy_db: Session):
+    scrape_run = crud.start_scrape_run(dummy_db)
+    crud.finish_scrape_run(dummy_db, scrape_run.id)
+
+    assert crud.start_scrape_run(dummy_db).id != scrape_run.id
+
+
+def test_start_scrape_run_too_old(dummy_db: Session):
+    scrape_run = crud.start_scrape_run(dummy_db)
+    crud.record_scrape_run_target(dummy_db, scrape_run.id, 1, "success")
+
+    new_run = crud.start_scrape_run(dummy_db, started_since=scrape_run.started + timedelta(seconds=1))
+
+    assert new_run.id != scrape_run.id
+    dummy_db.expire_all()
+    assert scrape_run.finished is not None
+    assert scrape_run.targets == []
+    assert [target.id for target in crud.read_pending_targets(dummy_db, new_run.id)] == [1, 2]
+
+
+def test_start_scrape_run_recent(dummy_db: Session):
+    scrape_run = crud.start_scrape_run(dummy_db)
+
+    assert crud.start_scrape_run(dummy_db, started_since=scrape_run.started).id == scrape_run.id
+
+
+def test_read_pending_targets(dummy_db: Session):
+    scrape_run = crud.start_scrape_run(dummy_db)
+    crud.record_scrape_run_target(dummy_db, scrape_run.id, 1, "success")
+
+    assert [target.id for target in crud.read_pending_targets(dummy_db, scrape_run.id)] == [2]
+
+
+def test_read_pending_targets_retries_failed(dummy_db: Session):
+    scrape_run = crud.start_scrape_run(dummy_db)
+    crud.record_scrape_run_target(dummy_db, scrape_run.id, 1, "failed")
+    crud.record_scrape_run_target(dummy_db, scrape_run.id, 2, "unchanged")
+
+    assert [target.id for target in crud.read_pending_targets(dummy_db, scrape_run.id)] == [1]
+
+
+def test_finish_scrape_run_deletes_statuses(dummy_db: Session):
+    scrape_run = crud.start_scrape_run(dummy_db)
+    crud.record_scrape_run_target(dummy_db, scrape_run.id, 1, "success")
+
+    crud.finish_scrape_run(dummy_db, scrape_run.id)
+
+    dummy_db.expire_all()
+    assert scrape_run.targets == []
+
+
+def test_delete_target_deletes_scrape_run_statuses(dummy_db: Session):
+    scrape_run = crud.start_scrape_run(dummy_db)
+    crud.record_scrape_run_target(dummy_db, scrape_run.id, 1, "success")
+
+    crud.delete_target(dummy_db, 1)
+
+    dummy_db.expire_all()
+    assert scrape_run.targets == []
+
+
+def test_read_pending_targets_fresh_since(dummy_db: Session):
+    scrape_run = crud.start_scrape_run(dummy_db)
+    target = crud.read_target(dummy_db, 1)
+    target.last_scraped = target.last_scraped - timedelta(days=1)
+    dummy_db.commit()
+    fresh_since = crud.read_target(dummy_db, 2).last_scraped - timedelta(hours=1)
+
+    assert [t.id for t in crud.read_pending_targets(dummy_db, scrape_run.id, fresh_since)] == [1]
+
+
+def test_record_scrape_run_target_twice(dummy_db: Session):
+    scrape_run = crud.start_scrape_run(dummy_db)
+    crud.record_scrape_run_target(dummy_db, scrape_run.id, 1, "failed")
+    crud.record_scrape_run_target(dummy_db, scrape_run.id, 1, "success")
+
+    assert [(t.scrape_target_id, t.status) for t in scrape_run.targets] == [(1, "success")]
+
+
+def test_create_scrape_timeout(dummy_db: Session):
+    crud.create_scrape_timeout(dummy_db, 1, "navigation", 30)
+    crud.create_scrape_timeout(dummy_db, 1, "parse", 5, scrape_run_id=3)
+    crud.create_scrape_timeout(dummy_db, 2, "connect", 10)
+
+    result = crud.read_scrape_timeouts(dummy_db, 1)
+
+    assert [(t.stage, t.seconds, t.scrape_run_id) for t in result] == [("parse", 5, 3), ("navigation", 30, None)]
+
+
+def test_read_scrape_timeouts_no_target(dummy_db: Session):
+    with pytest.raises(crud.TargetDoesNotExistError):
+        crud.read_scrape_timeouts(dummy_db, 3)
+
+
+def test_read_changes(dummy_db: Session):
+    result = crud.read_changes(dummy_db, 0, 10)
+
+    assert [(c.table_name, c.operation) for c, _, _ in result] == [
+        ("scrape_targets", "insert"),
+        ("scrape_targets", "insert"),
+        ("scraped_data", "insert"),
+    ]
+    assert isinstance(result[0][0], ChangeLog)
+    assert isinstance(result[0][1], ScrapeTargets)
+    assert isinstance(result[2][2], ScrapedData)
+
+
+def test_read_changes_delete(dummy_db: Session):
+    crud.delete_scrape_data(dummy_db, 1)
+    result = crud.read_changes(dummy_db, 3, 10)
+
+    assert len(result) == 1
+    change, target, scraped_data = result[0]
+    assert (change.table_name, change.row_id, change.operation) == ("scraped_data", 1, "delete")
+    assert target is None
+    assert scraped_data is None
+
+
+def test_read_changes_limit(dummy_db: Session):
+    result = crud.read_changes(dummy_db, 1, 1)
+
+    assert len(result) == 1
+    assert result[0][0].id == 2  # noqa: PLR2004
+
+
+@pytest.fixture()
+def overdue_db(dummy_db: Session):
+    now = utcnow()
+    crud.read_target(dummy_db, 1).last_scraped = now - timedelta(days=3)
+    crud.read_target(dummy_db, 2).last_scraped = now - timedelta(days=2)
+    dummy_db.commit()
+    return dummy_db
+
+
+def test_claim_due_targets(overdue_db: Session):
+    result = crud.claim_due_targets(overdue_db, "worker-a", 10, 60)
+
+    assert [target.id for target in result] == [1, 2]
+    assert all(target.leased_by == "worker-a" for target in result)
+    assert crud.claim_due_targets(overdue_db, "worker-b", 10, 60) == []
+
+
+def test_claim_due_targets_limit(overdue_db: Session):
+    result = crud.claim_due_targets(overdue_db, "worker-a", 1, 60)
+
+    assert [target.id for target in result] == [1]
+    assert [t.id for t in crud.claim_due_targets(overdue_db, "worker-b", 10, 60)] == [2]
+
+
+def test_claim_due_targets_not_due(dummy_db: Session):
+    assert crud.claim_due_targets(dummy_db, "worker-a", 10, 60) == []
+
+
+def test_claim_due_targets_expired_lease(overdue_db: Session):
+    crud.claim_due_targets(overdue_db, "worker-a", 10, -1)
+    result = crud.claim_due_targets(overdue_db, "worker-b", 10, 60)
+
+    assert [target.leased_by for target in result] == ["worker-b", "worker-b"]
+
+
+def test_renew_target_lease(overdue_db: Session):
+    crud.claim_due_targets(overdue_db, "worker-a", 1, 60)
+
+    assert crud.renew_target_lease(overdue_db, 1, "worker-a", 60)
+    assert not crud.renew_target_lease(overdue_db, 1, "worker-b", 60)
+
+
+def test_release_target_lease(overdue_db: Session):
+    crud.claim_due_targets(overdue_db, "worker-a", 1, 60)
+    crud.release_target_lease(overdue_db, 1, "worker-a")
+
+    target = crud.read_target(overdue_db, 1)
+    assert target.leased_by is None
+    assert target.lease_expires is None
+
+
+def test_release_target_lease_hold_until(overdue_db: Session):
+    hold_until = utcnow() + timedelta(hours=1)
+    crud.claim_due_targets(overdue_db, "worker-a", 1, 60)
+    crud.release_target_lease(overdue_db, 1, "worker-a", hold_until)
+
+    assert crud.read_target(overdue_db, 1).lease_expires == hold_until
+    assert [t.id for t in crud.claim_due_targets(overdue_db, "worker-b", 10, 60)] == [2]
+
+
+def test_create_scrape_data_saves_notification_state(dummy_db: Session):
+    timestamp = datetime(2023, 1, 1, 12, 0, 0)  # noqa: DTZ001
+    assert crud.read_notification_state(dummy_db, 2) is None
+
+    for price in (10.0, 9.0):
+        state = NotificationState(scrape_target_id=2, last_price=price, ewma=9.5, observations=2, updated=timestamp)
+        crud.create_scrape_data(
+            dummy_db,
+            2,
+            price=f"£{price}",
+            title="title",
+            timestamp=timestamp,
+            notification_state=state,
+        )
+
+    assert crud.read_notification_state(dummy_db, 2).last_price == 9.0  # noqa: PLR2004
+
+    crud.delete_target(dummy_db, 2)
+    assert crud.read_notification_state(dummy_db, 2) is None
@@ -1,9 +1,9 @@
 from datetime import timezone
 
-from sqlalchemy import select
+from sqlalchemy import create_engine, select, text
 from sqlalchemy.orm import Session
 
-from src.database.models import ScrapedData, ScrapeTargets
+from src.database.models import Base, ChangeLog, ScrapedData, ScrapeTargets, TargetStats
 
 
 def test_create_scrape_target(empty_db: Session, scrape_target1: ScrapeTargets):
@@ -45,3 +45,100 @@ def test_create_scrape_data(empty_db: Session, scraped_data1: ScrapedData):
     assert retrieved_data.title == scraped_data1.title
     assert retrieved_data.price == scraped_data1.price
     assert retrieved_data.timestamp == scraped_data1.timestamp
+
+
+def test_change_log_records_changes(empty_db: Session, scrape_target1: ScrapeTargets):
+    empty_db.add(scrape_target1)
+    empty_db.commit()
+    scrape_target1.sku = "updated sku"
+    empty_db.commit()
+    empty_db.delete(scrape_target1)
+    empty_db.commit()
+
+    changes = empty_db.scalars(select(ChangeLog).order_by(ChangeLog.id)).all()
+
+    assert [(c.table_name, c.row_id, c.operation) for c in changes] == [
+        ("scrape_targets", 1, "insert"),
+        ("scrape_targets", 1, "update"),
+        ("scrape_targets", 1, "delete"),
+    ]
+
+
+def test_change_log_ignores_internal_updates(empty_db: Session, scrape_target1: ScrapeTargets):
+    empty_db.add(scrape_target1)
+    empty_db.commit()
+    scrape_target1.leased_by = "worker"
+    scrape_target1.page_hash = "hash"
+    scrape_target1.current_interval = 900
+    empty_db.commit()
+
+    changes = empty_db.scalars(select(ChangeLog).order_by(ChangeLog.id)).all()
+
+    assert [c.operation for c in changes] == ["insert"]
+
+
+def test_change_log_backfills_existing_rows():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine, tables=[ScrapeTargets.__table__, ScrapedData.__table__])
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO scrape_targets (site, sku, send_notification, date_added, last_scraped) "
+                "VALUES ('site', 'sku', 1, '2023-01-01 00:00:00', '2023-01-01 00:00:00')",
+            ),
+        )
+
+    Base.metadata.create_all(bind=engine)
+
+    with Session(engine) as session:
+        changes = session.scalars(select(ChangeLog)).all()
+        assert [(c.table_name, c.row_id, c.operation) for c in changes] == [
+            ("scrape_targets", 1, "insert"),
+        ]
+
+
+def test_target_stats_backfills_existing_rows():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine, tables=[ScrapeTargets.__table__, ScrapedData.__table__])
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO scrape_targets (site, sku, send_notification, date_added, last_scraped) "
+                "VALUES ('site', 'sku', 1, '2023-01-01 00:00:00', '2023-01-01 00:00:00')",
+            ),
+        )
+        connection.execute(
+            text(
+                "INSERT INTO scraped_data (scrape_target_id, title, price, timestamp) "
+                "VALUES (1, 'title', '£4', '2023-01-01 00:00:00'), (1, 'title', '£8', '2023-01-02 00:00:00')",
+            ),
+        )
+
+    Base.metadata.create_all(bind=engine)
+
+    with Session(engine) as session:
+        stats = session.get(TargetStats, 1)
+        assert (stats.count, stats.min_price, stats.max_price, stats.mean_price) == (2, 4, 8, 6)
+
+
+def test_target_search_indexes_existing_rows():
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE scrape_targets (id INTEGER PRIMARY KEY, site VARCHAR, sku VARCHAR, "
+                "send_notification BOOLEAN, date_added DATETIME, last_scraped DATETIME)",
+            ),
+        )
+        connection.execute(
+            text(
+                "INSERT INTO scrape_targets (site, sku, send_notification, date_added, last_scraped) "
+                "VALUES ('site', 'sku', 1, '2023-01-01 00:00:00', '2023-01-01 00:00:00')",
+            ),
+        )
+
+    Base.metadata.create_all(bind=engine)
+
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT rowid, sku, title FROM target_search WHERE target_search MATCH 'sku'"))
+        assert rows.all() == [(1, "sku", "")]
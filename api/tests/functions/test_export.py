@@ -0,0 +1,65 @@
+from datetime import datetime
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from sqlalchemy.orm import Session
+
+from src.database import crud
+from src.functions.export import STATE_FILE, export_scrape_data, read_last_exported_id
+
+
+def read_dataset(directory: Path) -> list[dict]:
+    return ds.dataset(directory, partitioning="hive").to_table().sort_by("id").to_pylist()
+
+
+def test_export_scrape_data(dummy_db: Session, tmp_path: Path):
+    crud.create_scrape_data(dummy_db, 2, price="£1,299.99", title="title", timestamp=datetime(2023, 2, 1))  # noqa: DTZ001
+    crud.create_scrape_data(dummy_db, 2, price="n/a", title="title", timestamp=datetime(2023, 3, 1))  # noqa: DTZ001
+
+    result = export_scrape_data(dummy_db, tmp_path)
+
+    assert (result.rows, result.last_id) == (3, 3)
+    rows = read_dataset(tmp_path)
+    assert [(row["id"], row["scrape_target_id"], row["price"]) for row in rows] == [(1, 1, 10), (2, 2, 1299.99), (3, 2, None)]
+    assert rows[1]["timestamp"] == datetime(2023, 2, 1)  # noqa: DTZ001
+    assert (rows[1]["site"], rows[1]["month"], rows[1]["price_text"]) == ("test site2", "2023-02", "£1,299.99")
+    # the partition values are URI encoded in the directory names
+    assert {Path(file).parent.relative_to(tmp_path).as_posix() for file in result.files} >= {
+        "site=test%20site2/month=2023-02",
+        "site=test%20site2/month=2023-03",
+    }
+
+
+def test_export_scrape_data_typed_columns(dummy_db: Session, tmp_path: Path):
+    export_scrape_data(dummy_db, tmp_path)
+
+    schema = ds.dataset(tmp_path, partitioning="hive").schema
+    assert schema.field("price").type == pa.float64()
+    assert schema.field("timestamp").type == pa.timestamp("us")
+    assert schema.field("scrape_target_id").type == pa.int64()
+
+
+def test_export_scrape_data_is_incremental(dummy_db: Session, tmp_path: Path):
+    export_scrape_data(dummy_db, tmp_path)
+    crud.create_scrape_data(dummy_db, 2, price="£5", title="title", timestamp=datetime(2023, 2, 1))  # noqa: DTZ001
+    crud.create_scrape_data(dummy_db, 1, price="£6", title="title", timestamp=datetime(2023, 2, 2))  # noqa: DTZ001
+
+    result = export_scrape_data(dummy_db, tmp_path, batch_size=1)
+
+    assert (result.rows, result.last_id, len(result.files)) == (2, 3, 2)
+    assert read_last_exported_id(tmp_path) == 3  # noqa: PLR2004
+    assert [row["id"] for row in read_dataset(tmp_path)] == [1, 2, 3]
+
+
+def test_export_scrape_data_nothing_new(dummy_db: Session, tmp_path: Path):
+    export_scrape_data(dummy_db, tmp_path)
+
+    result = export_scrape_data(dummy_db, tmp_path)
+
+    assert (result.rows, result.last_id, result.files) == (0, 1, [])
+
+
+def test_read_last_exported_id_no_export(tmp_path: Path):
+    assert read_last_exported_id(tmp_path) == 0
+    assert not (tmp_path / STATE_FILE).exists()
@@ -0,0 +1,81 @@
+import secrets
+from pathlib import Path
+
+import pytest
+
+from src.functions.html_dumps import HtmlDumpStore
+
+PAGE = "<html>" + "<p>Please solve the captcha</p>" * 1000 + "</html>"
+
+
+def random_page() -> str:
+    # random content doesn't compress, so every blob is about the same size
+    return f"<html>{secrets.token_hex(2000)}</html>"
+
+
+@pytest.fixture()
+def clock(mocker):
+    clock = mocker.patch("src.functions.html_dumps.time")
+    clock.time.return_value = 1000.0
+    return clock
+
+
+def blobs(directory: Path) -> list[Path]:
+    return list(directory.glob("*/*.html.gz"))
+
+
+def test_dump_deduplicates(tmp_path: Path):
+    with HtmlDumpStore(tmp_path, max_bytes=10**6, max_age=3600) as store:
+        store.dump(1, "sku1", PAGE)
+        store.dump(1, "sku1", PAGE)
+        store.dump(2, "sku2", PAGE)
+        store.flush()
+
+        dumps = store.read_dumps(1)
+        assert [dump.sku for dump in dumps] == ["sku1", "sku1"]
+        assert dumps[0].digest == store.read_dumps(2)[0].digest
+        assert store.read_page(dumps[0].digest) == PAGE
+
+    assert len(blobs(tmp_path)) == 1
+    assert blobs(tmp_path)[0].stat().st_size < len(PAGE) / 10
+
+
+def test_dump_evicts_least_recently_used(tmp_path: Path, clock):
+    first, second, third = random_page(), random_page(), random_page()
+    with HtmlDumpStore(tmp_path, max_bytes=5000, max_age=3600) as store:
+        for target_id, page in enumerate((first, second, first, third), start=1):
+            clock.time.return_value += 1
+            store.dump(target_id, f"sku{target_id}", page)
+            store.flush()
+
+        # the second page was dumped least recently so it is evicted
+        assert [dump.target_id for dump in store.read_dumps(2)] == []
+        assert [dump.target_id for dump in store.read_dumps(3)] == [3]
+        assert [dump.target_id for dump in store.read_dumps(4)] == [4]
+        assert store.read_page(store.read_dumps(3)[0].digest) == first
+
+    assert len(blobs(tmp_path)) == 2  # noqa: PLR2004
+
+
+def test_read_page_evicted(tmp_path: Path):
+    with HtmlDumpStore(tmp_path, max_bytes=0, max_age=3600) as store:
+        store.dump(1, "sku1", PAGE)
+        store.flush()
+
+        assert store.read_dumps(1) == []
+        with pytest.raises(FileNotFoundError):
+            store.read_page("0" * 32)
+
+
+def test_dump_removes_old_pages(tmp_path: Path, clock):
+    with HtmlDumpStore(tmp_path, max_bytes=10**6, max_age=60) as store:
+        store.dump(1, "sku1", random_page())
+        store.flush()
+        clock.time.return_value += 61
+        store.dump(2, "sku2", random_page())
+        store.flush()
+
+        assert store.read_dumps(1) == []
+        assert len(store.read_dumps(2)) == 1
+
+    assert len(blobs(tmp_path)) == 1
@@ -1,7 +1,9 @@
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
-from src.functions.utils import write_file
+import pytest
+
+from src.functions.utils import parse_price, write_file
 
 
 def test_write_file():
@@ -9,3 +11,17 @@ def test_write_file():
         file = write_file(directory=Path(tmp_dir), filename="test.txt", content="test")
         assert file.exists()
         assert file.read_text() == "test"
+
+
+@pytest.mark.parametrize(
+    ("price", "amount"),
+    [
+        ("£30.00", 30.0),
+        ("£1,299.99", 1299.99),
+        ("12,50 €", 12.5),
+        ("$5", 5.0),
+        ("Price not found", None),
+    ],
+)
+def test_parse_price(price, amount):
+    assert parse_price(price) == amount
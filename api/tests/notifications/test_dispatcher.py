@@ -0,0 +1,125 @@
+import threading
+
+import pytest
+
+from src.notifications import NotificationDispatcher, NotificationRejectedError
+
+
+class FakeTransport:
+    def __init__(self, failures: int = 0, error: type[Exception] = ConnectionError):
+        self.failures = failures
+        self.error = error
+        self.sent: list[tuple[str, str]] = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def send(self, title: str, message: str) -> None:
+        self.gate.wait()
+        if self.failures:
+            self.failures -= 1
+            msg = "Pushover is down"
+            raise self.error(msg)
+        self.sent.append((title, message))
+
+
+@pytest.fixture()
+def transport():
+    return FakeTransport()
+
+
+def test_notify(transport):
+    with NotificationDispatcher(transport) as dispatcher:
+        dispatcher.notify(1, "Coding Book", "£5.00")
+        dispatcher.notify(2, "Camping Stove", "£30.00")
+
+    assert transport.sent == [("Coding Book", "£5.00"), ("Camping Stove", "£30.00")]
+
+
+def test_notify_does_not_wait_for_transport(transport):
+    transport.gate.clear()
+    with NotificationDispatcher(transport) as dispatcher:
+        dispatcher.notify(1, "Coding Book", "£5.00")
+        assert transport.sent == []
+        transport.gate.set()
+
+    assert transport.sent == [("Coding Book", "£5.00")]
+
+
+def test_notify_coalesces_target(transport):
+    transport.gate.clear()
+    with NotificationDispatcher(transport) as dispatcher:
+        # the first notification is being sent while the others wait
+        dispatcher.notify(2, "Camping Stove", "£30.00")
+        dispatcher.notify(1, "Coding Book", "£5.00")
+        dispatcher.notify(1, "Coding Book", "£4.00")
+        transport.gate.set()
+
+    assert transport.sent[-1] == ("Coding Book", "£4.00")
+    assert ("Coding Book", "£5.00") not in transport.sent
+
+
+def test_notify_drops_when_full(transport):
+    transport.gate.clear()
+    with NotificationDispatcher(transport, queue_size=1, digest=True) as dispatcher:
+        dispatcher.notify(1, "Coding Book", "£5.00")
+        dispatcher.notify(2, "Camping Stove", "£30.00")
+        transport.gate.set()
+
+    assert transport.sent == [("Coding Book", "£5.00")]
+
+
+def test_retries_with_backoff(mocker):
+    sleep = mocker.patch("src.notifications.dispatcher.time.sleep")
+    transport = FakeTransport(failures=2)
+    with NotificationDispatcher(transport, retries=3, backoff=1) as dispatcher:
+        dispatcher.notify(1, "Coding Book", "£5.00")
+
+    assert transport.sent == [("Coding Book", "£5.00")]
+    assert [call.args[0] for call in sleep.call_args_list] == [1, 2]
+
+
+def test_gives_up_after_retries(mocker):
+    mocker.patch("src.notifications.dispatcher.time.sleep")
+    transport = FakeTransport(failures=5)
+    with NotificationDispatcher(transport, retries=2) as dispatcher:
+        dispatcher.notify(1, "Coding Book", "£5.00")
+        dispatcher.notify(2, "Camping Stove", "£30.00")
+
+    assert transport.sent == [("Camping Stove", "£30.00")]
+
+
+def test_gives_up_when_rejected(mocker):
+    sleep = mocker.patch("src.notifications.dispatcher.time.sleep")
+    transport = FakeTransport(failures=1, error=NotificationRejectedError)
+    with NotificationDispatcher(transport, retries=3) as dispatcher:
+        dispatcher.notify(1, "Coding Book", "£5.00")
+        dispatcher.notify(2, "Camping Stove", "£30.00")
+
+    assert transport.sent == [("Camping Stove", "£30.00")]
+    sleep.assert_not_called()
+
+
+def test_digest_is_split(transport):
+    with NotificationDispatcher(transport, digest=True, max_length=30) as dispatcher:
+        dispatcher.notify(1, "Coding Book", "£5.00")
+        dispatcher.notify(2, "Camping Stove", "£30.00")
+        dispatcher.notify(3, "A very long title of a camping stove", "£30.00")
+
+    assert transport.sent == [
+        ("3 price updates (1/3)", "Coding Book: £5.00"),
+        ("3 price updates (2/3)", "Camping Stove: £30.00"),
+        ("3 price updates (3/3)", "A very long title of a campin…"),
+    ]
+
+
+def test_digest(transport):
+    with NotificationDispatcher(transport, digest=True) as dispatcher:
+        dispatcher.notify(1, "Coding Book", "£5.00")
+        dispatcher.notify(2, "Camping Stove", "£30.00")
+        assert transport.sent == []
+        dispatcher.flush()
+        assert transport.sent == [("2 price updates", "Coding Book: £5.00\nCamping Stove: £30.00")]
+
+        dispatcher.notify(1, "Coding Book", "£4.00")
+
+    assert transport.sent[-1] == ("Coding Book", "£4.00")
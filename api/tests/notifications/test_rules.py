@@ -0,0 +1,59 @@
+import pytest
+
+from src.notifications import NotificationRules, PriceState
+
+
+def prices(rules: NotificationRules, *values: float) -> tuple[PriceState, list[list[str]]]:
+    state = None
+    reasons = []
+    for value in values:
+        state, fired = rules.evaluate(state, value)
+        reasons.append(fired)
+    return state, reasons
+
+
+def test_parse():
+    rules = NotificationRules.parse("drop>5%, below_average>12.5%,all_time_low", ewma_alpha=0.5)
+
+    assert rules.drop_percent == 5  # noqa: PLR2004
+    assert rules.below_average_percent == 12.5  # noqa: PLR2004
+    assert rules.all_time_low is True
+    assert rules.any_change is False
+    assert rules.ewma_alpha == 0.5  # noqa: PLR2004
+
+
+def test_parse_unknown_rule():
+    with pytest.raises(ValueError, match="Unknown notification rule 'rise>5%'"):
+        NotificationRules.parse("drop>5%,rise>5%")
+
+
+def test_first_price_is_recorded():
+    state, reasons = prices(NotificationRules(any_change=True, all_time_low=True), 10)
+
+    assert state == PriceState(10, 10, 10, 1)
+    assert reasons == [[]]
+
+
+def test_drop():
+    _, reasons = prices(NotificationRules(drop_percent=5), 10, 9.6, 9, 12, 9)
+
+    assert reasons == [[], [], ["down 6% from 9.60"], [], ["down 25% from 12.00"]]
+
+
+def test_all_time_low():
+    _, reasons = prices(NotificationRules(all_time_low=True), 10, 12, 10, 9.99)
+
+    assert reasons == [[], [], [], ["new all-time low"]]
+
+
+def test_below_average():
+    state, reasons = prices(NotificationRules(below_average_percent=10, ewma_alpha=0.5), 10, 12, 9)
+
+    assert state.ewma == 10  # noqa: PLR2004
+    assert reasons == [[], [], ["18% below the average of 11.00"]]
+
+
+def test_any_change():
+    _, reasons = prices(NotificationRules(any_change=True), 10, 10, 11)
+
+    assert reasons == [[], [], ["was 10.00"]]
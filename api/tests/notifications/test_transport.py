@@ -0,0 +1,65 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from src.notifications import NotificationRejectedError, PushoverTransport
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_POST(self):  # noqa: N802
+        length = int(self.headers["Content-Length"])
+        self.server.received.append(parse_qs(self.rfile.read(length).decode()))
+        self.send_response(self.server.status)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server():
+    server = HTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.received = []
+    server.status = 200
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_send(server):
+    transport = PushoverTransport("token", "user", url=f"http://127.0.0.1:{server.server_port}/1/messages.json")
+    transport.send(title="Coding Book", message="£5.00")
+
+    assert server.received == [
+        {"token": ["token"], "user": ["user"], "title": ["Coding Book"], "message": ["£5.00"], "sound": ["pushover"]},
+    ]
+
+
+def test_send_truncates(server):
+    transport = PushoverTransport("token", "user", url=f"http://127.0.0.1:{server.server_port}/1/messages.json")
+    transport.send(title="T" * 300, message="M" * 2000)
+
+    assert server.received[0]["title"] == ["T" * 249 + "…"]
+    assert server.received[0]["message"] == ["M" * 1023 + "…"]
+
+
+@pytest.mark.parametrize("status", [429, 500])
+def test_send_failed(server, status):
+    server.status = status
+    transport = PushoverTransport("token", "user", url=f"http://127.0.0.1:{server.server_port}/1/messages.json")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        transport.send(title="Coding Book", message="£5.00")
+
+
+def test_send_rejected(server):
+    server.status = 400
+    transport = PushoverTransport("token", "user", url=f"http://127.0.0.1:{server.server_port}/1/messages.json")
+
+    with pytest.raises(NotificationRejectedError):
+        transport.send(title="Coding Book", message="£5.00")
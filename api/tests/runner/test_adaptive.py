@@ -0,0 +1,35 @@
+import pytest
+
+from src.runner import AdaptiveIntervalPolicy
+
+
+@pytest.fixture()
+def policy():
+    return AdaptiveIntervalPolicy(min_interval=900, max_interval=86400, growth=2, shrink=0.5)
+
+
+def test_next_interval_unchanged_price(policy):
+    assert policy.next_interval(3600, 86400, price_changed=False) == 7200  # noqa: PLR2004
+
+
+def test_next_interval_changed_price(policy):
+    assert policy.next_interval(3600, 86400, price_changed=True) == 1800  # noqa: PLR2004
+
+
+def test_next_interval_max(policy):
+    assert policy.next_interval(86400, 86400, price_changed=False) == policy.max_interval
+
+
+def test_next_interval_min(policy):
+    assert policy.next_interval(1000, 86400, price_changed=True) == policy.min_interval
+
+
+def test_next_interval_min_short_scrape_interval(policy):
+    # a target configured to be scraped more often than the shortest interval keeps its own
+    assert policy.next_interval(300, 300, price_changed=False) == 600  # noqa: PLR2004
+    assert policy.next_interval(400, 300, price_changed=True) == 300  # noqa: PLR2004
+
+
+def test_invalid_bounds():
+    with pytest.raises(ValueError, match="min_interval"):
+        AdaptiveIntervalPolicy(min_interval=10, max_interval=5, growth=2, shrink=0.5)
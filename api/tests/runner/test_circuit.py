@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.database import crud
+from src.runner import CircuitBreaker
+
+
+@pytest.fixture()
+def now(mocker):
+    now = datetime(2023, 1, 2, 12, 0, 0)  # noqa: DTZ001
+    return mocker.patch("src.runner.circuit.utcnow", return_value=now)
+
+
+def make_breaker(session: Session, failure_count=3, failure_rate=0.5, min_attempts=10, window=20):
+    return CircuitBreaker(
+        session_factory=lambda: session,
+        failure_count=failure_count,
+        failure_rate=failure_rate,
+        min_attempts=min_attempts,
+        window=window,
+        cooldown=60,
+        max_cooldown=150,
+    )
+
+
+def fail(breaker: CircuitBreaker, site: str, times: int) -> None:
+    for _ in range(times):
+        breaker.record(site, 1, success=False)
+
+
+def test_opens_after_failure_count(empty_db: Session, now):
+    breaker = make_breaker(empty_db)
+    fail(breaker, "amz", 2)
+    assert breaker.allow("amz", 1)
+
+    fail(breaker, "amz", 1)
+
+    assert breaker.state("amz") == "open"
+    assert not breaker.allow("amz", 1)
+    assert breaker.allow("go_od", 1)
+
+
+def test_opens_after_failure_rate(empty_db: Session, now):
+    breaker = make_breaker(empty_db, failure_count=100)
+    for _ in range(5):
+        breaker.record("amz", 1, success=True)
+        breaker.record("amz", 1, success=False)
+
+    assert breaker.state("amz") == "open"
+
+
+def test_half_open_probe(empty_db: Session, now):
+    breaker = make_breaker(empty_db)
+    fail(breaker, "amz", 3)
+    now.return_value += timedelta(seconds=60)
+
+    assert breaker.allow("amz", 1)
+    assert breaker.state("amz") == "half_open"
+    # only one probe at a time
+    assert not breaker.allow("amz", 2)
+
+    breaker.record("amz", 1, success=True)
+    assert breaker.state("amz") == "closed"
+    assert breaker.allow("amz", 1)
+
+
+def test_failed_probe_doubles_cooldown(empty_db: Session, now):
+    breaker = make_breaker(empty_db)
+    fail(breaker, "amz", 3)
+    cooldowns = []
+    for _ in range(3):
+        now.return_value += timedelta(days=1)
+        assert breaker.allow("amz", 1)
+        breaker.record("amz", 1, success=False)
+        cooldowns.append(crud.read_site_circuits(empty_db)[0].cooldown)
+
+    assert cooldowns == [120, 150, 150]
+
+
+def test_state_is_saved(empty_db: Session, now):
+    fail(make_breaker(empty_db), "amz", 3)
+
+    breaker = make_breaker(empty_db)
+
+    assert breaker.state("amz") == "open"
+    assert not breaker.allow("amz", 1)
+
+
+def test_only_probe_closes_circuit(empty_db: Session, now):
+    breaker = make_breaker(empty_db)
+    fail(breaker, "amz", 3)
+    now.return_value += timedelta(seconds=60)
+    assert breaker.allow("amz", 1)
+
+    # a target that was already being scraped when the circuit opened
+    breaker.record("amz", 2, success=True)
+    assert breaker.state("amz") == "half_open"
+
+    breaker.record("amz", 1, success=False)
+    assert breaker.state("amz") == "open"
+
+
+def test_failure_rate_is_over_window(empty_db: Session, now):
+    breaker = make_breaker(empty_db, failure_count=100, min_attempts=4, window=4)
+    fail(breaker, "amz", 1)
+    breaker.record("amz", 1, success=True)
+    fail(breaker, "amz", 1)
+    for _ in range(7):
+        breaker.record("amz", 1, success=True)
+    fail(breaker, "amz", 1)
+    assert breaker.state("amz") == "closed"
+
+    # two of the last four scrapes have failed, though only four of the eleven have
+    fail(breaker, "amz", 1)
+    assert breaker.state("amz") == "open"
+    assert crud.read_site_circuits(empty_db)[0].recent_results == "0011"
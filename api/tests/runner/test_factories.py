@@ -0,0 +1,46 @@
+from src.notifications import NotificationDispatcher
+from src.runner import (
+    AdaptiveIntervalPolicy,
+    create_interval_policy,
+    create_notification_dispatcher,
+    create_notification_rules,
+    create_scrape_job,
+    scrape_target_by_id,
+)
+
+
+def test_create_interval_policy(mocker):
+    mocker.patch("src.settings.ADAPTIVE_INTERVALS", 1)
+    mocker.patch("src.settings.ADAPTIVE_MIN_INTERVAL", 900)
+
+    policy = create_interval_policy()
+
+    assert isinstance(policy, AdaptiveIntervalPolicy)
+    assert policy.min_interval == 900  # noqa: PLR2004
+
+
+def test_create_interval_policy_disabled(mocker):
+    mocker.patch("src.settings.ADAPTIVE_INTERVALS", 0)
+    assert create_interval_policy() is None
+
+
+def test_create_notification_rules(mocker):
+    mocker.patch("src.settings.NOTIFICATION_RULES", "drop>5%")
+    assert create_notification_rules().drop_percent == 5  # noqa: PLR2004
+
+
+def test_create_notification_rules_every_price(mocker):
+    mocker.patch("src.settings.NOTIFICATION_RULES", "")
+    assert create_notification_rules() is None
+
+
+def test_create_scrape_job(mocker):
+    mocker.patch("src.settings.NOTIFICATION_RULES", "all_time_low")
+    with create_notification_dispatcher(digest=True) as notification:
+        job = create_scrape_job(notification)
+
+    assert isinstance(notification, NotificationDispatcher)
+    assert notification.digest is True
+    assert job.func is scrape_target_by_id
+    assert job.keywords["notification"] is notification
+    assert job.keywords["rules"].all_time_low is True
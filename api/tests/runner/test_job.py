@@ -0,0 +1,140 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from src.database import crud
+from src.notifications import NotificationRules
+from src.runner import AdaptiveIntervalPolicy, TargetSnapshot, scrape_target
+from src.scraper import ScrapeTimeoutError
+
+
+@pytest.fixture()
+def scraper(mocker):
+    scraper = mocker.Mock()
+    scraper.run.return_value = True
+    scraper.get_price.return_value = "£5.00"
+    scraper.get_title.return_value = "Coding Book"
+    scraper.get_html.return_value = "<html></html>"
+    scraper.fallbacks = None
+    mocker.patch("src.runner.job.get_scraper", return_value=scraper)
+    return scraper
+
+
+def snapshot(session: Session, target_id: int) -> TargetSnapshot:
+    return TargetSnapshot.from_target(crud.read_target(session, target_id))
+
+
+def test_scrape_target(dummy_db: Session, scraper, mocker):
+    notification = mocker.Mock()
+    last_scraped = crud.read_target(dummy_db, 1).last_scraped
+
+    assert scrape_target(lambda: dummy_db, snapshot(dummy_db, 1), notification) is True
+
+    scraped_data = crud.read_scrape_data_for_target(dummy_db, 1)
+    assert scraped_data[-1].price == "£5.00"
+    assert scraped_data[-1].title == "Coding Book"
+    assert crud.read_target(dummy_db, 1).last_scraped > last_scraped
+    notification.notify.assert_called_once_with(1, title="Coding Book", message="£5.00")
+
+
+def test_scrape_target_logs_fallbacks(dummy_db: Session, scraper, mocker, caplog):
+    scraper.fallbacks = {"price": "json-ld:Offer.price"}
+
+    assert scrape_target(lambda: dummy_db, snapshot(dummy_db, 1), mocker.Mock()) is True
+
+    assert "Found the price of 'test sku1' with fallback 'json-ld:Offer.price'" in caplog.text
+
+
+def test_scrape_target_not_found(dummy_db: Session, scraper, mocker):
+    scraper.run.return_value = False
+    dump_store = mocker.patch("src.runner.job.get_dump_store").return_value
+    notification = mocker.Mock()
+
+    assert scrape_target(lambda: dummy_db, snapshot(dummy_db, 1), notification) is False
+
+    assert len(crud.read_scrape_data_for_target(dummy_db, 1)) == 1
+    dump_store.dump.assert_called_once()
+    assert dump_store.dump.call_args.args[0] == 1
+    notification.notify.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    ("price", "current_interval"),
+    [
+        ("£10", 2 * 86400),  # same price as the dummy data
+        ("£5.00", 86400 // 2),
+    ],
+)
+def test_scrape_target_adapts_interval(dummy_db: Session, scraper, mocker, price, current_interval):
+    scraper.get_price.return_value = price
+    policy = AdaptiveIntervalPolicy(min_interval=60, max_interval=7 * 86400, growth=2, shrink=0.5)
+    scrape_target(lambda: dummy_db, snapshot(dummy_db, 1), mocker.Mock(), policy)
+
+    assert crud.read_target(dummy_db, 1).current_interval == current_interval
+
+
+def test_scrape_target_holds_no_session_while_scraping(dummy_db: Session, scraper, mocker):
+    opened = []
+    scraper.run.side_effect = lambda: not opened
+
+    assert scrape_target(lambda: opened.append(1) or dummy_db, snapshot(dummy_db, 1), mocker.Mock()) is True
+    assert opened == [1]
+
+
+def test_target_snapshot(dummy_db: Session):
+    result = snapshot(dummy_db, 1)
+
+    assert result.id == 1
+    assert result.site == "test site1"
+    assert result.current_interval is None
+
+
+def test_scrape_target_records_timeout(dummy_db: Session, scraper, mocker):
+    scraper.run.side_effect = ScrapeTimeoutError(stage="readiness", seconds=15)
+
+    with pytest.raises(ScrapeTimeoutError):
+        scrape_target(lambda: dummy_db, snapshot(dummy_db, 1), mocker.Mock())
+
+    assert [(t.stage, t.seconds) for t in crud.read_scrape_timeouts(dummy_db, 1)] == [("readiness", 15)]
+
+
+def test_scrape_target_notifies_by_rules(dummy_db: Session, scraper, mocker):
+    rules = NotificationRules(drop_percent=5, all_time_low=True)
+    notification = mocker.Mock()
+
+    for price in ("£10.00", "£9.80", "£9.00", "£9.50"):
+        scraper.get_price.return_value = price
+        scrape_target(lambda: dummy_db, snapshot(dummy_db, 1), notification, rules=rules)
+
+    # the first price is recorded, the 2% drop is a new low, the 8% drop meets both rules
+    assert [call.kwargs["message"] for call in notification.notify.call_args_list] == [
+        "£9.80 (new all-time low)",
+        "£9.00 (down 8% from 9.80, new all-time low)",
+    ]
+    state = crud.read_notification_state(dummy_db, 1)
+    assert (state.last_price, state.observations) == (9.5, 4)
+
+
+def test_scrape_target_all_time_low_uses_target_stats(dummy_db: Session, scraper, mocker):
+    rules = NotificationRules(all_time_low=True)
+    notification = mocker.Mock()
+    for price in ("£10.00", "£9.00"):
+        scraper.get_price.return_value = price
+        scrape_target(lambda: dummy_db, snapshot(dummy_db, 1), notification, rules=rules)
+
+    # once the lowest price is deleted the statistics no longer count it
+    lowest = next(data for data in crud.read_scrape_data_for_target(dummy_db, 1) if data.price == "£9.00")
+    crud.delete_scrape_data(dummy_db, lowest.id)
+    scraper.get_price.return_value = "£9.50"
+    scrape_target(lambda: dummy_db, snapshot(dummy_db, 1), notification, rules=rules)
+
+    assert notification.notify.call_args.kwargs["message"] == "£9.50 (new all-time low)"
+
+
+def test_scrape_target_notifies_unparsable_price(dummy_db: Session, scraper, mocker):
+    scraper.get_price.return_value = "Call for price"
+    notification = mocker.Mock()
+
+    scrape_target(lambda: dummy_db, snapshot(dummy_db, 1), notification, rules=NotificationRules(all_time_low=True))
+
+    notification.notify.assert_called_once_with(1, title="Coding Book", message="Call for price")
+    assert crud.read_notification_state(dummy_db, 1) is None
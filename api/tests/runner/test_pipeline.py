@@ -0,0 +1,260 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from src.runner import ScrapePipeline, TargetSnapshot, pipeline
+from src.scraper import (
+    AmazonGoogleScraper,
+    AmazonScraper,
+    Extraction,
+    HostRateLimiter,
+    ScrapeTimeoutError,
+    Timeouts,
+)
+
+PAGE = """
+    <html>
+        <span class="a-offscreen">£30.00</span>
+        <span id="productTitle">Coding Book</span>
+    </html>
+    """
+
+
+def snapshot(target_id: int, site: str = "amz") -> TargetSnapshot:
+    return TargetSnapshot(
+        id=target_id,
+        site=site,
+        sku=f"sku{target_id}",
+        send_notification=False,
+        scrape_interval=86400,
+        current_interval=None,
+    )
+
+
+@pytest.fixture()
+def fetch(mocker):
+    return mocker.patch.object(AmazonScraper, "fetch", return_value=PAGE)
+
+
+def run_pipeline(products, executor, **kwargs):
+    persisted = []
+    errors = []
+    pipeline = ScrapePipeline(
+        persist=lambda product, scraper, found, hashes: persisted.append((product.id, scraper.get_price(), found)),
+        on_error=lambda product, error: errors.append((product.id, str(error))),
+        executor=executor,
+        fetch_workers=kwargs.get("fetch_workers", 2),
+        parse_workers=kwargs.get("parse_workers", 2),
+        queue_size=kwargs.get("queue_size", 1),
+        rate_limiter=kwargs.get("rate_limiter"),
+        timeouts=kwargs.get("timeouts", lambda site: Timeouts()),
+        unchanged=kwargs.get("unchanged"),
+    )
+    asyncio.run(pipeline.run(products))
+    return persisted, errors
+
+
+def test_run_parses_in_process_pool(fetch):
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        persisted, errors = run_pipeline([snapshot(i) for i in range(1, 6)], executor)
+
+    assert sorted(persisted) == [(i, "£30.00", True) for i in range(1, 6)]
+    assert errors == []
+    assert fetch.call_count == 5  # noqa: PLR2004
+
+
+def test_run_not_found(fetch):
+    fetch.return_value = "<html></html>"
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        persisted, errors = run_pipeline([snapshot(1)], executor)
+
+    assert persisted == [(1, AmazonScraper.PRICE_404, False)]
+
+
+def test_run_errors(fetch):
+    fetch.side_effect = [RuntimeError("blocked"), 42]
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        persisted, errors = run_pipeline(
+            [snapshot(1), snapshot(2), snapshot(3, site="nope")],
+            executor,
+            fetch_workers=1,
+        )
+
+    assert persisted == []
+    assert sorted(target_id for target_id, _ in errors) == [1, 2, 3]
+    assert "blocked" in errors[0][1]
+
+
+def test_extract_is_picklable():
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        result = executor.submit(AmazonScraper("sku").extract, PAGE).result()
+
+    assert (result.price, result.title) == ("£30.00", "Coding Book")
+
+
+def test_run_prefetches_within_rate_limit(fetch, mocker):
+    loading = []
+    most_loading = []
+
+    def slow_fetch():
+        loading.append(1)
+        most_loading.append(len(loading))
+        time.sleep(0.05)
+        loading.pop()
+        return PAGE
+
+    fetch.side_effect = slow_fetch
+    limiter = HostRateLimiter(min_interval=0)
+    reserve = mocker.spy(limiter, "reserve")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        persisted, _ = run_pipeline(
+            [snapshot(i) for i in range(1, 5)],
+            executor,
+            fetch_workers=3,
+            rate_limiter=limiter,
+        )
+
+    assert len(persisted) == 4  # noqa: PLR2004
+    assert max(most_loading) > 1
+    assert reserve.call_count == 4  # noqa: PLR2004
+
+
+def slow_extract(self, html):
+    time.sleep(0.5)
+
+
+def test_run_parse_timeout(fetch, mocker):
+    mocker.patch.object(AmazonScraper, "extract", slow_extract)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        _, errors = run_pipeline([snapshot(1)], executor, timeouts=lambda site: Timeouts(parse=0.01))
+
+    assert errors[0][0] == 1
+    assert "parse timed out" in errors[0][1]
+
+
+def test_run_uses_site_timeouts(fetch, mocker):
+    timeouts = mocker.Mock(return_value=Timeouts(navigation=5))
+    get_scraper = mocker.spy(pipeline, "get_scraper")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        run_pipeline([snapshot(1)], executor, timeouts=timeouts)
+
+    timeouts.assert_called_once_with("amz")
+    assert get_scraper.call_args.kwargs["timeouts"] == Timeouts(navigation=5)
+
+
+def test_run_keeps_scraper_errors(fetch):
+    fetch.side_effect = ScrapeTimeoutError(stage="connect", seconds=1)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        _, errors = run_pipeline([snapshot(1)], executor)
+
+    assert errors == [(1, "connect timed out after 1s")]
+
+
+def test_run_fetches_each_search_once(mocker):
+    fetch = mocker.patch.object(AmazonGoogleScraper, "fetch", return_value="<html></html>")
+    products = [snapshot(i, site="amz-g") for i in range(1, 4)]
+    products[1] = products[1]._replace(sku="SKU1 ")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        persisted, errors = run_pipeline(products, executor, fetch_workers=3)
+
+    assert fetch.call_count == 2  # noqa: PLR2004
+    assert sorted(product_id for product_id, _, _ in persisted) == [1, 2, 3]
+    assert errors == []
+
+
+def test_run_shares_fetch_errors(mocker):
+    msg = "blocked"
+    fetch = mocker.patch.object(AmazonGoogleScraper, "fetch", side_effect=RuntimeError(msg))
+    products = [snapshot(1, site="amz-g"), snapshot(2, site="amz-g")._replace(sku="sku1")]
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        _, errors = run_pipeline(products, executor)
+
+    fetch.assert_called_once()
+    assert [product_id for product_id, _ in sorted(errors)] == [1, 2]
+
+
+def test_run_skips_unchanged_page(fetch, mocker):
+    extract = mocker.spy(AmazonScraper, "extract")
+    scraper = AmazonScraper("sku1")
+    product = snapshot(1)._replace(page_hash=scraper.page_hash(PAGE), content_hash="content")
+    unchanged = mocker.Mock()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        persisted, errors = run_pipeline([product], executor, unchanged=unchanged)
+
+    assert persisted == errors == []
+    extract.assert_not_called()
+    unchanged.assert_called_once_with(product, (scraper.page_hash(PAGE), "content"))
+
+
+def test_run_skips_unchanged_content(fetch, mocker):
+    content_hash = Extraction(price="£30.00", title="Coding Book").digest()
+    products = [snapshot(1)._replace(page_hash="old", content_hash=content_hash), snapshot(2)]
+    unchanged = mocker.Mock()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        persisted, _ = run_pipeline(products, executor, unchanged=unchanged)
+
+    assert persisted == [(2, "£30.00", True)]
+    assert unchanged.call_args.args[1].content == content_hash
+
+
+def test_run_does_not_hash_when_off(fetch, mocker):
+    page_hash = mocker.spy(AmazonScraper, "page_hash")
+    product = snapshot(1)._replace(page_hash=AmazonScraper("sku1").page_hash(PAGE))
+    page_hash.reset_mock()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        persisted, _ = run_pipeline([product], executor)
+
+    assert persisted == [(1, "£30.00", True)]
+    page_hash.assert_not_called()
+
+
+def test_run_frees_pages(fetch, mocker):
+    parsed = []
+    mocker.patch.object(pipeline.ScrapePipeline, "_persist", lambda self, item: parsed.append(item))
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        run_pipeline([snapshot(1)], executor)
+
+    assert parsed[0].html is None
+    assert parsed[0].scraper.get_html() is None
+
+
+def test_run_frees_pages_not_fetched(mocker):
+    fetch = mocker.patch.object(AmazonGoogleScraper, "fetch", return_value="<html></html>")
+    errors = []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        scrape_pipeline = ScrapePipeline(
+            persist=mocker.Mock(),
+            on_error=lambda product, error: errors.append(product.id),
+            executor=executor,
+            fetch_workers=1,
+            parse_workers=1,
+            queue_size=1,
+            deadline=time.monotonic(),
+        )
+        asyncio.run(scrape_pipeline.run([snapshot(1, site="amz-g"), snapshot(2, site="amz-g")._replace(sku="sku1")]))
+
+    fetch.assert_not_called()
+    assert sorted(errors) == [1, 2]
+    assert scrape_pipeline._pages == {}  # noqa: SLF001
+    assert not scrape_pipeline._page_users  # noqa: SLF001
+
+
+def test_run_persists_off_the_event_loop(fetch):
+    threads = []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        scrape_pipeline = ScrapePipeline(
+            persist=lambda product, scraper, found, hashes: threads.append(threading.get_ident()),
+            on_error=lambda product, error: None,
+            executor=executor,
+            fetch_workers=1,
+            parse_workers=1,
+            queue_size=1,
+            timeouts=lambda site: Timeouts(),
+        )
+        asyncio.run(scrape_pipeline.run([snapshot(1)]))
+
+    assert threads
+    assert threads[0] != threading.get_ident()
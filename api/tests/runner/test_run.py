@@ -0,0 +1,159 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.database import crud
+from src.database.models import ScrapeRun
+from src.runner import ContentHashes, scrape_all
+from src.scraper import Extraction, ScrapeTimeoutError, Timeouts
+
+
+@pytest.fixture()
+def executor():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        yield executor
+
+
+@pytest.fixture()
+def scraper(mocker):
+    scraper = mocker.Mock()
+    scraper.URL = "https://www.example.com/product"
+    scraper.timeouts = Timeouts()
+    scraper.fetch.return_value = "<html></html>"
+    scraper.extract.return_value = Extraction(price="£5.00", title="Coding Book")
+    scraper.load.return_value = True
+
+    def create_scraper(site, product_id, browser, timeouts):
+        # each target fetches a page of its own
+        target_scraper = mocker.Mock(wraps=scraper, URL=scraper.URL, timeouts=scraper.timeouts)
+        target_scraper.page_key.return_value = f"{scraper.URL}/{product_id}"
+        return target_scraper
+
+    mocker.patch("src.runner.pipeline.get_scraper", side_effect=create_scraper)
+    return scraper
+
+
+@pytest.fixture()
+def save_result(mocker, scraper):
+    return mocker.patch("src.runner.run.save_result", return_value=True)
+
+
+@pytest.fixture()
+def recorded(mocker):
+    return mocker.spy(crud, "record_scrape_run_target")
+
+
+def statuses(recorded) -> list[tuple[int, str]]:
+    return [(call.args[2], call.args[3]) for call in recorded.call_args_list]
+
+
+def run(session: Session, executor: ThreadPoolExecutor, mocker, **kwargs) -> int:
+    return scrape_all(lambda: session, mocker.Mock(), host_interval=0, executor=executor, **kwargs)
+
+
+def test_scrape_all(dummy_db: Session, executor, save_result, mocker):
+    assert run(dummy_db, executor, mocker) == 2  # noqa: PLR2004
+
+    assert [call.args[1].id for call in save_result.call_args_list] == [1, 2]
+    assert crud.start_scrape_run(dummy_db).id == 2  # noqa: PLR2004
+
+
+def test_scrape_all_records_status(dummy_db: Session, executor, scraper, save_result, mocker, recorded):  # noqa: PLR0913
+    msg = "blocked"
+    scraper.fetch.side_effect = [RuntimeError(msg), "<html></html>"]
+
+    run(dummy_db, executor, mocker)
+
+    scrape_run = dummy_db.get(ScrapeRun, 1)
+    assert scrape_run.finished is not None
+    assert statuses(recorded) == [(1, "failed"), (2, "success")]
+    # the statuses are deleted once the run has finished
+    assert scrape_run.targets == []
+    assert save_result.call_count == 1
+
+
+def test_scrape_all_resumes(dummy_db: Session, executor, save_result, mocker):
+    save_result.side_effect = [True, KeyboardInterrupt]
+    with pytest.raises(KeyboardInterrupt):
+        run(dummy_db, executor, mocker)
+    save_result.side_effect = None
+
+    assert run(dummy_db, executor, mocker) == 1
+    assert save_result.call_args.args[1].id == 2  # noqa: PLR2004
+
+
+def test_scrape_all_resume_retries_failed(dummy_db: Session, executor, scraper, save_result, mocker):
+    msg = "blocked"
+    scraper.fetch.side_effect = [RuntimeError(msg), "<html></html>"]
+    save_result.side_effect = [KeyboardInterrupt]
+    with pytest.raises(KeyboardInterrupt):
+        run(dummy_db, executor, mocker)
+    scraper.fetch.side_effect = None
+    save_result.side_effect = None
+
+    # the failed target is retried when the run is resumed
+    assert run(dummy_db, executor, mocker) == 2  # noqa: PLR2004
+    assert [call.args[1].id for call in save_result.call_args_list[1:]] == [1, 2]
+
+
+def test_scrape_all_freshness_window(dummy_db: Session, executor, save_result, mocker):
+    assert run(dummy_db, executor, mocker, freshness_window=3600) == 0
+    save_result.assert_not_called()
+
+
+def test_scrape_all_skips_open_circuit(dummy_db: Session, executor, save_result, mocker, recorded):
+    breaker = mocker.Mock()
+    breaker.allow.side_effect = [False, True]
+
+    run(dummy_db, executor, mocker, breaker=breaker)
+
+    assert statuses(recorded) == [(1, "skipped"), (2, "success")]
+    breaker.record.assert_called_once_with("test site2", 2, success=True)
+
+
+def test_scrape_all_records_timeouts(dummy_db: Session, executor, scraper, save_result, mocker):
+    scraper.fetch.side_effect = [ScrapeTimeoutError(stage="navigation", seconds=30), "<html></html>"]
+
+    run(dummy_db, executor, mocker)
+
+    timeouts = crud.read_scrape_timeouts(dummy_db, 1)
+    assert [(t.stage, t.seconds, t.scrape_run_id) for t in timeouts] == [("navigation", 30, 1)]
+
+
+def test_scrape_all_deadline_defers(dummy_db: Session, executor, save_result, mocker):
+    mocker.patch("src.runner.run.time").monotonic.return_value = 0.0
+    monotonic = mocker.patch("src.runner.pipeline.time.monotonic", return_value=1000.0)
+
+    assert run(dummy_db, executor, mocker, deadline=10) == 0
+    save_result.assert_not_called()
+
+    # the deferred targets are resumed by the next run
+    monotonic.return_value = 5.0
+    assert run(dummy_db, executor, mocker, deadline=10) == 2  # noqa: PLR2004
+    assert crud.start_scrape_run(dummy_db).id == 2  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(("mode", "observations"), [("skip", 0), ("count", 1)])
+def test_scrape_all_unchanged(dummy_db: Session, executor, scraper, save_result, mocker, recorded, mode, observations):  # noqa: PLR0913
+    scraper.page_hash.return_value = "page"
+    target = crud.read_target(dummy_db, 1)
+    target.page_hash, target.content_hash = "page", "content"
+    dummy_db.commit()
+
+    last_scraped = target.last_scraped
+
+    run(dummy_db, executor, mocker, unchanged=mode)
+
+    assert statuses(recorded) == [(1, "unchanged"), (2, "success")]
+    target = crud.read_target(dummy_db, 1)
+    assert target.unchanged_observations == observations
+    assert target.last_scraped > last_scraped
+    save_result.assert_called_once()
+    hashes = ContentHashes("page", Extraction(price="£5.00", title="Coding Book").digest())
+    assert save_result.call_args.kwargs["hashes"] == hashes
+
+
+def test_scrape_all_unknown_unchanged_mode(dummy_db: Session, executor, mocker):
+    with pytest.raises(ValueError, match="Unknown unchanged mode"):
+        run(dummy_db, executor, mocker, unchanged="sometimes")
@@ -0,0 +1,140 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.database import crud
+from src.database.models import ScrapeTargets
+from src.runner import ScrapeScheduler
+
+
+@pytest.fixture()
+def now():
+    return datetime(2023, 1, 2, 12, 0, 0)  # noqa: DTZ001
+
+
+@pytest.fixture()
+def due_db(dummy_db: Session, now: datetime):
+    # target 1 is 2 hours overdue and target 2 is 1 hour overdue
+    for target_id, hours in ((1, 26), (2, 25)):
+        target = crud.read_target(dummy_db, target_id)
+        target.last_scraped = now - timedelta(hours=hours)
+    dummy_db.commit()
+    return dummy_db
+
+
+def make_scheduler(session: Session, job=None, workers=2):
+    return ScrapeScheduler(
+        job=job or (lambda target_id: True),
+        session_factory=lambda: session,
+        workers=workers,
+        refresh_interval=60,
+        retry_interval=900,
+    )
+
+
+def test_pop_due_most_overdue_first(due_db: Session, now: datetime):
+    scheduler = make_scheduler(due_db)
+    scheduler.refresh()
+
+    assert scheduler.pop_due(now, limit=10) == [1, 2]
+    assert scheduler.pop_due(now, limit=10) == []
+
+
+def test_pop_due_limit(due_db: Session, now: datetime):
+    scheduler = make_scheduler(due_db)
+    scheduler.refresh()
+
+    assert scheduler.pop_due(now, limit=1) == [1]
+
+
+def test_pop_due_not_due(due_db: Session, now: datetime):
+    scheduler = make_scheduler(due_db)
+    scheduler.refresh()
+
+    assert scheduler.pop_due(now - timedelta(hours=3), limit=10) == []
+    assert scheduler.seconds_until_due(now - timedelta(hours=3)) == 3600  # noqa: PLR2004
+
+
+def test_refresh_picks_up_changes(due_db: Session, now: datetime):
+    scheduler = make_scheduler(due_db)
+    scheduler.refresh()
+
+    # target 2 is now scraped every 2 days so it is no longer due
+    crud.read_target(due_db, 2).scrape_interval = 2 * 24 * 60 * 60
+    due_db.add(
+        ScrapeTargets(
+            site="new site",
+            sku="new sku",
+            send_notification=False,
+            date_added=now,
+            last_scraped=now - timedelta(days=7),
+        ),
+    )
+    due_db.commit()
+    scheduler.refresh()
+
+    assert scheduler.pop_due(now, limit=10) == [3, 1]
+
+
+def test_refresh_skips_in_flight(due_db: Session, now: datetime):
+    scheduler = make_scheduler(due_db)
+    scheduler.refresh()
+    scheduler.pop_due(now, limit=1)
+    scheduler.refresh()
+
+    assert scheduler.pop_due(now, limit=10) == [2]
+
+
+def test_failed_job_waits_for_retry_interval(due_db: Session, now: datetime):
+    scheduler = make_scheduler(due_db, job=lambda target_id: False)
+    scheduler.refresh()
+    scheduler.pop_due(now, limit=1)
+    scheduler._run_job(1)  # noqa: SLF001
+    scheduler.refresh()
+
+    assert scheduler.pop_due(now, limit=10) == [2]
+
+
+def test_successful_job_is_not_held(due_db: Session, now: datetime):
+    scheduler = make_scheduler(due_db, job=lambda target_id: False)
+    scheduler.refresh()
+    scheduler.pop_due(now, limit=1)
+    scheduler._run_job(1)  # noqa: SLF001
+    scheduler.job = lambda target_id: True
+    scheduler.pop_due(now, limit=1)
+    scheduler._run_job(2)  # noqa: SLF001
+    scheduler.refresh()
+
+    # the job does not save a scrape so the successful target is due again at once
+    assert scheduler.pop_due(now, limit=10) == [2]
+
+
+def test_job_error_is_logged(due_db: Session, now: datetime, caplog):
+    def job(target_id):
+        msg = "boom"
+        raise ValueError(msg)
+
+    scheduler = make_scheduler(due_db, job=job)
+    scheduler._run_job(1)  # noqa: SLF001
+
+    assert "boom" in caplog.text
+
+
+def test_run(due_db: Session):
+    scraped = []
+
+    def job(target_id):
+        scraped.append(target_id)
+        if len(scraped) == 2:  # noqa: PLR2004
+            scheduler.stop()
+        return True
+
+    scheduler = make_scheduler(due_db, job=job, workers=1)
+    timer = threading.Timer(5, scheduler.stop)
+    timer.start()
+    scheduler.run()
+    timer.cancel()
+
+    assert scraped == [1, 2]
@@ -0,0 +1,118 @@
+import multiprocessing
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from src.database import crud
+from src.database.models import Base, ScrapeTargets
+from src.functions.utils import utcnow
+from src.runner import LeaseWorker
+
+TARGETS = 20
+
+
+@pytest.fixture()
+def overdue_db(dummy_db: Session):
+    now = utcnow()
+    for target_id in (1, 2):
+        crud.read_target(dummy_db, target_id).last_scraped = now - timedelta(days=2)
+    dummy_db.commit()
+    return dummy_db
+
+
+def make_worker(session_factory, job, worker_id="worker-a", batch_size=5):
+    return LeaseWorker(
+        worker_id=worker_id,
+        job=job,
+        session_factory=session_factory,
+        batch_size=batch_size,
+        lease_seconds=60,
+        retry_interval=900,
+        poll_interval=0.01,
+    )
+
+
+def test_run_once(overdue_db: Session):
+    scraped = []
+
+    def job(target_id):
+        scraped.append(target_id)
+        target = crud.read_target(overdue_db, target_id)
+        target.last_scraped = utcnow()
+        overdue_db.commit()
+        return True
+
+    worker = make_worker(lambda: overdue_db, job)
+
+    assert worker.run_once() == 2  # noqa: PLR2004
+    assert scraped == [1, 2]
+    assert crud.read_target(overdue_db, 1).leased_by is None
+    assert worker.run_once() == 0
+
+
+def test_run_once_failure_holds_target(overdue_db: Session):
+    def job(target_id):
+        msg = "boom"
+        raise RuntimeError(msg)
+
+    worker = make_worker(lambda: overdue_db, job)
+
+    assert worker.run_once() == 2  # noqa: PLR2004
+    assert crud.read_target(overdue_db, 1).lease_expires is not None
+    assert worker.run_once() == 0
+
+
+def test_run_once_lost_lease(overdue_db: Session, monkeypatch: pytest.MonkeyPatch):
+    scraped = []
+    worker = make_worker(lambda: overdue_db, lambda target_id: scraped.append(target_id) or True)
+    monkeypatch.setattr(crud, "renew_target_lease", lambda *args: False)
+
+    worker.run_once()
+
+    assert scraped == []
+
+
+def _work(db_path: str, worker_id: str, queue) -> None:
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"timeout": 30})
+
+    def job(target_id):
+        queue.put((worker_id, target_id))
+        with Session(engine) as session:
+            target = session.get(ScrapeTargets, target_id)
+            target.last_scraped = utcnow()
+            session.commit()
+        return True
+
+    worker = make_worker(lambda: Session(engine), job, worker_id=worker_id, batch_size=2)
+    while worker.run_once():
+        pass
+
+
+def test_workers_never_share_a_target(tmp_path: Path):
+    db_path = tmp_path / "shared.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    past = utcnow() - timedelta(days=2)
+    with Session(engine) as session:
+        session.add_all(
+            ScrapeTargets(site="amazon", sku=f"sku{i}", send_notification=False, date_added=past, last_scraped=past)
+            for i in range(TARGETS)
+        )
+        session.commit()
+
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    processes = [ctx.Process(target=_work, args=(str(db_path), f"worker-{i}", queue)) for i in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+
+    claims = [queue.get(timeout=5) for _ in range(TARGETS)]
+    assert queue.empty()
+    assert sorted(target_id for _, target_id in claims) == list(range(1, TARGETS + 1))
+    with Session(engine) as session:
+        assert session.scalars(select(ScrapeTargets).where(ScrapeTargets.leased_by.is_not(None))).all() == []
@@ -30,6 +30,28 @@ def mock_http_get_with_data(mocker, get_html_namespace):
     return mock_get
 
 
+@pytest.fixture()
+def mock_http_get_seller_in_later_details(mocker, get_html_namespace):
+    mock_get = mocker.patch(get_html_namespace)
+    mock_get.return_value = """
+        <html>
+            <div class="KZmu8e">
+                <div class="HUOptb">Free delivery</div>
+                <div class="HUOptb">Amazon.co.uk/fake</div>
+                <h3 class=sh-np__product-title>Coding Book</h3>
+                <span class="T14wmb">£30.00</span>
+            </div>
+            <div class="KZmu8e">
+                <div class="HUOptb">Free delivery</div>
+                <div class="HUOptb">eBay</div>
+                <h3 class=sh-np__product-title>Coding Book</h3>
+                <span class="T14wmb">£5.00</span>
+            </div>
+        </html>
+        """
+    return mock_get
+
+
 @pytest.fixture()
 def mock_http_get_no_data(mocker, get_html_namespace):
     mock_get = mocker.patch(get_html_namespace)
@@ -55,11 +77,20 @@ def test_init(scraper):
     assert expected_url == scraper.URL
 
 
-def test_get_html(mock_http_get_with_data, scraper):
-    # as we've added span tags to the html, we can check for them here instead of checking
-    # for the whole html.
+def test_page_key_ignores_case_and_spacing(scraper):
+    assert AmazonGoogleScraper("  coding   BOOK ").page_key() == scraper.page_key()
+    assert AmazonGoogleScraper("Coding Books").page_key() != scraper.page_key()
+
+
+def test_get_html(mock_http_get_no_data, scraper):
+    # the page is kept for debugging when the price and title are not found
     scraper.run()
-    assert "</span>" in scraper.get_html()
+    assert scraper.get_html() == "<html></html>"
+
+
+def test_get_html_not_kept(mock_http_get_with_data, scraper):
+    assert scraper.run() is True
+    assert scraper.get_html() is None
 
 
 def test_get_html_no_html(mock_http_get_no_html, scraper):
@@ -89,3 +120,9 @@ def test_get_price_no_price(mock_http_get_no_data, scraper):
     result = scraper.run()
     assert result is False
     assert scraper.get_price() == scraper.PRICE_404
+
+
+def test_get_price_seller_in_later_details(mock_http_get_seller_in_later_details, scraper):
+    result = scraper.run()
+    assert result is True
+    assert scraper.get_price() == "£30.00"
@@ -51,11 +51,15 @@ def test_init(scraper):
     assert scraper.URL == "https://www.amazon.co.uk/dp/123456789"
 
 
-def test_get_html(mock_http_get_with_data, scraper):
-    # as we've added span tags to the html, we can check for them here instead of checking
-    # for the whole html.
+def test_get_html(mock_http_get_no_data, scraper):
+    # the page is kept for debugging when the price and title are not found
     scraper.run()
-    assert "</span>" in scraper.get_html()
+    assert scraper.get_html() == "<html></html>"
+
+
+def test_get_html_not_kept(mock_http_get_with_data, scraper):
+    assert scraper.run() is True
+    assert scraper.get_html() is None
 
 
 def test_get_html_no_html(mock_http_get_no_html, scraper):
@@ -85,3 +89,24 @@ def test_get_price_no_price(mock_http_get_no_data, scraper):
     result = scraper.run()
     assert result is False
     assert scraper.get_price() == scraper.PRICE_404
+
+
+def test_reports_sources(mock_http_get_with_data, scraper):
+    scraper.run()
+    assert scraper.sources == {"price": scraper.PRICE_SELECTOR, "title": scraper.TITLE_SELECTOR}
+    assert scraper.fallbacks == {}
+
+
+def test_price_from_json_ld(scraper):
+    html = """
+        <html>
+            <span id="productTitle">Coding Book</span>
+            <script type="application/ld+json">
+                {"@type": "Product", "offers": {"@type": "Offer", "price": 30, "priceCurrency": "GBP"}}
+            </script>
+        </html>
+        """
+    extraction = scraper.extract(html)
+    assert (extraction.price, extraction.title) == ("£30.00", "Coding Book")
+    assert extraction.sources["price"] == "json-ld:Offer.price"
+    assert extraction.fallbacks == {"price": "json-ld:Offer.price"}
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from src.scraper import (
+    AmazonGoogleScraper,
+    AmazonScraper,
+    BrowserPool,
+    HostRateLimiter,
+    ScrapeTimeoutError,
+    Timeouts,
+)
+
+
+class FakePage:
+    loading = 0
+    most_loading = 0
+    consent_wall = True
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    async def query_selector(self, selector):
+        return object() if FakePage.consent_wall else None
+
+    async def goto(self, url, timeout):
+        if url == "https://slow.com":
+            raise PlaywrightTimeoutError(url)
+        FakePage.loading += 1
+        FakePage.most_loading = max(FakePage.most_loading, FakePage.loading)
+        await asyncio.sleep(0.05)
+        FakePage.loading -= 1
+        self.pages.append(url)
+
+    async def click(self, selector, timeout):
+        self.pages.append(selector)
+
+    async def wait_for_load_state(self, state, timeout):
+        if self.pages[-1] == "stuck":
+            raise PlaywrightTimeoutError(state)
+
+    async def content(self):
+        return f"<html>{self.pages[-1]}</html>"
+
+
+@pytest.fixture()
+def playwright(mocker):
+    FakePage.loading = FakePage.most_loading = 0
+    FakePage.consent_wall = True
+    pages = []
+    context = mocker.AsyncMock()
+    context.new_page.return_value = FakePage(pages)
+    context.storage_state.return_value = {"cookies": [{"name": "SOCS"}], "origins": []}
+    browser = mocker.AsyncMock()
+    browser.new_context.return_value = context
+    playwright = mocker.AsyncMock()
+    playwright.chromium.launch.return_value = browser
+    async_playwright = mocker.patch("src.scraper.browser.async_playwright")
+    async_playwright.return_value.start = mocker.AsyncMock(return_value=playwright)
+    playwright.pages = pages
+    return playwright
+
+
+def test_get_content(playwright):
+    with BrowserPool(max_pages=1) as pool:
+        result = pool.get_content("https://www.example.com", {}, Timeouts(), consent_selector="button")
+
+    assert result == "<html>button</html>"
+    assert playwright.pages == ["https://www.example.com", "button"]
+    playwright.chromium.launch.return_value.close.assert_awaited_once()
+
+
+def test_get_content_limits_pages(playwright):
+    with BrowserPool(max_pages=2) as pool, ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(executor.map(lambda i: pool.get_content(f"https://{i}.com", {}, Timeouts()), range(6)))
+
+    assert len(results) == 6  # noqa: PLR2004
+    assert FakePage.most_loading == 2  # noqa: PLR2004
+    playwright.chromium.launch.assert_awaited_once()
+
+
+@pytest.mark.parametrize(
+    ("url", "consent_selector", "stage"),
+    [
+        ("https://slow.com", None, "navigation"),
+        ("https://www.example.com", "stuck", "readiness"),
+    ],
+)
+def test_get_content_timeout(playwright, url, consent_selector, stage):
+    with BrowserPool(max_pages=1) as pool, pytest.raises(ScrapeTimeoutError) as e:
+        pool.get_content(url, {}, Timeouts(navigation=5, readiness=2), consent_selector=consent_selector)
+
+    assert e.value.stage == stage
+    assert e.value.seconds == {"navigation": 5, "readiness": 2}[stage]
+
+
+def get_pages(pool: BrowserPool, count: int) -> None:
+    for i in range(count):
+        pool.get_content(f"https://{i}.com", {}, Timeouts(), consent_selector="button", consent_key="google")
+
+
+def test_get_content_reuses_consent_state(playwright):
+    with BrowserPool(max_pages=2) as pool:
+        get_pages(pool, 1)
+        FakePage.consent_wall = False
+        get_pages(pool, 2)
+
+    # only the first page clicks through the consent wall
+    assert playwright.pages == ["https://0.com", "button", "https://0.com", "https://1.com"]
+    new_context = playwright.chromium.launch.return_value.new_context
+    assert new_context.call_args_list[0].kwargs["storage_state"] is None
+    assert new_context.call_args.kwargs["storage_state"] == {"cookies": [{"name": "SOCS"}], "origins": []}
+
+
+def test_get_content_consent_state_expired(playwright):
+    with BrowserPool(max_pages=1) as pool:
+        get_pages(pool, 2)
+
+    # the consent wall is shown again so the state is captured again
+    assert playwright.pages.count("button") == 2  # noqa: PLR2004
+
+
+def test_get_content_saves_consent_state(playwright, tmp_path: Path):
+    with BrowserPool(max_pages=1, state_dir=tmp_path) as pool:
+        get_pages(pool, 1)
+
+    assert json.loads((tmp_path / "google.json").read_text())["cookies"] == [{"name": "SOCS"}]
+
+    FakePage.consent_wall = False
+    with BrowserPool(max_pages=1, state_dir=tmp_path) as pool:
+        get_pages(pool, 1)
+    assert playwright.pages.count("button") == 1
+
+    with BrowserPool(max_pages=1, state_dir=tmp_path, state_max_age=-1) as pool:
+        get_pages(pool, 1)
+    assert playwright.pages.count("button") == 2  # noqa: PLR2004
+
+
+def test_close_unused_pool():
+    BrowserPool(max_pages=1).close()
+
+
+def test_scraper_uses_browser(mocker):
+    browser = mocker.Mock()
+    browser.get_content.return_value = "<html></html>"
+
+    assert AmazonScraper("123", browser).fetch() == "<html></html>"
+    AmazonGoogleScraper("Coding Book", browser).fetch()
+
+    assert browser.get_content.call_args.kwargs == {
+        "consent_selector": AmazonGoogleScraper.REJECT_COOKIES_SELECTOR,
+        "consent_key": AmazonGoogleScraper.CONSENT_KEY,
+    }
+
+
+def test_scraper_pickles_without_browser():
+    scraper = pickle.loads(pickle.dumps(AmazonScraper("123", BrowserPool(max_pages=1))))
+
+    assert scraper.browser is None
+    assert scraper.ASIN == "123"
+
+
+def test_rate_limiter(mocker):
+    monotonic = mocker.patch("src.scraper.browser.time.monotonic", return_value=100.0)
+    limiter = HostRateLimiter(min_interval=2)
+
+    assert limiter.reserve("https://www.amazon.co.uk/dp/1") == 0
+    assert limiter.reserve("https://www.amazon.co.uk/dp/2") == 2  # noqa: PLR2004
+    assert limiter.reserve("https://www.gooutdoors.co.uk/1") == 0
+    monotonic.return_value = 103.0
+    assert limiter.reserve("https://www.amazon.co.uk/dp/3") == 1
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+from selectolax.parser import HTMLParser
+
+from src.scraper import Field, FieldExtractor, FieldMatch
+
+PRODUCT = {
+    "@context": "https://schema.org",
+    "@type": "Product",
+    "name": "Coding Book",
+    "offers": {"@type": "Offer", "price": "30", "priceCurrency": "GBP"},
+}
+
+
+@pytest.fixture()
+def extractor():
+    return FieldExtractor(
+        {
+            "price": Field(("span.sale-price", "span.price[data-kind=regular]"), json_ld=("Offer", "price")),
+            "title": Field(("h1#title",), json_ld=("Product", "name")),
+            "rating": Field(("span.stars",)),
+        },
+    )
+
+
+def page(body: str, json_ld: object = None) -> HTMLParser:
+    script = "" if json_ld is None else f'<script type="application/ld+json">{json.dumps(json_ld)}</script>'
+    return HTMLParser(f"<html><body>{body}{script}</body></html>")
+
+
+def test_extract(extractor):
+    html = page('<h1 id="title">Coding Book</h1><span class="price" data-kind="regular">£35.00</span>')
+
+    assert extractor.extract(html) == {
+        "title": FieldMatch("Coding Book", "h1#title"),
+        "price": FieldMatch("£35.00", "span.price[data-kind=regular]", fallback=True),
+    }
+
+
+def test_extract_prefers_first_selector(extractor):
+    html = page(
+        '<span class="price" data-kind="regular">£35.00</span>'
+        '<span class="sale-price big">£30.00</span>'
+        '<span class="sale-price">£25.00</span>',
+    )
+
+    assert extractor.extract(html)["price"] == FieldMatch("£30.00", "span.sale-price")
+
+
+def test_extract_ignores_partial_matches(extractor):
+    html = page('<div id="title">Coding Book</div><span class="price" data-kind="sale">£35.00</span>')
+
+    assert extractor.extract(html) == {}
+
+
+def test_extract_json_ld_fallback(extractor):
+    html = page('<h1 id="title">Coding Book (2nd edition)</h1>', json_ld={"@graph": [PRODUCT]})
+
+    assert extractor.extract(html) == {
+        "title": FieldMatch("Coding Book (2nd edition)", "h1#title"),
+        "price": FieldMatch("£30.00", "json-ld:Offer.price", fallback=True),
+    }
+
+
+def test_extract_invalid_json_ld(extractor):
+    html = HTMLParser('<script type="application/ld+json">{"@type": </script>')
+
+    assert extractor.extract(html) == {}
+
+
+def test_extract_from_node(extractor):
+    html = page('<div class="card"><h1 id="title">Coding Book</h1></div><span class="stars">5</span>')
+
+    assert extractor.extract(html.css_first("div.card")) == {"title": FieldMatch("Coding Book", "h1#title")}
+
+
+def test_only_compound_selectors():
+    with pytest.raises(ValueError, match="compound selectors"):
+        FieldExtractor({"price": Field(("div.product span.price",))})
@@ -1,6 +1,7 @@
+import httpx
 import pytest
 
-from src.scraper import GoOutdoorsScraper, ScraperError
+from src.scraper import GoOutdoorsScraper, ScraperError, ScrapeTimeoutError
 
 
 @pytest.fixture()
@@ -46,11 +47,15 @@ def test_init(scraper):
     assert expected_url == scraper.URL
 
 
-def test_get_html(mock_http_get_with_data, scraper):
-    # as we've added span tags to the html, we can check for them here instead of checking
-    # for the whole html.
+def test_get_html(mock_http_get_no_data, scraper):
+    # the page is kept for debugging when the price and title are not found
     scraper.run()
-    assert "</span>" in scraper.get_html()
+    assert scraper.get_html() == "<html></html>"
+
+
+def test_get_html_not_kept(mock_http_get_with_data, scraper):
+    assert scraper.run() is True
+    assert scraper.get_html() is None
 
 
 def test_get_html_no_html(mock_http_get_no_html, scraper):
@@ -80,3 +85,19 @@ def test_get_price_no_price(mock_http_get_no_data, scraper):
     result = scraper.run()
     assert result is False
     assert scraper.get_price() == scraper.PRICE_404
+
+
+@pytest.mark.parametrize(
+    ("error", "stage"),
+    [
+        (httpx.ConnectTimeout("slow"), "connect"),
+        (httpx.ReadTimeout("slow"), "navigation"),
+    ],
+)
+def test_run_timeout(mocker, scraper, error, stage):
+    mocker.patch("httpx.get", side_effect=error)
+
+    with pytest.raises(ScrapeTimeoutError) as e:
+        scraper.run()
+
+    assert e.value.stage == stage